@@ -4,37 +4,58 @@ from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import get_db
 from models import User
 from schemas import UserCreate, Token
-from utils import hash_password, verify_password, create_access_token
+from utils import (
+    create_access_token,
+    hash_password_async,
+    invalidate_cached_user,
+    password_needs_rehash,
+    verify_password_async,
+)
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=Token)
-def register_user(payload: UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(User).filter(User.email == payload.email).first()
+async def register_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
+    existing = await db.scalar(select(User).where(User.email == payload.email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
+    # Hand the pooled connection back while bcrypt runs on its own executor
+    await db.rollback()
 
-    user = User(email=payload.email, password_hash=hash_password(payload.password))
+    user = User(email=payload.email, password_hash=await hash_password_async(payload.password))
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
 
-    token = create_access_token({"sub": str(user.id)}, expires_delta=timedelta(minutes=60))
+    token = create_access_token({"sub": str(user.id), "email": user.email}, expires_delta=timedelta(minutes=60))
     return Token(access_token=token)
 
 
 @router.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, str(user.password_hash)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    user_id, email, password_hash = user.id, user.email, str(user.password_hash)
+    # Hand the pooled connection back while bcrypt runs on its own executor
+    await db.rollback()
 
-    token = create_access_token({"sub": str(user.id)}, expires_delta=timedelta(minutes=60))
-    return Token(access_token=token)
\ No newline at end of file
+    if not await verify_password_async(form_data.password, password_hash):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+
+    # Upgrade hashes made with an older BCRYPT_ROUNDS while we have the plain password
+    if password_needs_rehash(password_hash):
+        new_hash = await hash_password_async(form_data.password)
+        await db.execute(update(User).where(User.id == user_id).values(password_hash=new_hash))
+        await db.commit()
+        invalidate_cached_user(user_id)
+
+    token = create_access_token({"sub": str(user_id), "email": email}, expires_delta=timedelta(minutes=60))
+    return Token(access_token=token)
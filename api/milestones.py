@@ -1,14 +1,34 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import get_db
+from models import User
+from services.user_stats import get_milestones
+from utils import get_current_user
 
 router = APIRouter()
 
-@router.get("/{user_id}")
-def get_milestones(user_id: str):
-    # TODO: Query DB for user stats
+
+async def milestones_response(db: AsyncSession, user_id: int) -> dict:
+    # One primary-key read of user_stats; the counters are kept current as notes and transliterations happen
     return {
         "status": "success",
         "milestones": [
-            {"type": "Scripts Read", "value": 3},
-            {"type": "Locations Visited", "value": 5}
+            {"type": label, "value": value}
+            for label, value in (await get_milestones(db, user_id)).items()
         ]
     }
+
+
+@router.get("/me")
+async def get_my_milestones(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    return await milestones_response(db, current_user.id)
+
+
+@router.get("/{user_id}")
+async def get_user_milestones(
+    user_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)
+):
+    if user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not allowed to view this user's milestones")
+    return await milestones_response(db, user_id)
@@ -1,123 +1,351 @@
 from __future__ import annotations
 from __future__ import annotations
 
-from typing import List
+from datetime import datetime, timezone
+import os
+from typing import List, Optional, Tuple
 import base64
 
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Response
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File, Form, HTTPException, Query, Request, Response
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-import io
+import numpy as np
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from starlette.concurrency import run_in_threadpool
 
 from db import get_db
 from models import Note, User
-from schemas import NoteCreate, NoteOut
+from schemas import NoteCreate, NoteOut, NoteNearbyOut
+from services.blob_store import get_blob_store
+from services.geo import BBox, bbox_around, geohash_cover, geohash_encode, haversine_km, in_bbox
+from services.http_cache import (
+    RangeNotSatisfiableError,
+    etag_matches,
+    http_date,
+    if_range_allows,
+    not_modified_since,
+    parse_range,
+    strong_etag,
+)
+from services.photo_derivatives import derivative_filename, generate_photo_derivatives, get_photo_derivative
+from services.uploads import store_upload
+from services.user_stats import record_note
+from services.write_queue import WRITE_QUEUE, write_queue
 from utils import get_current_user
 
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
 
+async def save_note(db: AsyncSession, **values) -> Note:
+    """Insert a note and count it towards the user's milestones in one transaction."""
+    async def insert(session: AsyncSession) -> Note:
+        note = Note(**values)
+        session.add(note)
+        await record_note(session, note)
+        return note
+
+    if WRITE_QUEUE:
+        # Hand the request's pooled connection back; the writer task uses its own
+        await db.rollback()
+        # Group-committed with other writes by the single writer task
+        return await write_queue.submit(insert)
+    note = await insert(db)
+    await db.commit()
+    return note
+
+
 @router.post("/add", response_model=NoteOut)
-def add_note(payload: NoteCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    note = Note(
+async def add_note(payload: NoteCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    return await save_note(
+        db,
         user_id=current_user.id,
         latitude=payload.latitude,
         longitude=payload.longitude,
+        geohash=geohash_encode(payload.latitude, payload.longitude),
         text=payload.text,
     )
-    db.add(note)
-    db.commit()
-    db.refresh(note)
-    return note
 
 
 @router.post("/add-with-photo", response_model=NoteOut)
 async def add_note_with_photo(
+    background_tasks: BackgroundTasks,
     text: str = Form(...),
     latitude: float = Form(...),
     longitude: float = Form(...),
     photo: UploadFile = File(...),
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_db), 
     current_user: User = Depends(get_current_user)
 ):
-    """Add a note with an attached photo."""
+    """Add a note with an attached photo.
+
+    Thumbnails are rendered after the response is sent.
+    """
     
     # Validate photo
     content_type = getattr(photo, 'content_type', None)
     if not content_type or not content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
-    # Read photo data
-    photo_data = await photo.read()
+    # Stream the photo into the blob store, the note only references it
+    photo_key, photo_size = await store_upload(photo, content_type)
     
     # Create note with photo
-    note = Note(
+    note = await save_note(
+        db,
         user_id=current_user.id,
         latitude=latitude,
         longitude=longitude,
+        geohash=geohash_encode(latitude, longitude),
         text=text,
-        photo_data=photo_data,
+        has_photo=True,
+        photo_key=photo_key,
+        photo_size=photo_size,
         photo_filename=photo.filename,
         photo_content_type=photo.content_type,
     )
-    
-    db.add(note)
-    db.commit()
-    db.refresh(note)
-    
+    background_tasks.add_task(generate_photo_derivatives, photo_key, content_type)
     return note
 
 
+# Columns needed to render a listing; anything photo related beyond these stays unloaded.
+NOTE_LIST_COLUMNS = (
+    Note.id,
+    Note.latitude,
+    Note.longitude,
+    Note.text,
+    Note.has_photo,
+    Note.photo_size,
+    Note.photo_filename,
+    Note.photo_content_type,
+    Note.created_at,
+)
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    """``value`` as naive UTC, which is how created_at is stored."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def encode_cursor(created_at: datetime, note_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{note_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, note_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(note_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/", response_model=List[NoteOut])
-def list_notes(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    notes = db.query(Note).filter(Note.user_id == current_user.id).order_by(Note.created_at.desc()).all()
-    
-    # Add has_photo field to each note
-    notes_with_photo_info = []
-    for note in notes:
-        photo_data = getattr(note, 'photo_data', None)
-        note_dict = {
-            "id": note.id,
-            "latitude": note.latitude,
-            "longitude": note.longitude,
-            "text": note.text,
-            "photo_filename": getattr(note, 'photo_filename', None),
-            "photo_content_type": getattr(note, 'photo_content_type', None),
-            "has_photo": photo_data is not None,
-            "created_at": note.created_at
-        }
-        notes_with_photo_info.append(note_dict)
-    
-    return notes_with_photo_info
+async def list_notes(
+    response: Response,
+    limit: Optional[int] = Query(
+        None, ge=1, le=MAX_PAGE_SIZE, description=f"Page size; {DEFAULT_PAGE_SIZE} when paging with a cursor"
+    ),
+    cursor: Optional[str] = Query(None, description=f"Value of the previous page's {NEXT_CURSOR_HEADER} header"),
+    since: Optional[datetime] = Query(None, description="Only notes created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only notes created before this time"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """List the user's notes, newest first, one page at a time.
+
+    Pages are keyed on (created_at, id) rather than offsets, so each page is a
+    range scan of ix_notes_user_created_id no matter how deep the client pages.
+    Without ``limit`` or ``cursor`` every note is returned, as older clients expect.
+    """
+    query = (
+        select(Note)
+        .options(load_only(*NOTE_LIST_COLUMNS))
+        .where(Note.user_id == current_user.id)
+    )
+    since, until = _utc(since), _utc(until)
+    if since is not None:
+        query = query.where(Note.created_at >= since)
+    if until is not None:
+        query = query.where(Note.created_at < until)
+    if cursor is not None:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Note.created_at < cursor_created_at,
+            and_(Note.created_at == cursor_created_at, Note.id < cursor_id),
+        ))
+
+    query = query.order_by(Note.created_at.desc(), Note.id.desc())
+    if limit is None and cursor is None:
+        return (await db.scalars(query)).all()
+    limit = limit or DEFAULT_PAGE_SIZE
+    notes = (await db.scalars(query.limit(limit + 1))).all()
+    if len(notes) > limit:
+        notes = notes[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(notes[-1].created_at, notes[-1].id)
+    return notes
+
+
+async def _notes_in_cells(db: AsyncSession, user_id: int, bbox: BBox):
+    """Candidate (id, latitude, longitude) arrays for notes whose geohash falls in cells covering bbox."""
+    # "{" sorts right after "z", the last geohash character, so each prefix is one range scan.
+    prefix_ranges = [and_(Note.geohash >= prefix, Note.geohash < prefix + "{") for prefix in geohash_cover(bbox)]
+    rows = (await db.execute(
+        select(Note.id, Note.latitude, Note.longitude)
+        .where(Note.user_id == user_id, or_(*prefix_ranges))
+    )).all()
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    lats = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+    lons = np.fromiter((row[2] for row in rows), dtype=np.float64, count=len(rows))
+    return ids, lats, lons
+
+
+async def _load_notes(db: AsyncSession, ids: List[int]) -> List[Note]:
+    query = select(Note).options(load_only(*NOTE_LIST_COLUMNS)).where(Note.id.in_(ids))
+    notes = {note.id: note for note in (await db.scalars(query)).all()}
+    return [notes[note_id] for note_id in ids]
+
+
+@router.get("/nearby", response_model=List[NoteNearbyOut])
+async def nearby_notes(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(1.0, gt=0, le=500),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """The user's notes within radius_km of a point, nearest first."""
+    ids, lats, lons = await _notes_in_cells(db, current_user.id, bbox_around(lat, lon, radius_km))
+    distances = haversine_km(lat, lon, lats, lons)
+    inside = np.flatnonzero(distances <= radius_km)
+    order = inside[np.argsort(distances[inside], kind="stable")][:limit]
+
+    notes = await _load_notes(db, ids[order].tolist())
+    return [
+        NoteNearbyOut(**NoteOut.model_validate(note).model_dump(), distance_km=round(float(distance), 4))
+        for note, distance in zip(notes, distances[order])
+    ]
+
+
+@router.get("/within", response_model=List[NoteOut])
+async def notes_within(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """The user's notes inside a bounding box. min_lon > max_lon crosses the antimeridian."""
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat must not exceed max_lat")
+    bbox = (min_lat, min_lon, max_lat, max_lon if max_lon >= min_lon else max_lon + 360.0)
+    ids, lats, lons = await _notes_in_cells(db, current_user.id, bbox)
+    selected = ids[in_bbox(lats, lons, bbox)]
+    return await _load_notes(db, sorted(selected.tolist(), reverse=True)[:limit])
+
+
+# Columns needed to serve a photo.
+NOTE_PHOTO_COLUMNS = (
+    Note.id,
+    Note.created_at,
+    Note.photo_key,
+    Note.photo_size,
+    Note.photo_filename,
+    Note.photo_content_type,
+)
+
+# How long clients may reuse a photo without asking again. Photos are immutable.
+NOTE_PHOTO_MAX_AGE_SECONDS = int(os.getenv("NOTE_PHOTO_MAX_AGE_SECONDS", str(365 * 24 * 3600)))
 
 
 @router.get("/{note_id}/photo")
-def get_note_photo(
+async def get_note_photo(
     note_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    size: str = Query("original", pattern="^(thumb|medium|original)$"),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get the photo associated with a note."""
+    """Get the photo associated with a note.
+
+    ``size=thumb`` or ``size=medium`` returns a downscaled copy, rendered on
+    first use if the upload's background job has not produced it yet.
+
+    Photos never change once stored, so the content hash doubles as a strong
+    ETag: revalidation answers 304 without touching the blob store, and a
+    single byte range is served as 206 Partial Content.
+    """
     
-    note = db.query(Note).filter(
+    note = await db.scalar(select(Note).options(load_only(*NOTE_PHOTO_COLUMNS)).where(
         Note.id == note_id,
         Note.user_id == current_user.id
-    ).first()
+    ))
     
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
+    if note.photo_key is None:
+        raise HTTPException(status_code=404, detail="No photo found for this note")
     
-    photo_data = getattr(note, 'photo_data', None)
-    if photo_data is None:
+    photo_key = note.photo_key
+    byte_size = note.photo_size
+    content_type = note.photo_content_type or "image/jpeg"
+    filename = note.photo_filename or 'photo.jpg'
+    if size != "original":
+        derivative = await get_photo_derivative(db, photo_key, size, content_type)
+        if derivative is not None:
+            filename = derivative_filename(filename, size, derivative.content_type)
+            photo_key, byte_size, content_type = derivative.key, derivative.size, derivative.content_type
+    
+    etag = strong_etag(photo_key)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(note.created_at),
+        "Cache-Control": f"private, max-age={NOTE_PHOTO_MAX_AGE_SECONDS}",
+        "Accept-Ranges": "bytes",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if etag_matches(if_none_match, etag) or (
+        if_none_match is None and not_modified_since(request.headers.get("if-modified-since"), note.created_at)
+    ):
+        return Response(status_code=304, headers=headers)
+    
+    store = get_blob_store()
+    if not await run_in_threadpool(store.exists, photo_key):
         raise HTTPException(status_code=404, detail="No photo found for this note")
     
     # Return photo as streaming response
-    content_type = getattr(note, 'photo_content_type', None) or "image/jpeg"
-    filename = getattr(note, 'photo_filename', None) or 'photo.jpg'
+    headers["Content-Disposition"] = f"inline; filename={filename}"
+    
+    byte_range = None
+    if byte_size is not None and if_range_allows(request.headers.get("if-range"), etag):
+        try:
+            byte_range = parse_range(request.headers.get("range"), byte_size)
+        except RangeNotSatisfiableError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{byte_size}"})
     
+    if byte_range is None:
+        if byte_size is not None:
+            headers["Content-Length"] = str(byte_size)
+        return StreamingResponse(store.stream(photo_key), media_type=content_type, headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{byte_size}"
+    headers["Content-Length"] = str(end - start + 1)
     return StreamingResponse(
-        io.BytesIO(photo_data),
+        store.stream(photo_key, start=start, end=end),
+        status_code=206,
         media_type=content_type,
-        headers={"Content-Disposition": f"inline; filename={filename}"}
-    )
\ No newline at end of file
+        headers=headers,
+    )
@@ -1,5 +1,21 @@
-from fastapi import APIRouter, UploadFile, Form
-from services import ocr_service, transliteration
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import AsyncSessionLocal, get_db
+from models import OCRJob, User
+from schemas import OCRJobOut
+from services import ocr_service
+from services.image_preprocess import get_preset
+from services.ocr_jobs import FINISHED, OCR_JOB_POLL_SECONDS, new_job_id, runner
+from services.script_detect import AUTO_SCRIPT
+from services.translit_engine import DEFAULT_TARGET_SCRIPT, engine, normalize_script_name, require_scripts
+from services.uploads import store_upload
+from utils import get_optional_user
 
 router = APIRouter()
 
@@ -7,18 +23,122 @@ router = APIRouter()
 async def transliterate(
     target_script: str = Form(...),
     file: UploadFile = None,
-    text: str = Form(None)
+    text: str = Form(None),
+    preprocess: str = Form(None)
 ):
+    target_script = normalize_script_name(target_script) or DEFAULT_TARGET_SCRIPT
+    require_scripts(target_script)
     if file:
-        extracted_text = await ocr_service.extract_text(file)
+        try:
+            options = get_preset(preprocess)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        extracted_text = await ocr_service.extract_text(file, options=options)
     else:
-        extracted_text = text
+        extracted_text = text or ""
 
-    result = transliteration.convert_text(extracted_text, target_script)
+    conversion = await engine.convert(extracted_text, None, target_script)
     return {
         "status": "success",
         "source_text": extracted_text,
         "target_script": target_script,
-        "transliterated_text": result
+        "transliterated_text": conversion.text,
+        "detected_script": conversion.detected_script,
     }
 
+
+@router.post("/jobs", response_model=OCRJobOut, status_code=202)
+async def create_ocr_job(
+    request: Request,
+    response: Response,
+    file: UploadFile = File(...),
+    target_script: str = Form(...),
+    source_script: Optional[str] = Form(None),
+    preprocess: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """Queue OCR + transliteration of an image and return at once; poll the job for the result."""
+    # Left out, the source script is detected from the recognised text
+    source = normalize_script_name(source_script)
+    target = normalize_script_name(target_script) or DEFAULT_TARGET_SCRIPT
+    require_scripts(source, target)
+    try:
+        options = get_preset(preprocess)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    image_key, _ = await store_upload(file, file.content_type)
+    job = OCRJob(
+        id=new_job_id(),
+        user_id=current_user.id if current_user else None,
+        image_key=image_key,
+        lang=ocr_service.DOCUMENT_LANG,
+        preprocess=options.name,
+        source_script=source or AUTO_SCRIPT,
+        target_script=target,
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    runner.enqueue(job.id)
+    response.headers["Location"] = str(request.url_for("get_ocr_job", job_id=job.id))
+    return job
+
+
+async def _get_job(db: AsyncSession, job_id: str, user: Optional[User]) -> OCRJob:
+    job = await db.get(OCRJob, job_id)
+    # Jobs of signed-in users are private to them; anonymous ones are reachable by id alone
+    if job is None or (job.user_id is not None and (user is None or user.id != job.user_id)):
+        raise HTTPException(status_code=404, detail="OCR job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=OCRJobOut)
+async def get_ocr_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    return await _get_job(db, job_id, current_user)
+
+
+async def job_events(job_id: str):
+    """Server-sent events: the job each time its status changes, ending once it has finished."""
+    changed = runner.watch(job_id)
+    last_status = None
+    try:
+        while True:
+            changed.clear()
+            async with AsyncSessionLocal() as db:
+                job = await db.get(OCRJob, job_id)
+            if job is None:
+                # Deleted while being watched, e.g. with its user
+                yield f"event: error\ndata: {json.dumps({'detail': 'OCR job not found'})}\n\n"
+                return
+            if job.status != last_status:
+                last_status = job.status
+                yield f"event: status\ndata: {OCRJobOut.model_validate(job).model_dump_json()}\n\n"
+            if job.status in FINISHED:
+                return
+            try:
+                # Woken by jobs run in this process; others are caught by re-reading
+                await asyncio.wait_for(changed.wait(), OCR_JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    finally:
+        runner.unwatch(job_id, changed)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_ocr_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    await _get_job(db, job_id, current_user)
+    return StreamingResponse(
+        job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,35 @@
-from fastapi import APIRouter
+from typing import Optional
+
+from fastapi import APIRouter, Query
+
+from services.poi_index import index as poi_index
 
 router = APIRouter()
 
 @router.get("/nearby")
-def get_nearby(lat: float, lon: float):
-    # TODO: Call Google Maps / Places API
+def get_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=2000, description="Only places within this distance; omit for the nearest ones"),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """Heritage sites near a point, nearest first, from the locally shipped dataset."""
+    if radius_km is None:
+        matches = poi_index.nearest(lat, lon, limit)
+    else:
+        matches = poi_index.within_radius(lat, lon, radius_km, limit)
     return {
         "status": "success",
         "places": [
-            {"name": "India Gate", "type": "Monument", "distance_km": 1.2},
-            {"name": "Rashtrapati Bhavan", "type": "Heritage Building", "distance_km": 3.5}
+            {
+                "name": poi.name,
+                "type": poi.type,
+                "city": poi.city,
+                "state": poi.state,
+                "latitude": poi.latitude,
+                "longitude": poi.longitude,
+                "distance_km": round(distance, 2),
+            }
+            for poi, distance in matches
         ]
     }
@@ -1,88 +1,261 @@
 from __future__ import annotations
 
 import io
-from typing import Optional
+import json
+import logging
+import tempfile
+from typing import Iterable, Iterator, Optional
 
-from fastapi import APIRouter, File, Form, UploadFile, HTTPException
-from PIL import Image
-import pytesseract
-from indic_transliteration import sanscript
-from indic_transliteration.sanscript import SchemeMap, SCHEMES, transliterate
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, Query, Request, UploadFile, HTTPException
+from fastapi.responses import StreamingResponse
+from PIL import UnidentifiedImageError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from schemas import TransliterateTextIn, TransliterateOut
+from db import AsyncSessionLocal
+from models import User
+from schemas import TransliterateTextIn, TransliterateOut, TransliterateBatchIn, TransliterateBatchOut
+from services.image_preprocess import get_preset
+from services.ocr_pool import OCRQueueFullError, OCRTimeoutError, OCRWorkerCrashedError
+from services.ocr_service import ocr_upload
+from services.translit_engine import (
+    DEFAULT_SOURCE_SCRIPT,
+    DEFAULT_TARGET_SCRIPT,
+    engine,
+    normalize_script_name,
+    require_scripts,
+)
+from services.uploads import UploadTooLargeError
+from services.user_stats import record_transliteration, scripts_recorded, unrecorded_scripts
+from services.write_queue import WRITE_QUEUE, write_queue
+from utils import get_optional_user
 
 
 router = APIRouter(prefix="/transliterate", tags=["transliteration"])
 
 
-def normalize_script_name(name: Optional[str]) -> Optional[str]:
-    if not name:
-        return None
-    key = name.strip().lower()
-    # Map common aliases
-    alias = {
-        "devanagari": sanscript.DEVANAGARI,
-        "hindi": sanscript.DEVANAGARI,
-        "iast": sanscript.IAST,
-        "itrans": sanscript.ITRANS,
-        "telugu": sanscript.TELUGU,
-        "kannada": sanscript.KANNADA,
-        "tamil": sanscript.TAMIL,
-        "malayalam": sanscript.MALAYALAM,
-        "gujarati": sanscript.GUJARATI,
-        "gurmukhi": sanscript.GURMUKHI,
-        "bengali": sanscript.BENGALI,
-        "oriya": sanscript.ORIYA,
-    }
-    return alias.get(key, key)
+logger = logging.getLogger(__name__)
 
 
-@router.post("/", response_model=TransliterateOut)
-def transliterate_text(payload: TransliterateTextIn):
-    source_script = normalize_script_name(payload.source_script) or sanscript.DEVANAGARI
-    target_script = normalize_script_name(payload.target_script) or sanscript.IAST
+async def _record_read(user: User, source_script: str) -> None:
+    async def write(db: AsyncSession) -> None:
+        await record_transliteration(db, user.id, [source_script])
+
+    try:
+        if WRITE_QUEUE:
+            await write_queue.submit(write)
+        else:
+            async with AsyncSessionLocal() as db:
+                await write(db)
+                await db.commit()
+    except Exception:
+        # The reader already has their text; the count is caught up the next time
+        logger.warning("Could not record a transliteration for user %s", user.id, exc_info=True)
+        return
+    scripts_recorded(user, [source_script])
+
 
-    if source_script not in SCHEMES or target_script not in SCHEMES:
-        raise HTTPException(status_code=400, detail="Unsupported script specified")
+def record_read(background_tasks: BackgroundTasks, user: Optional[User], source_script: str) -> None:
+    """Count the source script towards a signed-in user's milestones.
 
-    result = transliterate(payload.source_text, source_script, target_script)
+    Only a script the user has not read before is written, and after the
+    response is sent, so transliteration never waits on the database.
+    """
+    if user is not None and unrecorded_scripts(user, [source_script]):
+        background_tasks.add_task(_record_read, user, source_script)
+
+
+@router.post("/", response_model=TransliterateOut)
+async def transliterate_text(
+    payload: TransliterateTextIn,
+    background_tasks: BackgroundTasks,
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    target_script = normalize_script_name(payload.target_script) or DEFAULT_TARGET_SCRIPT
+    # Without a source script, mixed-script text is converted run by run, each from its own script
+    conversion = await engine.convert(payload.source_text, normalize_script_name(payload.source_script), target_script)
+    record_read(background_tasks, current_user, conversion.source_script)
     return TransliterateOut(
         source_text=payload.source_text,
-        source_script=source_script,
+        source_script=conversion.source_script,
         target_script=target_script,
-        transliterated_text=result,
+        transliterated_text=conversion.text,
+        detected_script=conversion.detected_script,
     )
 
 
+@router.post("/batch", response_model=TransliterateBatchOut)
+async def transliterate_batch(
+    payload: TransliterateBatchIn,
+    background_tasks: BackgroundTasks,
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """Transliterate every text into every target script in one round trip."""
+    source_script = normalize_script_name(payload.source_script) or DEFAULT_SOURCE_SCRIPT
+    target_scripts = [normalize_script_name(name) or DEFAULT_TARGET_SCRIPT for name in payload.target_scripts]
+    results = await engine.convert_batch(payload.texts, source_script, target_scripts)
+    record_read(background_tasks, current_user, source_script)
+    return TransliterateBatchOut(source_script=source_script, target_scripts=target_scripts, results=results)
+
+
+# Request bodies larger than this are spooled to a temporary file on disk.
+STREAM_SPOOL_BYTES = 1024 * 1024
+# Longest line or paragraph converted at once; longer ones are split at whitespace.
+STREAM_MAX_SEGMENT_CHARS = 64 * 1024
+
+
+def _cut(segment: str, max_chars: int) -> int:
+    """Where to split an over-long segment: after its last whitespace within ``max_chars``."""
+    head = segment[:max_chars]
+    space = max(head.rfind(" "), head.rfind("\t"), head.rfind("\n"))
+    return space + 1 if space > 0 else max_chars
+
+
+def iter_text_units(lines: Iterable[str], unit: str, max_chars: int = STREAM_MAX_SEGMENT_CHARS) -> Iterator[str]:
+    """Yield a document line by line, or paragraph by paragraph (blank-line separated).
+
+    ``lines`` may break a long line into several pieces. A line or paragraph
+    longer than ``max_chars`` is yielded in segments, each split after the last
+    whitespace that fits, so memory use stays bounded even without newlines.
+    """
+    buffer = ""
+    # In paragraph mode, the start of the current line while it is still blank
+    blank: Optional[str] = ""
+    in_paragraph = False
+    for piece in lines:
+        ended = piece.endswith("\n")
+        text = piece.rstrip("\r\n") if ended else piece
+        if unit == "line":
+            buffer += text
+        elif blank is None:
+            buffer += text
+        elif (blank + text).strip():
+            buffer += ("\n" if in_paragraph else "") + blank + text
+            blank = None
+            in_paragraph = True
+        elif ended:
+            if in_paragraph:
+                yield buffer
+            buffer, blank, in_paragraph = "", "", False
+            continue
+        else:
+            blank += text
+        while len(buffer) > max_chars:
+            cut = _cut(buffer, max_chars)
+            yield buffer[:cut]
+            buffer = buffer[cut:]
+        if ended:
+            if unit == "line":
+                yield buffer
+                buffer = ""
+            else:
+                blank = ""
+    if buffer or in_paragraph:
+        yield buffer
+
+
+def transliterate_units(units: Iterable[str], source_script: str, target_script: str) -> Iterator[dict]:
+    for index, source_text in enumerate(units):
+        yield {
+            "index": index,
+            "source_text": source_text,
+            "transliterated_text": engine.transliterate(source_text, source_script, target_script),
+        }
+
+
+def encode_events(results: Iterable[dict], fmt: str) -> Iterator[str]:
+    for result in results:
+        payload = json.dumps(result, ensure_ascii=False)
+        yield f"data: {payload}\n\n" if fmt == "sse" else payload + "\n"
+    if fmt == "sse":
+        yield "event: end\ndata: {}\n\n"
+
+
+def stream_document(spool, unit: str, source_script: str, target_script: str, fmt: str) -> Iterator[str]:
+    text = io.TextIOWrapper(spool, encoding="utf-8", errors="replace")
+    # Bounded reads, so a document without newlines is never read into memory whole
+    lines = iter(lambda: text.readline(STREAM_MAX_SEGMENT_CHARS), "")
+    units = iter_text_units(lines, unit, STREAM_MAX_SEGMENT_CHARS)
+    try:
+        yield from encode_events(transliterate_units(units, source_script, target_script), fmt)
+    finally:
+        text.close()
+
+
+@router.post("/stream")
+async def transliterate_stream(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    target_script: str = Query(...),
+    source_script: Optional[str] = Query(None),
+    unit: str = Query("line", pattern="^(line|paragraph)$"),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    current_user: Optional[User] = Depends(get_optional_user),
+):
+    """Transliterate a plain-text request body of any size.
+
+    The body is spooled to disk as it arrives, then converted and emitted one
+    line (or blank-line separated paragraph) at a time as NDJSON or
+    Server-Sent Events, so memory use does not grow with the document.
+    Output starts once the upload completes: most HTTP/1.1 clients do not read
+    a response until they have sent the whole request body.
+    """
+    src_script = normalize_script_name(source_script) or DEFAULT_SOURCE_SCRIPT
+    tgt_script = normalize_script_name(target_script) or DEFAULT_TARGET_SCRIPT
+    require_scripts(src_script, tgt_script)
+
+    spool = tempfile.SpooledTemporaryFile(max_size=STREAM_SPOOL_BYTES)
+    try:
+        async for chunk in request.stream():
+            # Once rolled over to disk, writes block, so they leave the event loop like UploadFile's do
+            if getattr(spool, "_rolled", True):
+                await run_in_threadpool(spool.write, chunk)
+            else:
+                spool.write(chunk)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    record_read(background_tasks, current_user, src_script)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream_document(spool, unit, src_script, tgt_script, format), media_type=media_type)
+
+
 @router.post("/image", response_model=TransliterateOut)
 async def transliterate_image(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     source_script: Optional[str] = Form(None),
     target_script: str = Form(...),
+    preprocess: Optional[str] = Form(None),
+    current_user: Optional[User] = Depends(get_optional_user),
 ):
     try:
-        content = await file.read()
-        image = Image.open(io.BytesIO(content))
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid image file")
+        options = get_preset(preprocess)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    src_script = normalize_script_name(source_script)
+    tgt_script = normalize_script_name(target_script) or DEFAULT_TARGET_SCRIPT
+    # Checked before OCR rather than after it
+    require_scripts(src_script, tgt_script)
 
-    # OCR with pytesseract. Users must have appropriate language data installed (e.g., hin).
-    # Default to English if not specified; allow specifying custom language via filename hint later.
-    ocr_lang = "eng+hin"  # Try both for MVP
+    # Language packs are picked per image from the scripts found on it (OCR_LANG, OCR_DETECT_LANGS)
     try:
-        extracted_text = pytesseract.image_to_string(image, lang=ocr_lang)
+        extracted_text = await ocr_upload(file, options=options)
+    except UnidentifiedImageError:
+        raise HTTPException(status_code=400, detail="Invalid image file")
+    except (OCRQueueFullError, OCRTimeoutError, OCRWorkerCrashedError, UploadTooLargeError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OCR failed: {str(e)}")
 
-    src_script = normalize_script_name(source_script) or sanscript.DEVANAGARI
-    tgt_script = normalize_script_name(target_script) or sanscript.IAST
-    if src_script not in SCHEMES or tgt_script not in SCHEMES:
-        raise HTTPException(status_code=400, detail="Unsupported script specified")
-
-    result = transliterate(extracted_text, src_script, tgt_script)
+    conversion = await engine.convert(extracted_text, src_script, tgt_script)
+    record_read(background_tasks, current_user, conversion.source_script)
     return TransliterateOut(
         source_text=extracted_text,
-        source_script=src_script,
+        source_script=conversion.source_script,
         target_script=tgt_script,
-        transliterated_text=result,
+        transliterated_text=conversion.text,
+        detected_script=conversion.detected_script,
     )
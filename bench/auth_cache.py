@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /notes/ throughput with and without the authenticated-user cache.
+
+Seeds a throwaway SQLite database with one user and a page of notes, then
+calls the listing endpoint repeatedly in three modes:
+
+- no cache: every request looks the user up in the users table (the old behaviour)
+- user cache: the user row is served from the in-process cache (AUTH_USER_CACHE_TTL_SECONDS)
+- trusted claims: the user is built from the token alone (AUTH_TRUST_TOKEN_CLAIMS=1)
+
+and reports requests per second plus SQL statements issued per request.
+
+Usage:
+    python -m bench.auth_cache [requests] [notes]   (default: 2000 requests, 20 notes)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+TMP_DIR = tempfile.mkdtemp(prefix="bench_auth_")
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP_DIR}/bench.db"
+os.environ["BLOB_STORE_ROOT"] = f"{TMP_DIR}/blobs"
+os.environ["AUTH_USER_CACHE_STAMP"] = f"{TMP_DIR}/auth_cache_stamp"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import main
+import utils
+from db import SessionLocal, async_engine, engine
+from models import Note, User
+from services.user_cache import user_cache
+from utils import create_access_token, hash_password
+
+
+def seed(notes: int) -> str:
+    db = SessionLocal()
+    try:
+        user = User(email="bench@example.com", password_hash=hash_password("benchmark"))
+        db.add(user)
+        db.commit()
+        db.add_all(
+            Note(user_id=user.id, latitude=28.6, longitude=77.2, text=f"Signboard {i}")
+            for i in range(notes)
+        )
+        db.commit()
+        return create_access_token({"sub": str(user.id), "email": user.email})
+    finally:
+        db.close()
+
+
+def main_bench():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    notes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    headers = {"Authorization": f"Bearer {seed(notes)}"}
+    statements = [0]
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def count_statement(*args):
+        statements[0] += 1
+
+    modes = [
+        ("no cache", 0.0, False),
+        ("user cache", 30.0, False),
+        ("trusted claims", 30.0, True),
+    ]
+    client = TestClient(main.app)
+    print(f"📊 GET /notes/ ({notes} notes), {requests} requests per mode\n")
+    print(f"{'Mode':<16} {'req/s':>8} {'ms/req':>8} {'SQL/req':>8}")
+    print("-" * 43)
+    baseline = None
+    for label, ttl, trust_claims in modes:
+        user_cache.ttl = ttl
+        user_cache.clear()
+        utils.AUTH_TRUST_TOKEN_CLAIMS = trust_claims
+        client.get("/notes/", headers=headers)  # warm up, fills the cache
+
+        statements[0] = 0
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = client.get("/notes/", headers=headers)
+            assert response.status_code == 200 and len(response.json()) == notes
+        elapsed = time.perf_counter() - start
+
+        rate = requests / elapsed
+        baseline = baseline or rate
+        print(
+            f"{label:<16} {rate:>8.0f} {elapsed / requests * 1000:>8.2f} {statements[0] / requests:>8.1f}"
+            f"   ({rate / baseline:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    try:
+        main_bench()
+    finally:
+        engine.dispose()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
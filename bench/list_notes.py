@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /notes/ for users holding hundreds of photo notes.
+
+Seeds a throwaway SQLite database where every note has a photo, once with
+small and once with large photos, and times the listing endpoint. For
+comparison it also times the old access pattern, a full-row fetch of notes
+that still carry the photo bytes in the notes.photo_data column.
+
+Usage:
+    python -m bench.list_notes [notes_per_user] [rounds]   (default: 200 notes, 10 rounds)
+"""
+
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+TMP_DIR = tempfile.mkdtemp(prefix="bench_notes_")
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP_DIR}/bench.db"
+os.environ["BLOB_STORE_ROOT"] = f"{TMP_DIR}/blobs"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import main
+from db import SessionLocal, engine
+from models import Note, User
+from services.blob_store import get_blob_store
+from utils import create_access_token, hash_password
+
+
+PHOTO_SIZES = [("20 KB", 20 * 1024), ("1 MB", 1024 * 1024)]
+
+
+def seed_user(email: str, notes: int, photo_size: int) -> int:
+    db = SessionLocal()
+    try:
+        user = User(email=email, password_hash=hash_password("benchmark"))
+        db.add(user)
+        db.commit()
+        store = get_blob_store()
+        for i in range(notes):
+            photo = os.urandom(photo_size)
+            key = store.put(photo)
+            db.add(Note(
+                user_id=user.id, latitude=28.6 + i * 1e-4, longitude=77.2, text=f"Signboard {i}",
+                has_photo=True, photo_key=key, photo_size=photo_size,
+                photo_filename=f"{i}.jpg", photo_content_type="image/jpeg",
+            ))
+        db.commit()
+        with engine.begin() as conn:
+            # The pre-blob-store layout: photo bytes inline in every notes row
+            conn.execute(
+                text("UPDATE notes SET photo_data = randomblob(:size) WHERE user_id = :user_id"),
+                {"size": photo_size, "user_id": user.id},
+            )
+        return user.id
+    finally:
+        db.close()
+
+
+def time_ms(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main_bench():
+    notes = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE notes ADD COLUMN photo_data BLOB"))
+
+    client = TestClient(main.app)
+    print(f"📊 GET /notes/ with {notes} photo notes per user, median of {rounds} rounds\n")
+    print(f"{'Photo size':<12} {'GET /notes/ ms':>15} {'Full-row fetch ms':>18}")
+    print("-" * 47)
+    for label, size in PHOTO_SIZES:
+        user_id = seed_user(f"bench-{size}@example.com", notes, size)
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+        def list_notes():
+            response = client.get("/notes/", headers=headers)
+            assert response.status_code == 200 and len(response.json()) == notes
+
+        def full_row_fetch():
+            with engine.connect() as conn:
+                conn.execute(text("SELECT * FROM notes WHERE user_id = :u ORDER BY created_at DESC"), {"u": user_id}).all()
+
+        print(f"{label:<12} {time_ms(list_notes, rounds):>15.1f} {time_ms(full_row_fetch, rounds):>18.1f}")
+
+
+if __name__ == "__main__":
+    try:
+        main_bench()
+    finally:
+        engine.dispose()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Load test: does a burst of logins slow down POST /transliterate/?
+
+Starts the app with uvicorn on a free local port against a throwaway SQLite
+database, then measures /transliterate/ latency twice: on an idle server, and
+while a burst of concurrent POST /auth/login requests is in flight. bcrypt
+work runs on its own small executor (PASSWORD_HASH_WORKERS), so transliteration
+latency should stay close to the idle numbers.
+
+Usage:
+    python -m bench.login_burst [logins] [translit_requests]   (default: 200 logins, 200 requests)
+"""
+
+import os
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TMP_DIR = tempfile.mkdtemp(prefix="bench_login_")
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP_DIR}/bench.db"
+os.environ["BLOB_STORE_ROOT"] = f"{TMP_DIR}/blobs"
+
+import httpx
+import uvicorn
+
+import main
+from db import engine
+
+EMAIL = "burst@example.com"
+PASSWORD = "benchmark-password"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def translit_latencies(base_url: str, count: int):
+    samples = []
+    with httpx.Client(timeout=60) as session:
+        for _ in range(count):
+            start = time.perf_counter()
+            response = session.post(
+                f"{base_url}/transliterate/",
+                json={"source_text": "नमस्ते भारत", "target_script": "tamil"},
+            )
+            samples.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+    return samples
+
+
+def login(base_url: str) -> int:
+    return httpx.post(f"{base_url}/auth/login", timeout=60, data={"username": EMAIL, "password": PASSWORD}).status_code
+
+
+def summarize(label: str, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<22} {statistics.median(samples):>8.1f} {p95:>8.1f} {samples[-1]:>8.1f}")
+
+
+def main_bench():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port)
+    try:
+        assert httpx.post(f"{base_url}/auth/register", json={"email": EMAIL, "password": PASSWORD}).is_success
+        translit_latencies(base_url, 20)  # warm up
+
+        print(f"📊 POST /transliterate/ latency (ms), {count} sequential requests\n")
+        print(f"{'Scenario':<22} {'p50':>8} {'p95':>8} {'max':>8}")
+        print("-" * 48)
+        summarize("idle", translit_latencies(base_url, count))
+
+        with ThreadPoolExecutor(max_workers=logins) as burst:
+            futures = [burst.submit(login, base_url) for _ in range(logins)]
+            during = translit_latencies(base_url, count)
+            statuses = [f.result() for f in futures]
+        summarize(f"{logins} concurrent logins", during)
+        print(f"\n✅ {statuses.count(200)}/{logins} logins succeeded")
+    finally:
+        server.should_exit = True
+        time.sleep(0.5)
+
+
+if __name__ == "__main__":
+    try:
+        main_bench()
+    finally:
+        engine.dispose()
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent note writes (and reads) against SQLite.
+
+Runs the app under uvicorn with a throwaway SQLite database three times:
+
+- defaults: SQLITE_PROFILE=off, rollback journal, one transaction per request
+- WAL profile: SQLITE_PROFILE=performance (WAL, synchronous=NORMAL, busy_timeout, ...)
+- WAL + write queue: the profile plus WRITE_QUEUE=1 (single writer, group commit)
+
+Each run has many clients posting to /notes/add at once while another
+client keeps listing /notes/, and reports write throughput, failed writes
+and read latency.
+
+Usage:
+    python -m bench.note_writes [clients] [writes_per_client]   (default: 50 clients, 20 writes)
+"""
+
+import asyncio
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = [
+    ("defaults", {"SQLITE_PROFILE": "off", "WRITE_QUEUE": "0"}),
+    ("WAL profile", {"SQLITE_PROFILE": "performance", "WRITE_QUEUE": "0"}),
+    ("WAL + write queue", {"SQLITE_PROFILE": "performance", "WRITE_QUEUE": "1"}),
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_load(base_url: str, clients: int, writes: int):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        response = await client.post("/auth/register", json={"email": "writer@example.com", "password": "benchmark"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        failures = 0
+        read_ms = []
+        done = asyncio.Event()
+
+        async def writer(n: int):
+            nonlocal failures
+            for i in range(writes):
+                payload = {"latitude": 28.6 + n * 1e-3, "longitude": 77.2 + i * 1e-3, "text": f"note {n}-{i}"}
+                try:
+                    response = await client.post("/notes/add", json=payload, headers=headers)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                failures += not ok
+
+        async def reader():
+            while not done.is_set():
+                start = time.perf_counter()
+                try:
+                    response = await client.get("/notes/", params={"limit": 20}, headers=headers)
+                except httpx.HTTPError:
+                    continue
+                if response.status_code == 200:
+                    read_ms.append((time.perf_counter() - start) * 1000)
+
+        reading = asyncio.create_task(reader())
+        start = time.perf_counter()
+        await asyncio.gather(*(writer(n) for n in range(clients)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await reading
+        return elapsed, failures, read_ms
+
+
+def child(clients: int, writes: int):
+    tmp_dir = tempfile.mkdtemp(prefix="bench_writes_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp_dir}/bench.db"
+    os.environ["BLOB_STORE_ROOT"] = f"{tmp_dir}/blobs"
+    os.environ["AUTH_USER_CACHE_STAMP"] = f"{tmp_dir}/auth_cache_stamp"
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    try:
+        import uvicorn
+
+        import main
+
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="critical"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+
+        elapsed, failures, read_ms = asyncio.run(run_load(f"http://127.0.0.1:{port}", clients, writes))
+        total = clients * writes
+        read_p50 = statistics.median(read_ms) if read_ms else float("nan")
+        print(f"{(total - failures) / elapsed:.0f} {failures} {read_p50:.1f} {len(read_ms)}")
+        server.should_exit = True
+        time.sleep(0.3)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main_bench():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    writes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print(f"📊 {clients} clients x {writes} POST /notes/add, plus one client listing GET /notes/\n")
+    print(f"{'Mode':<20} {'writes/s':>9} {'failed':>7} {'read p50 ms':>12} {'reads':>6}")
+    print("-" * 58)
+    for label, env in MODES:
+        result = subprocess.run(
+            [sys.executable, "-m", "bench.note_writes", "--child", str(clients), str(writes)],
+            cwd=ROOT,
+            env={**os.environ, **env},
+            capture_output=True,
+            text=True,
+        )
+        lines = result.stdout.strip().splitlines()
+        if result.returncode != 0 or not lines:
+            print(f"{label:<20} ❌ run failed\n{result.stderr[-2000:]}")
+            continue
+        rate, failures, read_p50, reads = lines[-1].split()
+        print(f"{label:<20} {rate:>9} {failures:>7} {read_p50:>12} {reads:>6}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        main_bench()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark source-script detection against transliterating from a given script.
+
+For each sample this times what POST /transliterate/ does with a
+``source_script`` (one conversion) and without one (Unicode-block detection,
+split into runs of one script, each run converted from its script). Memoization
+is disabled so every call does the full work.
+
+Usage:
+    python -m bench.script_detect [repeat]
+"""
+
+import statistics
+import sys
+import time
+
+from services.script_detect import split_scripts
+from services.translit_engine import TransliterationEngine
+
+
+SAMPLES = {
+    "word": ("नमस्ते", "devanagari"),
+    "sentence": ("வணக்கம், சென்னை மத்திய ரயில் நிலையம் இங்கே உள்ளது", "tamil"),
+    "mixed": ("नमस्ते Delhi, வணக்கம் Chennai, నమస్కారం Hyderabad", "devanagari"),
+    "document": ("भारत एक विशाल देश है जहाँ अनेक भाषाएँ बोली जाती हैं। " * 400, "devanagari"),
+}
+TARGET_SCRIPT = "iast"
+
+
+def timed(fn, repeat, *args):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.median(samples)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    engine = TransliterationEngine(cache_size=0, cache_max_chars=0)
+    engine.warm()
+
+    print(f"📊 median of {repeat} calls, microseconds")
+    print(f"   {'sample':<10} {'chars':>7} {'given':>10} {'detected':>10} {'split only':>11} {'runs':>5}")
+    for name, (text, source) in SAMPLES.items():
+        given_us = timed(engine.transliterate, repeat, text, source, TARGET_SCRIPT)
+        detected_us = timed(engine.transliterate_detected, repeat, text, TARGET_SCRIPT)
+        split_us = timed(split_scripts, repeat, text)
+        runs = len(split_scripts(text).runs)
+        print(f"   {name:<10} {len(text):>7} {given_us:>10.1f} {detected_us:>10.1f} {split_us:>11.1f} {runs:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark POST /transliterate/batch against one POST /transliterate/ per
+(text, script) pair, the way the Flutter client used to call the API.
+
+Start the server first (uvicorn main:app), then:
+    python -m bench.translit_batch [base_url] [texts] [rounds]
+"""
+
+import statistics
+import sys
+import time
+
+import httpx
+
+
+BASE_URL = "http://127.0.0.1:8000"
+WORDS = ["नमस्ते", "धन्यवाद", "भारत", "दिल्ली", "ताज महल", "लाल किला", "कुतुब मीनार", "गंगा", "हिमालय", "ज्ञान"]
+TARGET_SCRIPTS = ["iast", "tamil", "telugu", "kannada", "malayalam", "gurmukhi", "bengali", "gujarati"]
+
+
+def run_single(session, base_url, texts):
+    for text in texts:
+        for script in TARGET_SCRIPTS:
+            response = session.post(
+                f"{base_url}/transliterate/",
+                json={"source_text": text, "source_script": "devanagari", "target_script": script},
+            )
+            response.raise_for_status()
+
+
+def run_batch(session, base_url, texts):
+    response = session.post(
+        f"{base_url}/transliterate/batch",
+        json={"texts": texts, "source_script": "devanagari", "target_scripts": TARGET_SCRIPTS},
+    )
+    response.raise_for_status()
+
+
+def timed(fn, rounds, *args):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    base_url = sys.argv[1] if len(sys.argv) > 1 else BASE_URL
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    texts = [WORDS[i % len(WORDS)] + ("" if i < len(WORDS) else f" {i}") for i in range(count)]
+    cells = len(texts) * len(TARGET_SCRIPTS)
+
+    with httpx.Client(timeout=60) as session:
+        try:
+            session.get(f"{base_url}/health", timeout=5).raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"❌ Server not accessible at {base_url}: {e}")
+            return
+
+        print(f"📊 {len(texts)} texts x {len(TARGET_SCRIPTS)} scripts = {cells} transliterations, median of {rounds} rounds")
+        single_ms = timed(run_single, rounds, session, base_url, texts)
+        batch_ms = timed(run_batch, rounds, session, base_url, texts)
+    print(f"   {cells} single calls: {single_ms:9.1f} ms")
+    print(f"   1 batch call:      {batch_ms:9.1f} ms")
+    print(f"   speedup:           {single_ms / batch_ms:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
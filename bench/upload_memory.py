@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark server memory while many large uploads arrive at once.
+
+Starts the app under uvicorn in a child process with a throwaway database
+and blob store, then sends concurrent multipart uploads of random bytes to
+
+- POST /notes/add-with-photo   (photo into the blob store)
+- POST /transliterate/image    (image handed to OCR; random bytes are
+                                rejected by the OCR worker, after the upload
+                                path has done its work)
+
+and reports the server's resident memory before the burst and at its peak
+(VmHWM from /proc, so Linux only).
+
+Usage:
+    python -m bench.upload_memory [uploads] [size_mb]   (default: 50 uploads of 10 MB)
+"""
+
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def memory_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def reset_peak(pid: int) -> None:
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux 4.0+)
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+async def burst(base_url: str, path: str, uploads: int, payload: bytes, headers: dict, data: dict):
+    import httpx
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        async def upload(i: int) -> int:
+            files = {"photo" if "notes" in path else "file": (f"upload{i}.jpg", payload, "image/jpeg")}
+            try:
+                response = await client.post(path, data=data, files=files, headers=headers)
+                return response.status_code
+            except httpx.HTTPError:
+                return 0
+
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(upload(i) for i in range(uploads)))
+        return time.perf_counter() - start, statuses
+
+
+def main_bench():
+    import httpx
+
+    uploads = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    size_mb = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_uploads_")
+    port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_dir}/bench.db",
+        "BLOB_STORE_ROOT": f"{tmp_dir}/blobs",
+        "AUTH_USER_CACHE_STAMP": f"{tmp_dir}/auth_cache_stamp",
+        "BCRYPT_ROUNDS": os.environ.get("BCRYPT_ROUNDS", "4"),
+        "MAX_UPLOAD_BYTES": str(int((size_mb + 1) * 1024 * 1024)),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "critical"],
+        env=env,
+        stderr=subprocess.DEVNULL,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(300):
+            try:
+                httpx.get(f"{base_url}/", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        token = httpx.post(
+            f"{base_url}/auth/register", json={"email": "uploader@example.com", "password": "benchmark"}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        payload = os.urandom(int(size_mb * 1024 * 1024))
+
+        print(f"📊 {uploads} concurrent uploads of {size_mb:g} MB, server RSS in MB\n")
+        print(f"{'Endpoint':<28} {'before':>7} {'peak':>7} {'growth':>7} {'seconds':>8}  statuses")
+        print("-" * 78)
+        runs = [
+            ("/notes/add-with-photo", {"latitude": "28.6", "longitude": "77.2", "text": "upload"}),
+            ("/transliterate/image", {"target_script": "iast"}),
+        ]
+        for path, data in runs:
+            time.sleep(1)
+            reset_peak(server.pid)
+            before = memory_kb(server.pid, "VmRSS") / 1024
+            elapsed, statuses = asyncio.run(burst(base_url, path, uploads, payload, headers, data))
+            peak = memory_kb(server.pid, "VmHWM") / 1024
+            counts = {status: statuses.count(status) for status in sorted(set(statuses))}
+            print(f"{path:<28} {before:>7.0f} {peak:>7.0f} {peak - before:>7.0f} {elapsed:>8.1f}  {counts}")
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main_bench()
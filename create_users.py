@@ -19,8 +19,9 @@ import sys
 import os
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
-from models import User, Base
-from utils import hash_password
+from migrations import upgrade
+from models import User
+from utils import hash_password, invalidate_cached_user
 
 
 def setup_database():
@@ -32,8 +33,8 @@ def setup_database():
         future=True,
     )
     
-    # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
+    # Create or upgrade the schema if needed
+    upgrade(engine)
     
     # Create session
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
@@ -112,8 +113,10 @@ def delete_user(email: str):
             print("Deletion cancelled.")
             return False
         
+        user_id = user.id
         db.delete(user)
         db.commit()
+        invalidate_cached_user(user_id)
         
         print(f"✅ Deleted user: {email}")
         return True
@@ -139,6 +142,7 @@ def reset_password(email: str, new_password: str):
         
         setattr(user, 'password_hash', hash_password(new_password))
         db.commit()
+        invalidate_cached_user(user.id)
         
         print(f"✅ Password reset for user: {email}")
         return True
@@ -1,28 +1,115 @@
 from __future__ import annotations
 
 import os
-from sqlalchemy import create_engine
+from typing import AsyncIterator
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 
 # SQLite database URL. For a file in the workspace directory
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
-# For SQLite, need check_same_thread=False for usage with FastAPI
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-    future=True,
+# Connection pool, per engine and per worker process. With async endpoints a
+# request holds a connection only while a query runs, not for its whole lifetime.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle connections before server-side idle timeouts (e.g. Postgres behind a proxy) close them.
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "0") == "1"
+
+# Drivers used by the async engine for each sync URL scheme.
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def async_url(url: str) -> str:
+    """The async-driver form of a database URL, e.g. sqlite:/// -> sqlite+aiosqlite:///."""
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", async_url(DATABASE_URL))
+
+# SQLite tuning applied to every new connection: "performance" (default) or "off".
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "performance").strip().lower()
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+SQLITE_PERFORMANCE_PRAGMAS = (
+    # Readers no longer block the writer and vice versa; persistent in the database file.
+    ("journal_mode", "WAL"),
+    # With WAL, fsync at checkpoints rather than every commit. Survives application
+    # crashes; only an OS crash or power loss can drop the last commits.
+    ("synchronous", "NORMAL"),
+    # Wait for a competing writer instead of failing with "database is locked".
+    ("busy_timeout", SQLITE_BUSY_TIMEOUT_MS),
+    # Negative cache_size is in KiB.
+    ("cache_size", -SQLITE_CACHE_SIZE_KB),
+    ("mmap_size", SQLITE_MMAP_SIZE),
+    ("temp_store", "MEMORY"),
 )
 
+
+def is_memory_sqlite(url: str) -> bool:
+    return ":memory:" in url or url.rstrip("/").endswith(":")
+
+
+def apply_sqlite_profile(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PERFORMANCE_PRAGMAS:
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def engine_options(url: str) -> dict:
+    if url.startswith("sqlite"):
+        # For SQLite, need check_same_thread=False for usage with FastAPI
+        options = {"connect_args": {"check_same_thread": False}}
+        if is_memory_sqlite(url):
+            # In-memory databases live in one connection; pool settings do not apply.
+            return options
+    else:
+        options = {}
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    return options
+
+
+# Sync engine for scripts (migrations, user management) and thread-bound helpers.
+engine = create_engine(DATABASE_URL, future=True, **engine_options(DATABASE_URL))
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
+# Async engine used by the API. aiosqlite for SQLite, asyncpg for Postgres.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+
+# expire_on_commit=False: committed objects stay readable without an implicit (awaitable) reload.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+if SQLITE_PROFILE == "performance":
+    if DATABASE_URL.startswith("sqlite") and not is_memory_sqlite(DATABASE_URL):
+        event.listen(engine, "connect", apply_sqlite_profile)
+    if ASYNC_DATABASE_URL.startswith("sqlite") and not is_memory_sqlite(ASYNC_DATABASE_URL):
+        event.listen(async_engine.sync_engine, "connect", apply_sqlite_profile)
+
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,20 +1,50 @@
 from __future__ import annotations
 
 import os
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
-from db import engine, Base
+from db import async_engine, engine
 from api.auth import router as auth_router
 from api.translit import router as translit_router
 from api.notes import router as notes_router
 from api.ocr import router as ocr_router
+from api.tourism import router as tourism_router
+from api.milestones import router as milestones_router
+from migrations import ensure_schema
+from services.ocr_cache import cache as ocr_cache
+from services.ocr_jobs import runner as ocr_jobs
+from services.ocr_pool import OCRQueueFullError, OCRTimeoutError, OCRWorkerCrashedError, pool as ocr_pool
+from services.poi_index import index as poi_index
+from services.user_cache import user_cache
+from services.write_queue import write_queue
+from services.translit_engine import UnsupportedScriptError, engine as translit_engine
+from services.uploads import UploadLimitMiddleware, UploadTooLargeError
+from utils import shutdown_password_executor
+
+
+# Check the schema version; a single lookup unless migrations are pending
+ensure_schema(engine)
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    translit_engine.warm()
+    poi_index.load_file()
+    # Jobs accepted before a restart are picked up again
+    await ocr_jobs.recover()
+    yield
+    await ocr_jobs.stop()
+    await write_queue.stop()
+    ocr_pool.shutdown()
+    shutdown_password_executor()
+    await async_engine.dispose()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Bharat Transliteration API", version="1.0.0")
+app = FastAPI(title="Bharat Transliteration API", version="1.0.0", lifespan=lifespan)
 
 
 # CORS configuration
@@ -25,7 +55,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(UploadLimitMiddleware)
 
 
 @app.get("/")
@@ -48,13 +80,48 @@ def health_check():
             "authentication": "active",
             "transliteration": "active", 
             "ocr": "active",
-            "notes": "active"
-        }
+            "notes": "active",
+            "tourism": "active",
+            "milestones": "active"
+        },
+        "ocr_cache": ocr_cache.stats(),
+        "transliteration_cache": translit_engine.stats(),
+        "poi_index": poi_index.stats(),
+        "auth_user_cache": user_cache.stats(),
+        "write_queue": write_queue.stats(),
+        "ocr_jobs": ocr_jobs.stats(),
     }
 
 
+@app.exception_handler(OCRQueueFullError)
+async def ocr_queue_full_handler(request: Request, exc: OCRQueueFullError):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(OCRTimeoutError)
+async def ocr_timeout_handler(request: Request, exc: OCRTimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+@app.exception_handler(OCRWorkerCrashedError)
+async def ocr_worker_crashed_handler(request: Request, exc: OCRWorkerCrashedError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(UnsupportedScriptError)
+async def unsupported_script_handler(request: Request, exc: UnsupportedScriptError):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(UploadTooLargeError)
+async def upload_too_large_handler(request: Request, exc: UploadTooLargeError):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(translit_router)
 app.include_router(notes_router)
-app.include_router(ocr_router, prefix="/ocr", tags=["ocr"])
\ No newline at end of file
+app.include_router(ocr_router, prefix="/ocr", tags=["ocr"])
+app.include_router(tourism_router, prefix="/tourism", tags=["tourism"])
+app.include_router(milestones_router, prefix="/milestones", tags=["milestones"])
@@ -1,52 +1,63 @@
 #!/usr/bin/env python3
 """
-Database migration script to add photo support to notes table.
-Run this to update existing database schema.
+Database migration script.
+Run this after pulling schema changes to upgrade an existing database.
+
+The schema is versioned: applied steps are recorded in the schema_version
+table and the steps themselves live in migrations/versions.py. Databases
+from before versioning are upgraded from the start; this also moves note
+photos that older versions stored inside the notes table into the blob store.
+
+Usage:
+    python migrate_db.py            # apply pending migrations
+    python migrate_db.py status     # show the current and latest version
 """
 
-import os
-from sqlalchemy import create_engine, text
-from db import DATABASE_URL
+import logging
+import sys
+
+from sqlalchemy import text
+
+from db import engine
+from migrations import HEAD, MIGRATIONS, current_version, upgrade
+
 
 def migrate_database():
-    """Add photo columns to notes table."""
-    engine = create_engine(DATABASE_URL)
-    
-    print("🔄 Migrating database to add photo support...")
-    
-    with engine.connect() as conn:
-        try:
-            # Add photo columns to notes table
-            conn.execute(text("ALTER TABLE notes ADD COLUMN photo_data BLOB"))
-            print("✅ Added photo_data column")
-        except Exception as e:
-            if "duplicate column name" in str(e).lower():
-                print("✅ photo_data column already exists")
-            else:
-                print(f"❌ Error adding photo_data: {e}")
-        
-        try:
-            conn.execute(text("ALTER TABLE notes ADD COLUMN photo_filename VARCHAR(255)"))
-            print("✅ Added photo_filename column")
-        except Exception as e:
-            if "duplicate column name" in str(e).lower():
-                print("✅ photo_filename column already exists")
-            else:
-                print(f"❌ Error adding photo_filename: {e}")
-        
-        try:
-            conn.execute(text("ALTER TABLE notes ADD COLUMN photo_content_type VARCHAR(100)"))
-            print("✅ Added photo_content_type column")
-        except Exception as e:
-            if "duplicate column name" in str(e).lower():
-                print("✅ photo_content_type column already exists")
-            else:
-                print(f"❌ Error adding photo_content_type: {e}")
-        
-        # Commit all changes
-        conn.commit()
-        
-    print("✅ Database migration completed!")
+    """Apply every pending migration."""
+    print(f"🔄 Migrating database (current version {current_version(engine) or 0}, latest {HEAD})...")
+
+    applied = upgrade(engine)
+    if not applied:
+        print("✅ Already up to date")
+        return
+
+    reclaim_space()
+    print(f"✅ Database migration completed! Applied {len(applied)} migration(s), schema version {HEAD}")
+
+
+def reclaim_space():
+    """Give the space held by dropped BLOBs and rows back to the filesystem."""
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        free = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        total = conn.exec_driver_sql("PRAGMA page_count").scalar()
+        if free and free * 4 > total:
+            conn.execute(text("VACUUM"))
+            print("✅ Reclaimed database space")
+
+
+def show_status():
+    version = current_version(engine)
+    print(f"📋 Schema version: {'unversioned' if version is None else version} (latest {HEAD})")
+    for step in MIGRATIONS:
+        mark = "✅" if version is not None and step.version <= version else "⏳"
+        print(f"  {mark} {step.version:04d} {step.name}")
+
 
 if __name__ == "__main__":
-    migrate_database()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format="   %(message)s")
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        show_status()
+    else:
+        migrate_database()
@@ -0,0 +1,10 @@
+# Versioned schema migrations
+from migrations.runner import (
+    DB_AUTO_MIGRATE,
+    SchemaOutOfDateError,
+    current_version,
+    ensure_schema,
+    schema_version,
+    upgrade,
+)
+from migrations.versions import HEAD, MIGRATIONS, Migration
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import logging
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from db import Base
+from migrations.versions import HEAD, MIGRATIONS, Migration
+
+
+# Upgrade an out-of-date database when the app starts. With 0, startup fails
+# instead and the schema is upgraded with `python migrate_db.py` before deploying.
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "1") == "1"
+# How long a process waits for another one that is migrating the same database.
+DB_MIGRATION_LOCK_TIMEOUT_MS = int(os.getenv("DB_MIGRATION_LOCK_TIMEOUT_MS", "600000"))
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow, nullable=False),
+)
+
+
+class SchemaOutOfDateError(RuntimeError):
+    """Raised at startup when the database needs migrations and DB_AUTO_MIGRATE is off."""
+
+
+def _read_version(conn: Connection) -> Optional[int]:
+    if not inspect(conn).has_table(schema_version.name):
+        return None
+    return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def current_version(engine: Engine) -> Optional[int]:
+    """The recorded schema version, or None for a database that predates versioning."""
+    with engine.connect() as conn:
+        return _read_version(conn)
+
+
+@contextmanager
+def _migration_lock(engine: Engine) -> Iterator[Connection]:
+    """A connection whose transaction holds the database's migration lock.
+
+    Concurrent workers block here until whoever got the lock commits, then
+    see the version it recorded, so DDL is only ever run by one of them.
+    """
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            previous = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {DB_MIGRATION_LOCK_TIMEOUT_MS}")
+            try:
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                yield conn
+            finally:
+                conn.rollback()
+                # The connection goes back to the pool; restore the timeout requests expect
+                conn.exec_driver_sql(f"PRAGMA busy_timeout = {previous}")
+                conn.commit()
+            return
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_version'))"))
+        yield conn
+
+
+def _record(conn: Connection, migrations: List[Migration]) -> None:
+    if migrations:
+        conn.execute(schema_version.insert(), [{"version": m.version, "name": m.name} for m in migrations])
+
+
+def upgrade(engine: Engine, target: int = HEAD) -> List[Migration]:
+    """Apply pending migrations up to ``target``, each in its own transaction; return those applied.
+
+    An empty database gets the current models' schema in one step and is
+    stamped with every version, as there is nothing to migrate.
+    """
+    applied: List[Migration] = []
+    while True:
+        with _migration_lock(engine) as conn:
+            version = _read_version(conn)
+            if version is None:
+                schema_version.create(conn)
+                if not inspect(conn).has_table("users"):
+                    Base.metadata.create_all(conn)
+                    _record(conn, MIGRATIONS)
+                    conn.commit()
+                    logger.info("Created schema at version %d", HEAD)
+                    return list(MIGRATIONS)
+                version = 0
+            pending = [m for m in MIGRATIONS if version < m.version <= target]
+            if not pending:
+                conn.commit()
+                return applied
+            step = pending[0]
+            logger.info("Applying migration %d: %s", step.version, step.name)
+            step.upgrade(conn)
+            _record(conn, [step])
+            conn.commit()
+            applied.append(step)
+
+
+def ensure_schema(engine: Engine) -> None:
+    """Startup check: a single version lookup when the schema is current, an upgrade otherwise."""
+    version = current_version(engine)
+    if version is not None and version >= HEAD:
+        return
+    if not DB_AUTO_MIGRATE:
+        raise SchemaOutOfDateError(
+            f"Database schema is at version {version or 0}, this build needs {HEAD}. "
+            "Run `python migrate_db.py` to upgrade it."
+        )
+    upgrade(engine)
@@ -0,0 +1,153 @@
+"""
+Schema migrations, oldest first.
+
+Each step runs inside the runner's transaction on a sync connection and is
+recorded in schema_version once it commits. Databases created before
+versioning existed are upgraded from version 0, so every step must also
+work against a schema that already has some of its changes.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Callable, List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from models import OCRCacheEntry, OCRJob, PhotoDerivative, UserStatKey, UserStats
+from services.blob_store import get_blob_store
+from services.geo import geohash_encode
+from services.user_stats import LOCATION_PRECISION
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, name: str):
+    def register(fn: Callable[[Connection], None]) -> Callable[[Connection], None]:
+        MIGRATIONS.append(Migration(version, name, fn))
+        return fn
+    return register
+
+
+def _columns(conn: Connection, table: str) -> set:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    if column not in _columns(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+@migration(1, "note photo metadata; photos move from notes.photo_data to the blob store")
+def note_photos(conn: Connection) -> None:
+    _add_column(conn, "notes", "photo_filename", "VARCHAR(255)")
+    _add_column(conn, "notes", "photo_content_type", "VARCHAR(100)")
+    _add_column(conn, "notes", "photo_key", "VARCHAR(64)")
+    _add_column(conn, "notes", "photo_size", "INTEGER")
+    _add_column(conn, "notes", "has_photo", "BOOLEAN NOT NULL DEFAULT FALSE")
+
+    if "photo_data" in _columns(conn, "notes"):
+        store = get_blob_store()
+        ids = conn.execute(text(
+            "SELECT id FROM notes WHERE photo_data IS NOT NULL AND photo_key IS NULL"
+        )).scalars().all()
+        # One row at a time so only a single photo is ever held in memory
+        for note_id in ids:
+            photo_data = conn.execute(
+                text("SELECT photo_data FROM notes WHERE id = :id"), {"id": note_id}
+            ).scalar_one()
+            conn.execute(
+                text("UPDATE notes SET photo_key = :key, photo_size = :size WHERE id = :id"),
+                {"key": store.put(bytes(photo_data)), "size": len(photo_data), "id": note_id},
+            )
+        logger.info("Moved %d photo(s) to the blob store", len(ids))
+        conn.execute(text("ALTER TABLE notes DROP COLUMN photo_data"))
+
+    conn.execute(text("UPDATE notes SET has_photo = TRUE WHERE photo_key IS NOT NULL AND NOT has_photo"))
+
+
+@migration(2, "keyset pagination index on notes")
+def notes_pagination_index(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_notes_user_created_id ON notes (user_id, created_at, id)"
+    ))
+
+
+@migration(3, "ocr_cache table")
+def ocr_cache_table(conn: Connection) -> None:
+    OCRCacheEntry.__table__.create(bind=conn, checkfirst=True)
+
+
+@migration(4, "notes.geohash for spatial queries")
+def notes_geohash(conn: Connection) -> None:
+    _add_column(conn, "notes", "geohash", "VARCHAR(12)")
+    rows = conn.execute(text("SELECT id, latitude, longitude FROM notes WHERE geohash IS NULL")).all()
+    for note_id, latitude, longitude in rows:
+        conn.execute(
+            text("UPDATE notes SET geohash = :geohash WHERE id = :id"),
+            {"geohash": geohash_encode(latitude, longitude), "id": note_id},
+        )
+    logger.info("Backfilled geohash for %d note(s)", len(rows))
+
+
+@migration(5, "user_stats milestone counters")
+def user_stats_tables(conn: Connection) -> None:
+    UserStats.__table__.create(bind=conn, checkfirst=True)
+    UserStatKey.__table__.create(bind=conn, checkfirst=True)
+    # Seed counters for users whose notes predate the table
+    conn.execute(text(
+        "INSERT INTO user_stat_keys (user_id, kind, value) "
+        "SELECT DISTINCT user_id, 'location', substr(geohash, 1, :precision) FROM notes "
+        "WHERE geohash IS NOT NULL AND user_id NOT IN (SELECT user_id FROM user_stats)"
+    ), {"precision": LOCATION_PRECISION})
+    result = conn.execute(text(
+        "INSERT INTO user_stats (user_id, notes_written, photos_captured, locations_visited, scripts_read, updated_at) "
+        "SELECT n.user_id, COUNT(*), SUM(CASE WHEN n.has_photo THEN 1 ELSE 0 END), "
+        "(SELECT COUNT(*) FROM user_stat_keys k WHERE k.user_id = n.user_id AND k.kind = 'location'), "
+        "0, CURRENT_TIMESTAMP "
+        "FROM notes n WHERE n.user_id NOT IN (SELECT user_id FROM user_stats) GROUP BY n.user_id"
+    ))
+    logger.info("Backfilled milestone counters for %d user(s)", result.rowcount)
+
+
+@migration(6, "covering spatial index; drop notes indexes made redundant by the composite ones")
+def notes_hot_indexes(conn: Connection) -> None:
+    # /notes/nearby and /notes/within read only these columns: answer them from the index alone
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_notes_user_geohash_coords ON notes (user_id, geohash, latitude, longitude)"
+    ))
+    conn.execute(text("DROP INDEX IF EXISTS ix_notes_user_geohash"))
+    # user_id is the leading column of ix_notes_user_created_id; id is the primary key
+    conn.execute(text("DROP INDEX IF EXISTS ix_notes_user_id"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_notes_id"))
+
+
+@migration(7, "photo_derivatives table for note photo thumbnails")
+def photo_derivatives_table(conn: Connection) -> None:
+    PhotoDerivative.__table__.create(bind=conn, checkfirst=True)
+
+
+@migration(8, "ocr_jobs table for background OCR")
+def ocr_jobs_table(conn: Connection) -> None:
+    OCRJob.__table__.create(bind=conn, checkfirst=True)
+
+
+@migration(9, "ocr_jobs.lease_expires_at so jobs of a dead process are run again")
+def ocr_jobs_lease(conn: Connection) -> None:
+    _add_column(conn, "ocr_jobs", "lease_expires_at", "TIMESTAMP")
+
+
+MIGRATIONS.sort(key=lambda m: m.version)
+HEAD = MIGRATIONS[-1].version
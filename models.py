@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Float, ForeignKey, Index, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from db import Base
@@ -20,12 +20,106 @@ class User(Base):
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        # Serves the per-user, newest-first keyset pagination of GET /notes/
+        Index("ix_notes_user_created_id", "user_id", "created_at", "id"),
+        # Spatial lookups: geohash prefixes become range scans within a user's notes,
+        # answered from the index alone since it also carries the coordinates
+        Index("ix_notes_user_geohash_coords", "user_id", "geohash", "latitude", "longitude"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # No single-column indexes: id is the primary key and user_id leads ix_notes_user_created_id
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
+    geohash = Column(String(12), nullable=True)
     text = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    # The photo itself lives in the blob store under its SHA-256 key.
+    # has_photo is set at write time so listings never need to look at it.
+    has_photo = Column(Boolean, default=False, nullable=False)
+    photo_key = Column(String(64), nullable=True)
+    photo_size = Column(Integer, nullable=True)
+    photo_filename = Column(String(255), nullable=True)
+    photo_content_type = Column(String(100), nullable=True)
+
     user = relationship("User", back_populates="notes")
+
+
+class OCRCacheEntry(Base):
+    __tablename__ = "ocr_cache"
+    __table_args__ = (UniqueConstraint("image_hash", "lang", name="uq_ocr_cache_image_lang"),)
+
+    id = Column(Integer, primary_key=True)
+    image_hash = Column(String(64), nullable=False)
+    lang = Column(String, nullable=False)
+    phash = Column(String(16), nullable=True, index=True)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class UserStats(Base):
+    """Per-user milestone counters, bumped in the same transaction as the event they count."""
+
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    notes_written = Column(Integer, default=0, nullable=False)
+    photos_captured = Column(Integer, default=0, nullable=False)
+    locations_visited = Column(Integer, default=0, nullable=False)
+    scripts_read = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class UserStatKey(Base):
+    """Values already counted by a distinct counter, e.g. the scripts or places a user has seen."""
+
+    __tablename__ = "user_stat_keys"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    kind = Column(String(16), primary_key=True)
+    value = Column(String(32), primary_key=True)
+
+
+class PhotoDerivative(Base):
+    """A downscaled copy of a stored photo, shared by every note that references the original."""
+
+    __tablename__ = "photo_derivatives"
+
+    photo_key = Column(String(64), primary_key=True)
+    size = Column(String(16), primary_key=True)
+    blob_key = Column(String(64), nullable=False)
+    content_type = Column(String(100), nullable=False)
+    byte_size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class OCRJob(Base):
+    """An OCR + transliteration request run in the background, see services/ocr_jobs.py."""
+
+    __tablename__ = "ocr_jobs"
+    __table_args__ = (
+        # Startup recovery looks for unfinished jobs
+        Index("ix_ocr_jobs_status", "status"),
+    )
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    # queued -> running -> done | failed
+    status = Column(String(16), default="queued", nullable=False)
+    image_key = Column(String(64), nullable=False)
+    lang = Column(String, nullable=False)
+    preprocess = Column(String(16), nullable=False)
+    source_script = Column(String(32), nullable=False)
+    target_script = Column(String(32), nullable=False)
+    source_text = Column(Text, nullable=True)
+    transliterated_text = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    # Renewed while the job runs; a running job whose lease ran out lost its process
+    lease_expires_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
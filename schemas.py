@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional, List
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 # Auth
@@ -33,12 +33,20 @@ class NoteOut(BaseModel):
     latitude: float
     longitude: float
     text: str
+    has_photo: bool = False
+    photo_size: Optional[int] = None
+    photo_filename: Optional[str] = None
+    photo_content_type: Optional[str] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class NoteNearbyOut(NoteOut):
+    distance_km: float
+
+
 # Transliteration
 class TransliterateTextIn(BaseModel):
     source_text: str
@@ -51,3 +59,39 @@ class TransliterateOut(BaseModel):
     source_script: str
     target_script: str
     transliterated_text: str
+    # Main script found in the source text, when the endpoint detects it
+    detected_script: Optional[str] = None
+
+
+# Upper bounds for one batch request; larger jobs should be split by the client.
+MAX_BATCH_TEXTS = 100
+MAX_BATCH_TARGET_SCRIPTS = 12
+
+
+class TransliterateBatchIn(BaseModel):
+    texts: List[str] = Field(min_length=1, max_length=MAX_BATCH_TEXTS)
+    source_script: Optional[str] = None
+    target_scripts: List[str] = Field(min_length=1, max_length=MAX_BATCH_TARGET_SCRIPTS)
+
+
+class TransliterateBatchOut(BaseModel):
+    source_script: str
+    target_scripts: List[str]
+    # results[i][j] is texts[i] written in target_scripts[j]
+    results: List[List[str]]
+
+
+class OCRJobOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    # queued, running, done or failed
+    status: str
+    source_script: str
+    target_script: str
+    source_text: Optional[str] = None
+    transliterated_text: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
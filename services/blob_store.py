@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import closing
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, Optional, Tuple
+
+
+BLOB_STORE = os.getenv("BLOB_STORE", "local").strip().lower()
+BLOB_STORE_ROOT = os.getenv("BLOB_STORE_ROOT", "./blobs")
+BLOB_S3_BUCKET = os.getenv("BLOB_S3_BUCKET", "")
+BLOB_S3_PREFIX = os.getenv("BLOB_S3_PREFIX", "blobs/")
+BLOB_S3_ENDPOINT_URL = os.getenv("BLOB_S3_ENDPOINT_URL")
+
+CHUNK_SIZE = 64 * 1024
+
+
+def content_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def shard_path(key: str) -> str:
+    """``ab12...`` -> ``ab/12/ab12...`` so no directory ends up with millions of entries."""
+    return f"{key[:2]}/{key[2:4]}/{key}"
+
+
+class BlobStore(ABC):
+    """Content-addressed storage for binary objects such as note photos.
+
+    Objects are addressed by the SHA-256 of their bytes, so storing the same
+    photo twice keeps a single copy.
+    """
+
+    @abstractmethod
+    def put(self, data: bytes, content_type: Optional[str] = None) -> str:
+        ...
+
+    @abstractmethod
+    def put_file(self, f: BinaryIO, content_type: Optional[str] = None) -> Tuple[str, int]:
+        """Store the rest of a file-like object, reading it in chunks; returns ``(key, size)``."""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        ...
+
+    def local_path(self, key: str) -> Optional[str]:
+        """A filesystem path holding the blob, if the store keeps one; None otherwise."""
+        return None
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def get(self, key: str) -> bytes:
+        with closing(self.open(key)) as f:
+            return f.read()
+
+    def open_range(self, key: str, start: int, end: Optional[int] = None) -> BinaryIO:
+        """A reader positioned at byte ``start``; callers stop reading after ``end``."""
+        f = self.open(key)
+        f.seek(start)
+        return f
+
+    def stream(
+        self, key: str, chunk_size: int = CHUNK_SIZE, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Yield the blob's bytes, or only bytes ``start`` to ``end`` inclusive."""
+        remaining = None if end is None else end - start + 1
+        with closing(self.open_range(key, start, end) if start or end is not None else self.open(key)) as f:
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under ``root``, sharded by the first bytes of their hash."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        return self.root / shard_path(key)
+
+    def put(self, data: bytes, content_type: Optional[str] = None) -> str:
+        key = content_key(data)
+        path = self.path(key)
+        if path.exists():
+            return key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partially written blob.
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return key
+
+    def put_file(self, f: BinaryIO, content_type: Optional[str] = None) -> Tuple[str, int]:
+        # The key is only known at the end, so hash while copying to a temp file, then move it in place.
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            digest = hashlib.sha256()
+            size = 0
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            key = digest.hexdigest()
+            path = self.path(key)
+            if path.exists():
+                os.unlink(tmp_path)
+            else:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return key, size
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return open(self.path(key), "rb")
+        except FileNotFoundError:
+            raise KeyError(key) from None
+
+    def local_path(self, key: str) -> Optional[str]:
+        path = self.path(key)
+        return str(path) if path.exists() else None
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def delete(self, key: str) -> None:
+        try:
+            self.path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class S3BlobStore(BlobStore):
+    """Blobs in an S3-compatible bucket.
+
+    ``client`` only needs boto3's ``put_object``, ``get_object``,
+    ``head_object`` and ``delete_object``, so MinIO, LocalStack or a small
+    in-memory stand-in all work.
+    """
+
+    def __init__(self, client: Any, bucket: str, prefix: str = BLOB_S3_PREFIX):
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}{shard_path(key)}"
+
+    def put(self, data: bytes, content_type: Optional[str] = None) -> str:
+        key = content_key(data)
+        if not self.exists(key):
+            extra = {"ContentType": content_type} if content_type else {}
+            self.client.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=data, **extra)
+        return key
+
+    def put_file(self, f: BinaryIO, content_type: Optional[str] = None) -> Tuple[str, int]:
+        # The object key is the content hash: hash in a first pass, then rewind and upload.
+        start = f.tell()
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+        key = digest.hexdigest()
+        if not self.exists(key):
+            f.seek(start)
+            extra = {"ContentType": content_type} if content_type else {}
+            self.client.put_object(Bucket=self.bucket, Key=self.object_key(key), Body=f, **extra)
+        return key, size
+
+    def open(self, key: str) -> BinaryIO:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))["Body"]
+        except Exception as e:
+            if _is_missing(e):
+                raise KeyError(key) from None
+            raise
+
+    def open_range(self, key: str, start: int, end: Optional[int] = None) -> BinaryIO:
+        # Let S3 send only the requested bytes instead of seeking through the body
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.object_key(key), Range=byte_range)["Body"]
+        except Exception as e:
+            if _is_missing(e):
+                raise KeyError(key) from None
+            raise
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+            return True
+        except Exception as e:
+            if _is_missing(e):
+                return False
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+
+
+def _is_missing(error: Exception) -> bool:
+    if isinstance(error, KeyError):
+        return True
+    code = str(getattr(error, "response", {}).get("Error", {}).get("Code", ""))
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+def create_blob_store() -> BlobStore:
+    if BLOB_STORE == "s3":
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("BLOB_STORE=s3 requires the boto3 package") from None
+        if not BLOB_S3_BUCKET:
+            raise RuntimeError("BLOB_STORE=s3 requires BLOB_S3_BUCKET")
+        client = boto3.client("s3", endpoint_url=BLOB_S3_ENDPOINT_URL)
+        return S3BlobStore(client, BLOB_S3_BUCKET)
+    return LocalBlobStore(BLOB_STORE_ROOT)
+
+
+_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        _store = create_blob_store()
+    return _store
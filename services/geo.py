@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Stored precision: 9 characters is a cell of roughly 5 m x 5 m.
+GEOHASH_PRECISION = 9
+# Upper bound on prefixes used to cover a query box; more cells means a tighter
+# cover but more index range scans.
+MAX_COVER_CELLS = 32
+
+BBox = Tuple[float, float, float, float]  # min_lat, min_lon, max_lat, max_lon
+
+
+def geohash_encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """Return (height, width) in degrees of a geohash cell."""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def bbox_around(lat: float, lon: float, radius_km: float) -> BBox:
+    """Smallest lat/lon box containing the circle of ``radius_km`` around a point."""
+    angular = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angular)
+    if lat + dlat >= 90.0 or lat - dlat <= -90.0 or angular >= math.pi / 2:
+        # The circle reaches a pole, so it spans every longitude.
+        dlon = 180.0
+    else:
+        dlon = math.degrees(math.asin(min(1.0, math.sin(angular) / math.cos(math.radians(lat)))))
+    return max(-90.0, lat - dlat), lon - dlon, min(90.0, lat + dlat), lon + dlon
+
+
+def _wrap_lon(lon: float) -> float:
+    return (lon + 180.0) % 360.0 - 180.0
+
+
+def geohash_cover(bbox: BBox, max_cells: int = MAX_COVER_CELLS) -> List[str]:
+    """Geohash prefixes whose cells together cover ``bbox``.
+
+    Picks the longest prefix length that needs at most ``max_cells`` cells, so
+    each prefix becomes one index range scan. Boxes may cross the antimeridian
+    (``min_lon > max_lon`` or longitudes outside [-180, 180]).
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    if max_lon < min_lon:
+        max_lon += 360.0
+    width = min(360.0, max_lon - min_lon)
+    height = max_lat - min_lat
+
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        cell_h, cell_w = geohash_cell_size(candidate)
+        if (math.floor(height / cell_h) + 2) * (math.floor(width / cell_w) + 2) <= max_cells:
+            precision = candidate
+            break
+
+    cell_h, cell_w = geohash_cell_size(precision)
+    cells = set()
+    lat = min_lat
+    while True:
+        lon = min_lon
+        while True:
+            cells.add(geohash_encode(min(lat, 90.0), _wrap_lon(min(lon, min_lon + width)), precision))
+            if lon >= min_lon + width:
+                break
+            lon += cell_w
+        if lat >= max_lat:
+            break
+        lat = min(lat + cell_h, max_lat)
+    return sorted(cells)
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances from one point to many, in a single vectorized pass."""
+    lat1 = math.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - math.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def in_bbox(lats: np.ndarray, lons: np.ndarray, bbox: BBox) -> np.ndarray:
+    min_lat, min_lon, max_lat, max_lon = bbox
+    lat_ok = (lats >= min_lat) & (lats <= max_lat)
+    if max_lon - min_lon >= 360.0:
+        return lat_ok
+    min_lon, max_lon = _wrap_lon(min_lon), _wrap_lon(max_lon)
+    if min_lon <= max_lon:
+        return lat_ok & (lons >= min_lon) & (lons <= max_lon)
+    return lat_ok & ((lons >= min_lon) | (lons <= max_lon))
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import io
+import math
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Union
+
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+    """How an upload is prepared before it reaches Tesseract."""
+
+    name: str = "auto"
+    fix_orientation: bool = True
+    # Longest side in pixels after downscaling; 0 keeps the original size.
+    max_side: int = 2000
+    # Photos that carry a DPI tag are scaled down to this density first.
+    target_dpi: int = 300
+    grayscale: bool = True
+    threshold: bool = False
+    threshold_window: int = 31
+    threshold_offset: int = 10
+    crop_text: bool = False
+    crop_margin: int = 16
+
+
+PRESETS: Dict[str, PreprocessOptions] = {
+    "none": PreprocessOptions(name="none", fix_orientation=False, max_side=0, target_dpi=0, grayscale=False),
+    "auto": PreprocessOptions(name="auto"),
+    "binarize": PreprocessOptions(name="binarize", threshold=True),
+    "full": PreprocessOptions(name="full", threshold=True, crop_text=True),
+}
+
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "auto")
+
+# Encoded image bytes or the path of an image file.
+ImageSource = Union[bytes, str]
+
+
+def get_preset(name: Optional[str]) -> PreprocessOptions:
+    """Resolve a preset name, raising ``ValueError`` for unknown names."""
+    key = (name or OCR_PREPROCESS).strip().lower()
+    if key not in PRESETS:
+        raise ValueError(f"Unknown preprocess preset '{name}', expected one of: {', '.join(PRESETS)}")
+    return PRESETS[key]
+
+
+def _scale_factor(image: Image.Image, options: PreprocessOptions, decoded_ratio: float) -> float:
+    scale = 1.0
+    dpi = image.info.get("dpi")
+    if options.target_dpi and dpi and dpi[0]:
+        # A draft decode already shrank the pixels, the DPI tag still describes the original.
+        effective_dpi = float(dpi[0]) * decoded_ratio
+        if effective_dpi > options.target_dpi:
+            scale = options.target_dpi / effective_dpi
+    if options.max_side:
+        longest = max(image.size) * scale
+        if longest > options.max_side:
+            scale *= options.max_side / longest
+    return scale
+
+
+def adaptive_threshold(gray: Image.Image, window: int, offset: int) -> Image.Image:
+    """Mark a pixel as ink when it is ``offset`` darker than its local mean.
+
+    Copes with the uneven lighting of outdoor signboards where a single global
+    threshold either loses shadowed text or floods sunlit areas.
+    """
+    local_mean = gray.filter(ImageFilter.BoxBlur(max(1, window // 2)))
+    darkness = ImageChops.subtract(local_mean, gray)
+    return darkness.point(lambda v: 0 if v > offset else 255)
+
+
+def crop_to_text(binary: Image.Image, margin: int) -> Image.Image:
+    # Median filtering drops isolated specks so they don't stretch the box.
+    ink = ImageOps.invert(binary.filter(ImageFilter.MedianFilter(3)))
+    box = ink.getbbox()
+    if box is None:
+        return binary
+    left, top, right, bottom = box
+    return binary.crop((
+        max(0, left - margin),
+        max(0, top - margin),
+        min(binary.width, right + margin),
+        min(binary.height, bottom + margin),
+    ))
+
+
+def open_image(source: ImageSource) -> Image.Image:
+    """Open encoded image bytes, or an image file (path or binary file) without reading it into memory first."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return Image.open(io.BytesIO(source))
+    return Image.open(source)
+
+
+def load_for_ocr(data: ImageSource, options: PreprocessOptions) -> Image.Image:
+    """Decode ``data`` (bytes or a file path) and apply ``options``, doing as little pixel work as possible."""
+    image = open_image(data)
+    original_longest = max(image.size)
+    if options.max_side and original_longest > options.max_side:
+        # JPEG only: let libjpeg decode at 1/2, 1/4 or 1/8 scale instead of
+        # expanding all 12 MP and resizing afterwards. draft() never goes below
+        # the requested size, so ask for the aspect-preserving target.
+        ratio = options.max_side / original_longest
+        requested = (math.ceil(image.width * ratio), math.ceil(image.height * ratio))
+        image.draft("L" if options.grayscale else "RGB", requested)
+    decoded_ratio = max(image.size) / original_longest
+    if options.fix_orientation:
+        image = ImageOps.exif_transpose(image)
+    if options.grayscale:
+        image = image.convert("L")
+
+    scale = _scale_factor(image, options, decoded_ratio)
+    # A draft decode usually lands just above the target; resampling a few
+    # percent off costs more than Tesseract gains from it.
+    if scale < 0.9:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+    if options.threshold:
+        gray = image if image.mode == "L" else image.convert("L")
+        image = adaptive_threshold(gray, options.threshold_window, options.threshold_offset)
+        if options.crop_text:
+            image = crop_to_text(image, options.crop_margin)
+    return image
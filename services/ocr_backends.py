@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+import pytesseract
+from PIL import Image
+
+from services.script_detect import auto_lang_sets, narrows
+
+
+logger = logging.getLogger(__name__)
+
+# "auto" prefers the in-process tesserocr bindings and falls back to pytesseract.
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto").strip().lower()
+# Packs automatic language selection chooses from, per caller; only list installed ones.
+# /transliterate/image reads signs and labels, in English and Hindi by default.
+OCR_DETECT_LANGS = os.getenv("OCR_DETECT_LANGS", "eng+hin").strip()
+# /ocr/ and OCR jobs read Indic documents.
+OCR_DOCUMENT_DETECT_LANGS = os.getenv("OCR_DOCUMENT_DETECT_LANGS", "hin+tam+tel+mal+pan").strip()
+
+
+def auto_selected_sets(with_latin: bool = True) -> List[str]:
+    """Language sets automatic selection reads text in one script with, across both detection sets."""
+    sets: List[str] = []
+    for langs in (OCR_DETECT_LANGS, OCR_DOCUMENT_DETECT_LANGS):
+        sets += auto_lang_sets(langs, with_latin) if narrows(langs) else [langs]
+    return list(dict.fromkeys(sets))
+
+
+# Language sets loaded when a worker starts, e.g. "eng+hin,hin". By default the
+# detection sets and the set of each of their scripts, which text in one script is read with.
+OCR_WARM_LANGS = [
+    lang.strip()
+    for lang in os.getenv("OCR_WARM_LANGS", ",".join(auto_selected_sets(with_latin=False))).split(",")
+    if lang.strip()
+]
+# Each warm engine holds its traineddata in memory, so bound how many a worker keeps.
+# By default enough for every set automatic selection picks for one script, with or without English.
+OCR_MAX_ENGINES = int(os.getenv("OCR_MAX_ENGINES", str(max(4, len(auto_selected_sets())))))
+TESSDATA_PREFIX = os.getenv("TESSDATA_PREFIX")
+
+
+class OCRBackend(ABC):
+    """Turns a decoded image into text for a Tesseract language string."""
+
+    name = "base"
+
+    @abstractmethod
+    def image_to_string(self, image: Image.Image, lang: str) -> str:
+        ...
+
+    def warm(self, lang: str) -> None:
+        """Load whatever is needed for ``lang`` ahead of the first request."""
+
+
+class PytesseractBackend(OCRBackend):
+    """Shells out to the ``tesseract`` binary, reloading models on every call."""
+
+    name = "pytesseract"
+
+    def image_to_string(self, image: Image.Image, lang: str) -> str:
+        try:
+            return pytesseract.image_to_string(image, lang=lang)
+        except pytesseract.TesseractNotFoundError as e:
+            # pytesseract's exception takes no constructor args, so it cannot be
+            # unpickled in the parent and would otherwise break the whole pool.
+            raise RuntimeError(str(e)) from None
+
+
+class TesserocrBackend(OCRBackend):
+    """Keeps a libtesseract engine per language set alive for the worker's lifetime."""
+
+    name = "tesserocr"
+
+    def __init__(self, max_engines: int = OCR_MAX_ENGINES):
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self._max_engines = max(1, max_engines)
+        self._engines: "OrderedDict[str, object]" = OrderedDict()
+
+    def _engine(self, lang: str):
+        engine = self._engines.get(lang)
+        if engine is not None:
+            self._engines.move_to_end(lang)
+            return engine
+
+        kwargs = {"lang": lang}
+        if TESSDATA_PREFIX:
+            kwargs["path"] = TESSDATA_PREFIX
+        engine = self._tesserocr.PyTessBaseAPI(**kwargs)
+        self._engines[lang] = engine
+        while len(self._engines) > self._max_engines:
+            _, evicted = self._engines.popitem(last=False)
+            evicted.End()
+        return engine
+
+    def image_to_string(self, image: Image.Image, lang: str) -> str:
+        engine = self._engine(lang)
+        engine.SetImage(image)
+        try:
+            return engine.GetUTF8Text()
+        finally:
+            engine.Clear()
+
+    def warm(self, lang: str) -> None:
+        self._engine(lang)
+
+
+_backend: Optional[OCRBackend] = None
+
+
+def create_backend(name: str = OCR_BACKEND) -> OCRBackend:
+    if name == "pytesseract":
+        return PytesseractBackend()
+    try:
+        backend = TesserocrBackend()
+        if name != "tesserocr":
+            # The bindings may import yet find no tessdata, while the binary still works
+            backend.warm(OCR_WARM_LANGS[0] if OCR_WARM_LANGS else "eng")
+        return backend
+    except ImportError:
+        if name == "tesserocr":
+            raise
+        return PytesseractBackend()
+    except RuntimeError:
+        logger.warning("tesserocr could not start an engine, falling back to pytesseract", exc_info=True)
+        return PytesseractBackend()
+
+
+def get_backend() -> OCRBackend:
+    """Return this process's backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+def init_worker(langs: Iterable[str] = ()) -> None:
+    """Process pool initializer: pick the backend and pre-load common language sets.
+
+    Failures are logged rather than raised, since an exception here would mark
+    the whole process pool as broken.
+    """
+    try:
+        backend = get_backend()
+    except Exception:
+        logger.exception("Could not initialise OCR backend %r", OCR_BACKEND)
+        return
+    for lang in langs:
+        try:
+            backend.warm(lang)
+        except Exception:
+            logger.warning("Could not warm OCR engine for %r", lang, exc_info=True)
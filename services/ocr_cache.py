@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from db import SessionLocal
+from models import OCRCacheEntry
+
+
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE", "1024"))
+OCR_CACHE_TTL_SECONDS = float(os.getenv("OCR_CACHE_TTL_SECONDS", "86400"))
+# Also match visually near-identical photos via a 64-bit difference hash.
+OCR_CACHE_PHASH = os.getenv("OCR_CACHE_PHASH", "0") == "1"
+OCR_CACHE_PHASH_DISTANCE = int(os.getenv("OCR_CACHE_PHASH_DISTANCE", "4"))
+# Keep results in the app database so they survive restarts and are shared by workers.
+OCR_CACHE_PERSIST = os.getenv("OCR_CACHE_PERSIST", "0") == "1"
+# Persisted near matches are looked up among entries sharing this many leading hex
+# digits of the perceptual hash (an index range scan), newest first, then compared
+# by Hamming distance. A photo differing within the prefix is only matched in memory.
+OCR_CACHE_PHASH_PREFIX = 4
+OCR_CACHE_PHASH_CANDIDATES = 64
+
+
+def image_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class OCRCache:
+    """LRU + TTL cache of OCR text keyed on (image SHA-256, Tesseract language string).
+
+    Entries optionally carry a perceptual hash so a re-photographed signboard
+    within ``phash_distance`` bits of a cached one is served without OCR.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = OCR_CACHE_SIZE,
+        ttl: float = OCR_CACHE_TTL_SECONDS,
+        phash_distance: int = OCR_CACHE_PHASH_DISTANCE,
+        persist: bool = OCR_CACHE_PERSIST,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.phash_distance = phash_distance
+        self.persist = persist
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, Optional[int], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"hits": 0, "near_hits": 0, "persistent_hits": 0, "misses": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _get_memory(self, digest: str, lang: str) -> Optional[str]:
+        key = (digest, lang)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            text, _, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return text
+
+    def _get_near(self, phash: int, lang: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            for (_, entry_lang), (text, entry_phash, expires_at) in reversed(self._entries.items()):
+                if entry_lang != lang or entry_phash is None or expires_at < now:
+                    continue
+                if (entry_phash ^ phash).bit_count() <= self.phash_distance:
+                    return text
+        return None
+
+    def _put_memory(self, digest: str, lang: str, text: str, phash: Optional[int]) -> None:
+        with self._lock:
+            self._entries[(digest, lang)] = (text, phash, time.monotonic() + self.ttl)
+            self._entries.move_to_end((digest, lang))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_persistent(self, digest: str, lang: str, phash: Optional[int]) -> Optional[str]:
+        db = SessionLocal()
+        try:
+            entry = db.query(OCRCacheEntry).filter(
+                OCRCacheEntry.image_hash == digest, OCRCacheEntry.lang == lang
+            ).first()
+            if entry is not None:
+                return entry.text
+            if phash is None:
+                return None
+            prefix = f"{phash:016x}"[:OCR_CACHE_PHASH_PREFIX]
+            candidates = db.query(OCRCacheEntry.phash, OCRCacheEntry.text).filter(
+                # "g" sorts after every hex digit, so this is every hash starting with prefix
+                OCRCacheEntry.phash >= prefix, OCRCacheEntry.phash < prefix + "g", OCRCacheEntry.lang == lang
+            ).order_by(OCRCacheEntry.id.desc()).limit(OCR_CACHE_PHASH_CANDIDATES)
+            for candidate, text in candidates:
+                if (int(candidate, 16) ^ phash).bit_count() <= self.phash_distance:
+                    return text
+            return None
+        finally:
+            db.close()
+
+    def _put_persistent(self, digest: str, lang: str, text: str, phash: Optional[int]) -> None:
+        db = SessionLocal()
+        try:
+            exists = db.query(OCRCacheEntry.id).filter(
+                OCRCacheEntry.image_hash == digest, OCRCacheEntry.lang == lang
+            ).first()
+            if exists is None:
+                db.add(OCRCacheEntry(
+                    image_hash=digest,
+                    lang=lang,
+                    phash=f"{phash:016x}" if phash is not None else None,
+                    text=text,
+                ))
+                db.commit()
+        except Exception:
+            # Another worker may have stored the same image concurrently.
+            db.rollback()
+        finally:
+            db.close()
+
+    async def get(
+        self,
+        digest: str,
+        lang: str,
+        phash_factory: Optional[Callable[[], Awaitable[int]]] = None,
+    ) -> Tuple[Optional[str], Optional[int]]:
+        """Look up cached OCR text, returning ``(text, phash)``.
+
+        ``phash_factory`` is only awaited when the exact lookup misses, and the
+        hash it produced is returned so the caller can store it alongside the
+        fresh OCR result.
+        """
+        text = self._get_memory(digest, lang)
+        if text is not None:
+            self._count("hits")
+            return text, None
+
+        phash = None
+        if phash_factory is not None:
+            phash = await phash_factory()
+            text = self._get_near(phash, lang)
+            if text is not None:
+                self._count("near_hits")
+                self._put_memory(digest, lang, text, phash)
+                return text, phash
+
+        if self.persist:
+            text = await run_in_threadpool(self._get_persistent, digest, lang, phash)
+            if text is not None:
+                self._count("persistent_hits")
+                self._put_memory(digest, lang, text, phash)
+                return text, phash
+
+        self._count("misses")
+        return None, phash
+
+    async def put(self, digest: str, lang: str, text: str, phash: Optional[int] = None) -> None:
+        self._put_memory(digest, lang, text, phash)
+        if self.persist:
+            await run_in_threadpool(self._put_persistent, digest, lang, text, phash)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.counters, "entries": len(self._entries)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+cache = OCRCache()
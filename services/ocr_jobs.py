@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import asynccontextmanager, closing
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from PIL import UnidentifiedImageError
+from sqlalchemy import or_, select, update
+from starlette.concurrency import run_in_threadpool
+
+from db import AsyncSessionLocal
+from models import OCRJob
+from services.blob_store import get_blob_store
+from services.image_preprocess import get_preset
+from services.ocr_pool import OCRQueueFullError, pool
+from services.ocr_service import ocr_source
+from services.script_detect import AUTO_SCRIPT
+from services.translit_engine import engine
+from services.uploads import UPLOAD_TMP_DIR
+from services.user_stats import record_transliteration
+
+
+# Jobs processed at once per app process. Each holds an OCR worker while it runs.
+OCR_JOB_CONCURRENCY = int(os.getenv("OCR_JOB_CONCURRENCY", str(pool.max_workers)))
+# Jobs are for OCR too slow to wait on in a request, so they get a longer deadline.
+OCR_JOB_TIMEOUT_SECONDS = float(os.getenv("OCR_JOB_TIMEOUT_SECONDS", "300"))
+# A job that was picked up this many times without finishing (e.g. it kept crashing workers) fails.
+OCR_JOB_MAX_ATTEMPTS = int(os.getenv("OCR_JOB_MAX_ATTEMPTS", "3"))
+# A running job holds a lease that its process renews every third of this. Once
+# the lease runs out (the process died or was restarted) any process runs it again.
+OCR_JOB_LEASE_SECONDS = float(os.getenv("OCR_JOB_LEASE_SECONDS", "30"))
+# How often an event stream re-reads its job, which catches jobs run by other processes.
+OCR_JOB_POLL_SECONDS = float(os.getenv("OCR_JOB_POLL_SECONDS", "2"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+logger = logging.getLogger(__name__)
+
+
+def new_job_id() -> str:
+    # Unguessable: a job id is all that is needed to read an anonymous job's result
+    return uuid.uuid4().hex
+
+
+@asynccontextmanager
+async def _image_file(key: str) -> AsyncIterator[str]:
+    """A path OCR workers can open: the blob itself when stored locally, else a temporary copy."""
+    store = get_blob_store()
+    path = store.local_path(key)
+    if path is not None:
+        yield path
+        return
+
+    def copy() -> str:
+        fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_TMP_DIR, prefix="ocr-job-")
+        with os.fdopen(fd, "wb") as out, closing(store.open(key)) as blob:
+            shutil.copyfileobj(blob, out)
+        return tmp_path
+
+    tmp_path = await run_in_threadpool(copy)
+    try:
+        yield tmp_path
+    finally:
+        os.unlink(tmp_path)
+
+
+class OCRJobRunner:
+    """Runs OCR jobs from the ocr_jobs table on an in-process queue.
+
+    The table is the source of truth: a job is claimed by flipping it from
+    queued to running in one UPDATE, so a job that reached more than one
+    queue (another worker process recovering it, say) still runs once.
+    Unfinished jobs are queued again when the app starts, and running jobs
+    whose lease expired are swept up while it runs.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = OCR_JOB_CONCURRENCY,
+        timeout: float = OCR_JOB_TIMEOUT_SECONDS,
+        lease: float = OCR_JOB_LEASE_SECONDS,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.lease = lease
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        self._watchers: Dict[str, Set[asyncio.Event]] = {}
+        self.counters: Dict[str, int] = {"queued": 0, "done": 0, "failed": 0, "recovered": 0}
+
+    def _ensure_running(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or not self._tasks or self._tasks[0].get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._tasks = [loop.create_task(self._work(self._queue)) for _ in range(self.concurrency)]
+            self._sweeper = loop.create_task(self._sweep())
+        return self._queue
+
+    def enqueue(self, job_id: str) -> None:
+        self.counters["queued"] += 1
+        self._ensure_running().put_nowait(job_id)
+
+    async def _requeue_expired(self) -> List[str]:
+        """Put running jobs whose lease ran out back in the queued state; returns their ids."""
+        expired = or_(OCRJob.lease_expires_at.is_(None), OCRJob.lease_expires_at < datetime.utcnow())
+        async with AsyncSessionLocal() as db:
+            job_ids = (await db.scalars(select(OCRJob.id).where(OCRJob.status == RUNNING, expired))).all()
+            if job_ids:
+                # Conditional, in case a job finished or renewed its lease since the select
+                await db.execute(
+                    update(OCRJob)
+                    .where(OCRJob.id.in_(job_ids), OCRJob.status == RUNNING, expired)
+                    .values(status=QUEUED, lease_expires_at=None)
+                )
+                await db.commit()
+        return list(job_ids)
+
+    async def recover(self) -> int:
+        """Queue jobs left unfinished by a previous run; returns how many."""
+        await self._requeue_expired()
+        async with AsyncSessionLocal() as db:
+            job_ids = (await db.scalars(select(OCRJob.id).where(OCRJob.status == QUEUED))).all()
+        self._ensure_running()
+        for job_id in job_ids:
+            self.enqueue(job_id)
+        self.counters["recovered"] += len(job_ids)
+        return len(job_ids)
+
+    async def _sweep(self) -> None:
+        """Pick up the jobs of processes that died while this one keeps running."""
+        while True:
+            await asyncio.sleep(self.lease)
+            try:
+                job_ids = await self._requeue_expired()
+            except Exception:
+                logger.warning("OCR job sweep failed", exc_info=True)
+                continue
+            for job_id in job_ids:
+                logger.info("OCR job %s lost its worker; queued again", job_id)
+                self.enqueue(job_id)
+            self.counters["recovered"] += len(job_ids)
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        if self._sweeper is not None:
+            tasks.append(self._sweeper)
+            self._sweeper = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue = None
+
+    def watch(self, job_id: str) -> asyncio.Event:
+        """An event set whenever the job changes state in this process."""
+        event = asyncio.Event()
+        self._watchers.setdefault(job_id, set()).add(event)
+        return event
+
+    def unwatch(self, job_id: str, event: asyncio.Event) -> None:
+        events = self._watchers.get(job_id)
+        if events is not None:
+            events.discard(event)
+            if not events:
+                del self._watchers[job_id]
+
+    def _notify(self, job_id: str) -> None:
+        for event in self._watchers.get(job_id, ()):
+            event.set()
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        while True:
+            job_id = await queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pragma: no cover - _run records failures on the job itself
+                logger.exception("OCR job %s crashed", job_id)
+
+    async def _claim(self, job_id: str) -> Optional[OCRJob]:
+        async with AsyncSessionLocal() as db:
+            claimed = await db.execute(
+                update(OCRJob)
+                .where(OCRJob.id == job_id, OCRJob.status == QUEUED)
+                .values(
+                    status=RUNNING,
+                    started_at=datetime.utcnow(),
+                    lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease),
+                    attempts=OCRJob.attempts + 1,
+                )
+            )
+            await db.commit()
+            if claimed.rowcount != 1:
+                return None
+            return await db.get(OCRJob, job_id)
+
+    def _held(self, job: OCRJob):
+        # The attempt that claimed the job; a later one means it was swept up and claimed again
+        return (OCRJob.id == job.id, OCRJob.status == RUNNING, OCRJob.attempts == job.attempts)
+
+    async def _renew(self, job: OCRJob) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(OCRJob)
+                        .where(*self._held(job))
+                        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=self.lease))
+                    )
+                    await db.commit()
+            except Exception:
+                logger.warning("Could not renew the lease of OCR job %s", job.id, exc_info=True)
+
+    async def _finish(self, job: OCRJob, **values) -> None:
+        async with AsyncSessionLocal() as db:
+            finished = await db.execute(
+                update(OCRJob)
+                .where(*self._held(job))
+                .values(finished_at=datetime.utcnow(), lease_expires_at=None, **values)
+            )
+            if finished.rowcount != 1:
+                # Its lease ran out and another attempt owns the job now; that one reports the result
+                logger.warning("OCR job %s was taken over before attempt %d finished", job.id, job.attempts)
+                return
+            if job.user_id is not None and values["status"] == DONE:
+                await record_transliteration(db, job.user_id, [values["source_script"]])
+            await db.commit()
+        self.counters[values["status"]] += 1
+        self._notify(job.id)
+
+    async def _run(self, job_id: str) -> None:
+        job = await self._claim(job_id)
+        if job is None:
+            return
+        self._notify(job_id)
+        if job.attempts > OCR_JOB_MAX_ATTEMPTS:
+            await self._finish(job, status=FAILED, error=f"Gave up after {OCR_JOB_MAX_ATTEMPTS} attempts")
+            return
+        renew = asyncio.get_running_loop().create_task(self._renew(job))
+        try:
+            await self._process(job)
+        finally:
+            renew.cancel()
+
+    async def _process(self, job: OCRJob) -> None:
+        job_id = job.id
+        try:
+            async with _image_file(job.image_key) as path:
+                while True:
+                    try:
+                        # Blob keys are SHA-256 digests, which is what the OCR cache is keyed on
+                        text = await ocr_source(
+                            path, job.image_key, job.lang, get_preset(job.preprocess), timeout=self.timeout
+                        )
+                        break
+                    except OCRQueueFullError:
+                        # Requests using the pool directly got there first; jobs can wait
+                        await asyncio.sleep(1)
+            text = text.strip()
+            source_script = None if job.source_script == AUTO_SCRIPT else job.source_script
+            conversion = await engine.convert(text, source_script, job.target_script)
+        except UnidentifiedImageError:
+            await self._finish(job, status=FAILED, error="Invalid image file")
+            return
+        except Exception as e:
+            logger.warning("OCR job %s failed", job_id, exc_info=True)
+            await self._finish(job, status=FAILED, error=str(e) or type(e).__name__)
+            return
+        await self._finish(
+            job,
+            status=DONE,
+            source_script=conversion.source_script,
+            source_text=text,
+            transliterated_text=conversion.text,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self.counters,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "workers": len(self._tasks),
+        }
+
+
+runner = OCRJobRunner()
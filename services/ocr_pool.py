@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Sequence
+
+from services.ocr_backends import OCR_WARM_LANGS, init_worker
+
+
+# OCR is CPU bound, so it runs in worker processes rather than on the event loop.
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 2)))
+# Jobs allowed to wait for a free worker before new requests are rejected.
+OCR_QUEUE_SIZE = int(os.getenv("OCR_QUEUE_SIZE", "16"))
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", "30"))
+
+
+class OCRQueueFullError(RuntimeError):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+class OCRTimeoutError(RuntimeError):
+    """Raised when an OCR job does not finish before its deadline."""
+
+
+class OCRWorkerCrashedError(RuntimeError):
+    """Raised when the worker running a job died (out of memory, a crash in libtesseract)."""
+
+
+class OCRPool:
+    """Process pool with a bounded backlog and per-job timeouts.
+
+    At most ``max_workers + queue_size`` jobs are accepted at once; further
+    submissions fail fast with :class:`OCRQueueFullError` so callers can shed
+    load instead of piling up requests behind Tesseract.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        queue_size: int,
+        timeout: float,
+        initializer: Optional[Callable[..., None]] = None,
+        initargs: Sequence[Any] = (),
+    ):
+        self.max_workers = max(1, max_workers)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self._initializer = initializer
+        self._initargs = tuple(initargs)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_size
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=self._initializer,
+                    initargs=self._initargs,
+                )
+            return self._executor
+
+    def _release(self, _future: Optional[Future]) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        """Drop a broken executor so the next job starts a fresh one."""
+        with self._lock:
+            if self._executor is not executor:
+                # Already replaced by another caller
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _finished(self, executor: ProcessPoolExecutor, future: Future) -> None:
+        self._release(future)
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._discard(executor)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise OCRQueueFullError("OCR queue is full, retry later")
+            self._pending += 1
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died after the last job finished; start over with a fresh pool
+                self._discard(executor)
+                executor = self._get_executor()
+                future = executor.submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        # The slot is freed when the worker finishes, not when the caller gives
+        # up, so timed-out jobs still count against the backlog until they end.
+        future.add_done_callback(functools.partial(self._finished, executor))
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        future = self.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise OCRTimeoutError(f"OCR did not finish within {timeout or self.timeout:g}s")
+        except BrokenProcessPool:
+            # Every job on the pool fails with it; the pool is replaced for the next one
+            raise OCRWorkerCrashedError("OCR worker crashed, retry the request") from None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Workers keep their OCR engines warm between jobs, see services.ocr_backends.
+pool = OCRPool(
+    OCR_WORKERS,
+    OCR_QUEUE_SIZE,
+    OCR_TIMEOUT_SECONDS,
+    initializer=init_worker,
+    initargs=(OCR_WARM_LANGS,),
+)
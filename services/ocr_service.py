@@ -1,8 +1,117 @@
-import pytesseract
+import os
+from typing import Optional
+
 from PIL import Image
-import io
 
-async def extract_text(file):
-    image = Image.open(io.BytesIO(await file.read()))
-    text = pytesseract.image_to_string(image, lang="hin+tam+tel+mal+pan")  # OCR for multiple Indic langs
+from services.image_preprocess import ImageSource, PreprocessOptions, get_preset, load_for_ocr, open_image
+from services.ocr_backends import OCR_DETECT_LANGS, OCR_DOCUMENT_DETECT_LANGS, get_backend
+from services.ocr_cache import OCR_CACHE_PHASH, cache, image_digest
+from services.ocr_pool import pool
+from services.script_detect import MAX_IMAGE_SCRIPTS, dominant_scripts, narrow_langs, narrows
+from services.uploads import saved_upload
+
+# Picks the language packs per image, from OCR_DETECT_LANGS or, as "auto:<langs>", from <langs>.
+AUTO_LANG = "auto"
+
+
+def auto_lang(langs: str) -> str:
+    return f"{AUTO_LANG}:{langs}"
+
+
+def detection_langs(lang: str) -> Optional[str]:
+    """The packs ``lang`` picks from per image, or None when it names the packs to use."""
+    if lang == AUTO_LANG:
+        return OCR_DETECT_LANGS
+    if lang.startswith(AUTO_LANG + ":"):
+        return lang[len(AUTO_LANG) + 1:]
+    return None
+
+
+# Tesseract languages for every image; unset or "auto", each caller picks them per image.
+OCR_LANG = os.getenv("OCR_LANG", "").strip()
+_FIXED_LANG = OCR_LANG if OCR_LANG not in ("", AUTO_LANG) else None
+# /transliterate/image
+DEFAULT_LANG = _FIXED_LANG or auto_lang(OCR_DETECT_LANGS)
+# /ocr/ and OCR jobs
+DOCUMENT_LANG = _FIXED_LANG or auto_lang(OCR_DOCUMENT_DETECT_LANGS)
+# Longest side of the quick pass that finds out which scripts an image holds.
+OCR_DETECT_MAX_SIDE = int(os.getenv("OCR_DETECT_MAX_SIDE", "800"))
+
+
+def image_to_text(data: ImageSource, lang: str, options: PreprocessOptions) -> str:
+    """Run OCR over encoded image bytes or an image file. Executes inside an OCR worker process.
+
+    With an automatic ``lang``, a low-resolution pass with every pack of its
+    detection set finds the scripts on the image, and the full-resolution
+    pass only loads the packs for those: Tesseract's time grows with each
+    pack it has to try. An image small enough to need no scaling down, or a
+    detection set with no more scripts than an image is narrowed to, is read
+    once with every pack.
+    """
+    image = load_for_ocr(data, options)
+    backend = get_backend()
+    detect = detection_langs(lang)
+    if detect is None:
+        return backend.image_to_string(image, lang)
+
+    if not narrows(detect) or max(image.size) <= OCR_DETECT_MAX_SIDE:
+        # Nothing to narrow, or the quick pass would be over the full image: it is already the real one
+        return backend.image_to_string(image, detect)
+    preview = image.copy()
+    preview.thumbnail((OCR_DETECT_MAX_SIDE, OCR_DETECT_MAX_SIDE), Image.BILINEAR)
+    text = backend.image_to_string(preview, detect)
+    return backend.image_to_string(image, narrow_langs(detect, dominant_scripts(text, limit=MAX_IMAGE_SCRIPTS)))
+
+
+def perceptual_hash(data: ImageSource, size: int = 8) -> int:
+    """64-bit difference hash, stable across re-encodes and small camera shifts."""
+    image = open_image(data)
+    image.draft("L", (size * 4, size * 4))
+    pixels = list(image.convert("L").resize((size + 1, size), Image.BILINEAR).getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+async def ocr_source(
+    source: ImageSource,
+    digest: str,
+    lang: str = DEFAULT_LANG,
+    options: Optional[PreprocessOptions] = None,
+    timeout: Optional[float] = None,
+) -> str:
+    """OCR an image given as bytes or as a file path, with ``digest`` the SHA-256 of its bytes.
+
+    A path is opened by the worker process itself, so the image never has to
+    be pickled across to it. ``timeout`` overrides OCR_TIMEOUT_SECONDS.
+    """
+    options = options or get_preset(None)
+    phash_factory = (lambda: pool.run(perceptual_hash, source)) if OCR_CACHE_PHASH else None
+    # Different preprocessing can yield different text, so it is part of the key.
+    cache_lang = f"{lang}|{options.name}"
+    text, phash = await cache.get(digest, cache_lang, phash_factory)
+    if text is not None:
+        return text
+
+    text = await pool.run(image_to_text, source, lang, options, timeout=timeout)
+    await cache.put(digest, cache_lang, text, phash)
+    return text
+
+
+async def ocr_bytes(data: bytes, lang: str = DEFAULT_LANG, options: Optional[PreprocessOptions] = None) -> str:
+    return await ocr_source(data, image_digest(data), lang, options)
+
+
+async def ocr_upload(file, lang: str = DEFAULT_LANG, options: Optional[PreprocessOptions] = None) -> str:
+    """OCR an UploadFile by way of a temporary file, never holding the whole image in memory."""
+    async with saved_upload(file) as saved:
+        return await ocr_source(saved.path, saved.digest, lang, options)
+
+
+async def extract_text(file, lang: str = DOCUMENT_LANG, options: Optional[PreprocessOptions] = None):
+    text = await ocr_upload(file, lang, options)
     return text.strip()
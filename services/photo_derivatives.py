@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import io
+import logging
+import os
+from contextlib import closing
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Optional, Union
+
+from PIL import Image, ImageOps
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from db import SessionLocal
+from models import PhotoDerivative
+from services.blob_store import get_blob_store
+from services.image_preprocess import open_image
+
+
+# Longest side in pixels of each derivative, largest first.
+NOTE_PHOTO_SIZES: Dict[str, int] = {
+    "medium": int(os.getenv("NOTE_PHOTO_MEDIUM_PX", "1024")),
+    "thumb": int(os.getenv("NOTE_PHOTO_THUMB_PX", "256")),
+}
+NOTE_PHOTO_DERIVATIVE_FORMAT = os.getenv("NOTE_PHOTO_DERIVATIVE_FORMAT", "webp").strip().lower()
+NOTE_PHOTO_DERIVATIVE_QUALITY = int(os.getenv("NOTE_PHOTO_DERIVATIVE_QUALITY", "80"))
+
+# Pillow format, content type and file extension per output format.
+FORMATS = {
+    "webp": ("WEBP", "image/webp", "webp"),
+    "jpeg": ("JPEG", "image/jpeg", "jpg"),
+}
+
+EXIF_ORIENTATION = 0x0112
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Derivative:
+    key: str
+    content_type: str
+    size: int
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    pil_format = FORMATS[fmt][0]
+    if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA", "L"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    options = {"method": 4} if pil_format == "WEBP" else {"optimize": True, "progressive": True}
+    out = io.BytesIO()
+    image.save(out, pil_format, quality=NOTE_PHOTO_DERIVATIVE_QUALITY, **options)
+    return out.getvalue()
+
+
+def render_derivatives(source: Union[bytes, BinaryIO], fmt: str = NOTE_PHOTO_DERIVATIVE_FORMAT) -> Dict[str, Optional[bytes]]:
+    """Encode every size in NOTE_PHOTO_SIZES from the original photo, as bytes or a binary file.
+
+    A size the photo already fits in maps to None: the original is served for it.
+    """
+    image = open_image(source)
+    largest = max(NOTE_PHOTO_SIZES.values())
+    # JPEGs decode at 1/2, 1/4 or 1/8 scale for free when that is still big enough
+    image.draft("RGB", (largest, largest))
+    # Phones store rotation as an EXIF tag; derivatives are saved upright without it
+    rotated = image.getexif().get(EXIF_ORIENTATION, 1) != 1
+    image = ImageOps.exif_transpose(image)
+    rendered: Dict[str, Optional[bytes]] = {}
+    for name, side in sorted(NOTE_PHOTO_SIZES.items(), key=lambda item: -item[1]):
+        if max(image.size) <= side and not rotated:
+            rendered[name] = None
+            continue
+        # Each size is scaled from the previous, larger one
+        image = image.copy()
+        image.thumbnail((side, side), Image.LANCZOS)
+        rendered[name] = _encode(image, fmt)
+    return rendered
+
+
+def generate_photo_derivatives(photo_key: str, content_type: Optional[str] = None) -> Dict[str, Derivative]:
+    """Create and record the derivatives of a stored photo; existing ones are returned as they are.
+
+    Runs in a thread: from a BackgroundTasks job after an upload, or on the
+    first request for a size that has not been generated yet.
+    """
+    db = SessionLocal()
+    try:
+        existing = {
+            row.size: Derivative(row.blob_key, row.content_type, row.byte_size)
+            for row in db.query(PhotoDerivative).filter(PhotoDerivative.photo_key == photo_key)
+        }
+        if set(NOTE_PHOTO_SIZES) <= set(existing):
+            return existing
+
+        store = get_blob_store()
+        fmt = NOTE_PHOTO_DERIVATIVE_FORMAT if NOTE_PHOTO_DERIVATIVE_FORMAT in FORMATS else "jpeg"
+        try:
+            blob = store.open(photo_key)
+        except KeyError:
+            return existing
+        with closing(blob):
+            # Decode straight from the file; only unseekable (S3) bodies are read into memory
+            source = blob if blob.seekable() else io.BytesIO(blob.read())
+            original_size = source.seek(0, os.SEEK_END)
+            source.seek(0)
+            try:
+                rendered = render_derivatives(source, fmt)
+            except Exception:
+                # Recorded like a photo that is already small, so decoding is not retried per request
+                logger.warning("Could not decode photo %s, serving the original at every size", photo_key, exc_info=True)
+                rendered = dict.fromkeys(NOTE_PHOTO_SIZES)
+
+        derivatives: Dict[str, Derivative] = {}
+        for name, data in rendered.items():
+            if data is None:
+                derivatives[name] = Derivative(photo_key, content_type or "image/jpeg", original_size)
+            else:
+                derivative_type = FORMATS[fmt][1]
+                derivatives[name] = Derivative(store.put(data, derivative_type), derivative_type, len(data))
+        try:
+            db.add_all(
+                PhotoDerivative(
+                    photo_key=photo_key,
+                    size=name,
+                    blob_key=derivative.key,
+                    content_type=derivative.content_type,
+                    byte_size=derivative.size,
+                )
+                for name, derivative in derivatives.items()
+                if name not in existing
+            )
+            db.commit()
+        except Exception:
+            # Another request may have recorded the same photo concurrently.
+            db.rollback()
+        return derivatives
+    finally:
+        db.close()
+
+
+async def get_photo_derivative(
+    db: AsyncSession, photo_key: str, size: str, content_type: Optional[str] = None
+) -> Optional[Derivative]:
+    """The stored derivative of ``photo_key`` at ``size``, generating it if it is missing.
+
+    None if the original is missing from the blob store.
+    """
+    row = await db.get(PhotoDerivative, (photo_key, size))
+    if row is not None:
+        return Derivative(row.blob_key, row.content_type, row.byte_size)
+    derivatives = await run_in_threadpool(generate_photo_derivatives, photo_key, content_type)
+    return derivatives.get(size)
+
+
+def derivative_filename(filename: str, size: str, content_type: str) -> str:
+    """``IMG_01.jpg`` -> ``IMG_01-thumb.webp``."""
+    stem = os.path.splitext(filename)[0] or "photo"
+    extension = next((ext for _, mime, ext in FORMATS.values() if mime == content_type), None)
+    return f"{stem}-{size}.{extension}" if extension else filename
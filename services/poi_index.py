@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import csv
+import math
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.geo import EARTH_RADIUS_KM, bbox_around, geohash_cell_size, geohash_encode, haversine_km
+
+
+POI_DATASET = os.getenv("POI_DATASET", str(Path(__file__).resolve().parent.parent / "data" / "heritage_sites.csv"))
+# Grid cell edge in degrees; 0.5 is about 55 km north-south.
+POI_GRID_DEGREES = float(os.getenv("POI_GRID_DEGREES", "0.5"))
+POI_CACHE_SIZE = int(os.getenv("POI_CACHE_SIZE", "4096"))
+# Query points are bucketed into geohash cells of this length for caching; 6 is about 1.2 km x 0.6 km.
+POI_CACHE_PRECISION = int(os.getenv("POI_CACHE_PRECISION", "6"))
+
+
+@dataclass(frozen=True)
+class POI:
+    name: str
+    type: str
+    city: str
+    state: str
+    latitude: float
+    longitude: float
+
+
+def load_pois(path: str) -> List[POI]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            POI(
+                name=row["name"],
+                type=row["type"],
+                city=row.get("city", ""),
+                state=row.get("state", ""),
+                latitude=float(row["latitude"]),
+                longitude=float(row["longitude"]),
+            )
+            for row in csv.DictReader(f)
+        ]
+
+
+class POIIndex:
+    """In-memory grid index over points of interest with k-nearest and radius queries.
+
+    Places are bucketed into ``grid_degrees`` cells, so a query only computes
+    distances for the places in the cells its search box touches. The candidate
+    set for a query is cached per geohash cell of the query point (and radius
+    or k), so nearby requests from the same area skip the grid walk and only
+    rerun the vectorized distance pass.
+    """
+
+    def __init__(
+        self,
+        grid_degrees: float = POI_GRID_DEGREES,
+        cache_size: int = POI_CACHE_SIZE,
+        cache_precision: int = POI_CACHE_PRECISION,
+    ):
+        self.grid_degrees = grid_degrees
+        self.cache_size = cache_size
+        self.cache_precision = cache_precision
+        self.pois: List[POI] = []
+        self._lats = np.empty(0)
+        self._lons = np.empty(0)
+        self._grid: Dict[Tuple[int, int], np.ndarray] = {}
+        self._candidates: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    def load(self, pois: List[POI]) -> None:
+        lats = np.array([p.latitude for p in pois], dtype=np.float64)
+        lons = np.array([p.longitude for p in pois], dtype=np.float64)
+        buckets: Dict[Tuple[int, int], List[int]] = {}
+        for i, (lat, lon) in enumerate(zip(lats, lons)):
+            buckets.setdefault(self._cell(lat, lon), []).append(i)
+        with self._lock:
+            self.pois = list(pois)
+            self._lats, self._lons = lats, lons
+            self._grid = {cell: np.array(ids, dtype=np.int64) for cell, ids in buckets.items()}
+            self._candidates.clear()
+
+    def load_file(self, path: str = POI_DATASET) -> None:
+        self.load(load_pois(path))
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.grid_degrees), math.floor(lon / self.grid_degrees)
+
+    def _grid_candidates(self, lat: float, lon: float, radius_km: float) -> np.ndarray:
+        min_lat, min_lon, max_lat, max_lon = bbox_around(lat, lon, radius_km)
+        row_lo, col_lo = self._cell(min_lat, min_lon)
+        row_hi, col_hi = self._cell(max_lat, max_lon)
+        cols_per_turn = round(360.0 / self.grid_degrees)
+        if col_hi - col_lo + 1 >= cols_per_turn:
+            col_lo, col_hi = -cols_per_turn // 2, cols_per_turn // 2
+        first_col = math.floor(-180.0 / self.grid_degrees)
+        parts = []
+        for row in range(row_lo, row_hi + 1):
+            for col in range(col_lo, col_hi + 1):
+                # Wrap columns past the antimeridian back into [-180, 180).
+                ids = self._grid.get((row, (col - first_col) % cols_per_turn + first_col))
+                if ids is not None:
+                    parts.append(ids)
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    def _cached(self, key: Tuple, compute) -> np.ndarray:
+        with self._lock:
+            ids = self._candidates.get(key)
+            if ids is not None:
+                self._candidates.move_to_end(key)
+                self.counters["hits"] += 1
+                return ids
+            self.counters["misses"] += 1
+        ids = compute()
+        with self._lock:
+            self._candidates[key] = ids
+            self._candidates.move_to_end(key)
+            while len(self._candidates) > self.cache_size:
+                self._candidates.popitem(last=False)
+        return ids
+
+    def _cell_span_km(self, lat: float) -> float:
+        """Upper bound on the distance between two points of the cache cell around ``lat``."""
+        cell_h, cell_w = geohash_cell_size(self.cache_precision)
+        height_km = math.radians(cell_h) * EARTH_RADIUS_KM
+        width_km = math.radians(cell_w) * EARTH_RADIUS_KM * math.cos(math.radians(max(abs(lat) - cell_h, 0.0)))
+        return math.hypot(height_km, width_km)
+
+    def _ranked(self, lat: float, lon: float, ids: np.ndarray, radius_km: Optional[float], limit: int):
+        distances = haversine_km(lat, lon, self._lats[ids], self._lons[ids])
+        keep = np.flatnonzero(distances <= radius_km) if radius_km is not None else np.arange(len(ids))
+        order = keep[np.argsort(distances[keep], kind="stable")][:limit]
+        return [(self.pois[i], float(d)) for i, d in zip(ids[order], distances[order])]
+
+    def within_radius(self, lat: float, lon: float, radius_km: float, limit: int = 50) -> List[Tuple[POI, float]]:
+        """Places within ``radius_km`` of the point, nearest first, as (poi, distance_km)."""
+        cell = geohash_encode(lat, lon, self.cache_precision)
+        # Candidates cover the whole cache cell, so they are valid for every point in it.
+        ids = self._cached(
+            ("radius", cell, radius_km),
+            lambda: self._grid_candidates(lat, lon, radius_km + self._cell_span_km(lat)),
+        )
+        return self._ranked(lat, lon, ids, radius_km, limit)
+
+    def nearest(self, lat: float, lon: float, k: int = 10) -> List[Tuple[POI, float]]:
+        """The ``k`` places closest to the point, nearest first, as (poi, distance_km)."""
+        if not self.pois:
+            return []
+        k = min(k, len(self.pois))
+        cell = geohash_encode(lat, lon, self.cache_precision)
+        ids = self._cached(("nearest", cell, k), lambda: self._nearest_candidates(lat, lon, k))
+        return self._ranked(lat, lon, ids, None, k)
+
+    def _nearest_candidates(self, lat: float, lon: float, k: int) -> np.ndarray:
+        # Grow the search radius until it holds k places. Anywhere else in the
+        # cache cell, the k nearest are at most one cell diameter further away.
+        slack = 2 * self._cell_span_km(lat)
+        radius = max(self.grid_degrees * 111.0, slack)
+        while True:
+            ids = self._grid_candidates(lat, lon, radius)
+            if len(ids) >= k:
+                distances = haversine_km(lat, lon, self._lats[ids], self._lons[ids])
+                kth = float(np.partition(distances, k - 1)[k - 1])
+                if kth <= radius:
+                    return self._grid_candidates(lat, lon, kth + slack)
+            if radius >= math.pi * EARTH_RADIUS_KM:
+                return np.arange(len(self.pois), dtype=np.int64)
+            radius *= 2
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self.counters,
+                "places": len(self.pois),
+                "grid_cells": len(self._grid),
+                "entries": len(self._candidates),
+                "max_entries": self.cache_size,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._candidates.clear()
+            self.counters = {"hits": 0, "misses": 0}
+
+
+index = POIIndex()
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from indic_transliteration import sanscript
+
+
+# Placeholder for a source script that is to be detected from the text.
+AUTO_SCRIPT = "auto"
+
+# The Indic Unicode blocks are 128 code points each, in this order from U+0900.
+INDIC_BLOCK_START = 0x0900
+INDIC_BLOCKS = (
+    sanscript.DEVANAGARI,
+    sanscript.BENGALI,
+    sanscript.GURMUKHI,
+    sanscript.GUJARATI,
+    sanscript.ORIYA,
+    sanscript.TAMIL,
+    sanscript.TELUGU,
+    sanscript.KANNADA,
+    sanscript.MALAYALAM,
+)
+INDIC_BLOCK_END = INDIC_BLOCK_START + 128 * len(INDIC_BLOCKS)
+# Latin letters, from ASCII through Latin Extended-B and the Latin Extended
+# Additional block that holds most IAST letters with dots below (ṛ, ṣ, ṭ, ṇ, ḥ, ṃ).
+LATIN = sanscript.IAST
+LATIN_END = 0x0250
+LATIN_ADDITIONAL = (0x1E00, 0x1F00)
+# Every code point from here on has no script
+LABELS_END = LATIN_ADDITIONAL[1]
+# The danda and double danda end sentences in most Indic scripts, not only Devanagari.
+DANDAS = (0x0964, 0x0965)
+
+# Label 0 is "no script" (digits, spaces, punctuation, other scripts); label i is SCRIPTS[i - 1].
+SCRIPTS = (*INDIC_BLOCKS, LATIN)
+
+
+def _build_labels() -> np.ndarray:
+    # One entry past the last labelled code point, for every code point beyond it
+    labels = np.zeros(LABELS_END + 1, dtype=np.uint8)
+    labels[INDIC_BLOCK_START:INDIC_BLOCK_END] = 1 + (np.arange(INDIC_BLOCK_END - INDIC_BLOCK_START) >> 7)
+    labels[list(DANDAS)] = 0
+    latin = [cp for cp in (*range(LATIN_END), *range(*LATIN_ADDITIONAL)) if chr(cp).isalpha()]
+    labels[latin] = SCRIPTS.index(LATIN) + 1
+    return labels
+
+
+_LABELS = _build_labels()
+
+# Script each Tesseract language pack reads.
+TESSERACT_LANG_SCRIPTS: Dict[str, str] = {
+    "hin": sanscript.DEVANAGARI,
+    "mar": sanscript.DEVANAGARI,
+    "san": sanscript.DEVANAGARI,
+    "nep": sanscript.DEVANAGARI,
+    "ben": sanscript.BENGALI,
+    "asm": sanscript.BENGALI,
+    "pan": sanscript.GURMUKHI,
+    "guj": sanscript.GUJARATI,
+    "ori": sanscript.ORIYA,
+    "tam": sanscript.TAMIL,
+    "tel": sanscript.TELUGU,
+    "kan": sanscript.KANNADA,
+    "mal": sanscript.MALAYALAM,
+    "eng": LATIN,
+}
+
+# A script must make up this share of the letters to count as present.
+MIN_SCRIPT_SHARE = 0.2
+# Scripts automatic OCR language selection keeps per image.
+MAX_IMAGE_SCRIPTS = 2
+
+
+def script_labels(text: str) -> np.ndarray:
+    """The script label of every character of ``text``, from one table lookup over its code points."""
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype="<u4")
+    return _LABELS[np.minimum(codes, LABELS_END)]
+
+
+def _histogram(labels: np.ndarray) -> Counter:
+    counts = np.bincount(labels, minlength=len(SCRIPTS) + 1)
+    return Counter({script: int(count) for script, count in zip(SCRIPTS, counts[1:]) if count})
+
+
+def script_histogram(text: str) -> Counter:
+    return _histogram(script_labels(text))
+
+
+def _dominant(histogram: Counter, limit: int, min_share: float) -> List[str]:
+    total = sum(histogram.values())
+    return [script for script, count in histogram.most_common(limit) if count >= total * min_share]
+
+
+def dominant_scripts(text: str, limit: int = 2, min_share: float = MIN_SCRIPT_SHARE) -> List[str]:
+    """Up to ``limit`` scripts of ``text``, most frequent first, ignoring those under ``min_share``."""
+    return _dominant(script_histogram(text), limit, min_share)
+
+
+def detect_script(text: str) -> Optional[str]:
+    """The main script of ``text`` as a scheme name, or None when it has no letters."""
+    scripts = dominant_scripts(text, limit=1)
+    return scripts[0] if scripts else None
+
+
+@dataclass(frozen=True)
+class ScriptRuns:
+    # Main script of the whole text: its most frequent Indic script, Latin only
+    # when it has no Indic letters, None when it has no letters at all
+    script: Optional[str]
+    # (script, text) pieces that add up to the text
+    runs: List[Tuple[Optional[str], str]]
+
+
+def split_scripts(text: str) -> ScriptRuns:
+    """Split mixed-script text into runs of one script each.
+
+    Characters without a script (spaces, digits, punctuation) join the run
+    before them, or the first run at the start of the text, so a run only
+    ends where another script's letters begin.
+    """
+    labels = script_labels(text)
+    letters = np.flatnonzero(labels)
+    if not len(letters):
+        return ScriptRuns(None, [(None, text)] if text else [])
+    lowest, highest = labels[letters].min(), labels.max()
+    if lowest == highest:
+        # The common case: a single script
+        return ScriptRuns(SCRIPTS[highest - 1], [(SCRIPTS[highest - 1], text)])
+
+    # Carry each letter's label forward over the characters without one
+    last_letter = np.where(labels > 0, np.arange(len(labels)), letters[0])
+    np.maximum.accumulate(last_letter, out=last_letter)
+    filled = labels[last_letter]
+    bounds = [0, *(np.flatnonzero(np.diff(filled)) + 1).tolist(), len(text)]
+    runs = [(SCRIPTS[filled[start] - 1], text[start:end]) for start, end in zip(bounds, bounds[1:])]
+    counts = np.bincount(labels, minlength=len(SCRIPTS) + 1)
+    # Latin among Indic text is mostly English words, which do not make it romanized text
+    counts[SCRIPTS.index(LATIN) + 1] = 0
+    return ScriptRuns(SCRIPTS[int(counts[1:].argmax())], runs)
+
+
+def narrow_langs(langs: str, scripts: List[str]) -> str:
+    """The packs of a Tesseract language string that read one of ``scripts``.
+
+    ``langs`` is returned unchanged if none of them do.
+    """
+    narrowed = [lang for lang in langs.split("+") if TESSERACT_LANG_SCRIPTS.get(lang) in scripts]
+    return "+".join(narrowed) if narrowed else langs
+
+
+def lang_scripts(langs: str) -> List[str]:
+    """The scripts the packs of a Tesseract language string read, in order; unknown packs are left out."""
+    return [script for script in dict.fromkeys(map(TESSERACT_LANG_SCRIPTS.get, langs.split("+"))) if script]
+
+
+def narrows(langs: str) -> bool:
+    """Whether ``narrow_langs`` can leave out whole scripts of ``langs`` for an image."""
+    return len(lang_scripts(langs)) > MAX_IMAGE_SCRIPTS
+
+
+def auto_lang_sets(langs: str, with_latin: bool = True) -> List[str]:
+    """The language strings ``narrow_langs`` makes of ``langs`` for text in one script.
+
+    ``langs`` itself comes first, then the packs of each of its scripts alone
+    and, ``with_latin``, each of those together with the Latin ones.
+    """
+    scripts = lang_scripts(langs)
+    sets = [langs, *(narrow_langs(langs, [script]) for script in scripts)]
+    if with_latin and LATIN in scripts:
+        sets += [narrow_langs(langs, [LATIN, script]) for script in scripts]
+    return list(dict.fromkeys(sets))
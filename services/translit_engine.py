@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from indic_transliteration import sanscript
+from indic_transliteration.sanscript import SCHEMES, SchemeMap
+from starlette.concurrency import run_in_threadpool
+
+from services.script_detect import LATIN, split_scripts
+
+
+# Used when a request names no target script, or no source script and none can be detected.
+DEFAULT_SOURCE_SCRIPT = sanscript.DEVANAGARI
+DEFAULT_TARGET_SCRIPT = sanscript.IAST
+
+# Names clients send for a scheme, matched case-insensitively. Any sanscript
+# scheme name is accepted as well.
+SCRIPT_ALIASES: Dict[str, str] = {
+    "devanagari": sanscript.DEVANAGARI,
+    "hindi": sanscript.DEVANAGARI,
+    "iast": sanscript.IAST,
+    "itrans": sanscript.ITRANS,
+    "telugu": sanscript.TELUGU,
+    "kannada": sanscript.KANNADA,
+    "tamil": sanscript.TAMIL,
+    "malayalam": sanscript.MALAYALAM,
+    "gujarati": sanscript.GUJARATI,
+    "gurmukhi": sanscript.GURMUKHI,
+    "bengali": sanscript.BENGALI,
+    "oriya": sanscript.ORIYA,
+}
+
+# Scheme maps for every pair of these are built once at startup.
+PRECOMPILED_SCRIPTS = (
+    sanscript.DEVANAGARI,
+    sanscript.IAST,
+    sanscript.ITRANS,
+    sanscript.TELUGU,
+    sanscript.KANNADA,
+    sanscript.TAMIL,
+    sanscript.MALAYALAM,
+    sanscript.GUJARATI,
+    sanscript.GURMUKHI,
+    sanscript.BENGALI,
+    sanscript.ORIYA,
+)
+
+TRANSLIT_CACHE_SIZE = int(os.getenv("TRANSLIT_CACHE_SIZE", "4096"))
+# Only short inputs (place names, greetings) repeat often enough to be worth memoizing.
+TRANSLIT_CACHE_MAX_CHARS = int(os.getenv("TRANSLIT_CACHE_MAX_CHARS", "64"))
+
+
+class UnsupportedScriptError(ValueError):
+    """Raised for script names that are neither a sanscript scheme nor an alias of one."""
+
+    def __init__(self, names: List[str]):
+        super().__init__(f"Unsupported script specified: {', '.join(names)}")
+        self.names = names
+
+
+def normalize_script_name(name: Optional[str]) -> Optional[str]:
+    """The scheme name for a client-supplied script name; None when none was given."""
+    if not name:
+        return None
+    key = name.strip().lower()
+    return SCRIPT_ALIASES.get(key, key)
+
+
+def require_scripts(*names: Optional[str]) -> None:
+    """Raise UnsupportedScriptError listing every normalized name that is not a scheme; None is skipped."""
+    unsupported = [name for name in names if name is not None and name not in SCHEMES]
+    if unsupported:
+        raise UnsupportedScriptError(unsupported)
+
+
+@dataclass(frozen=True)
+class Conversion:
+    text: str
+    source_script: str
+    # Set when the source script was detected rather than given
+    detected_script: Optional[str] = None
+
+
+class TransliterationEngine:
+    """Holds compiled ``SchemeMap`` objects and memoizes short conversions.
+
+    ``sanscript.transliterate`` keeps only the last 8 scheme maps, so with more
+    script pairs in use it keeps rebuilding them. Here every pair is built once
+    and kept for the life of the process.
+    """
+
+    def __init__(self, cache_size: int = TRANSLIT_CACHE_SIZE, cache_max_chars: int = TRANSLIT_CACHE_MAX_CHARS):
+        self.cache_max_chars = cache_max_chars
+        self._maps: Dict[Tuple[str, str], SchemeMap] = {}
+        self._lock = threading.Lock()
+        self._uncached = 0
+        self._memoized = lru_cache(maxsize=cache_size)(self._convert)
+        self._memoized_detected = lru_cache(maxsize=cache_size)(self._convert_detected)
+
+    def warm(self, scripts: Iterable[str] = PRECOMPILED_SCRIPTS) -> None:
+        scripts = [s for s in scripts if s in SCHEMES]
+        for source in scripts:
+            for target in scripts:
+                if source != target:
+                    self.scheme_map(source, target)
+
+    def scheme_map(self, source: str, target: str) -> SchemeMap:
+        key = (source, target)
+        scheme_map = self._maps.get(key)
+        if scheme_map is None:
+            with self._lock:
+                scheme_map = self._maps.get(key)
+                if scheme_map is None:
+                    require_scripts(source, target)
+                    scheme_map = SchemeMap(SCHEMES[source], SCHEMES[target])
+                    self._maps[key] = scheme_map
+        return scheme_map
+
+    def _convert(self, text: str, source: str, target: str) -> str:
+        return sanscript.transliterate(text, scheme_map=self.scheme_map(source, target))
+
+    def transliterate(self, text: str, source: str, target: str) -> str:
+        """Convert ``text`` between two scheme names; unknown names raise UnsupportedScriptError."""
+        if source == target or not text:
+            return text
+        if len(text) <= self.cache_max_chars:
+            return self._memoized(text, source, target)
+        self._uncached += 1
+        return self._convert(text, source, target)
+
+    def _convert_detected(self, text: str, target: str) -> Tuple[str, Optional[str]]:
+        detected = split_scripts(text)
+        converted = "".join(
+            run if script in (None, LATIN) else self.transliterate(run, script, target)
+            for script, run in detected.runs
+        )
+        return converted, detected.script
+
+    def transliterate_detected(self, text: str, target: str) -> Tuple[str, Optional[str]]:
+        """Convert ``text`` of unknown source script; returns the result and the main script detected.
+
+        Mixed text is converted run by run, each from the script it is written in.
+        Latin runs are kept as written: unnamed, they are far more often English
+        than romanized Indic text, which is converted when its scheme is given.
+        All-Latin text is still reported as Latin rather than as the default script.
+        """
+        if len(text) <= self.cache_max_chars:
+            return self._memoized_detected(text, target)
+        return self._convert_detected(text, target)
+
+    async def _run(self, fn: Callable, text: str, *args):
+        # Short texts are mostly memo hits; long documents would hold up the event loop
+        if len(text) <= self.cache_max_chars:
+            return fn(text, *args)
+        return await run_in_threadpool(fn, text, *args)
+
+    async def convert(self, text: str, source: Optional[str], target: str) -> Conversion:
+        """Transliterate for a request, detecting the source script run by run when ``source`` is None.
+
+        Scripts are normalized names; this is the path every router takes.
+        """
+        require_scripts(source, target)
+        if source:
+            return Conversion(await self._run(self.transliterate, text, source, target), source)
+        converted, detected = await self._run(self.transliterate_detected, text, target)
+        return Conversion(converted, detected or DEFAULT_SOURCE_SCRIPT, detected)
+
+    def transliterate_all(self, texts: List[str], source: str, targets: List[str]) -> List[List[str]]:
+        return [[self.transliterate(text, source, target) for target in targets] for text in texts]
+
+    async def convert_batch(self, texts: List[str], source: str, targets: List[str]) -> List[List[str]]:
+        """Every text in every target script: ``result[i][j]`` is ``texts[i]`` in ``targets[j]``."""
+        require_scripts(source, *targets)
+        # Up to MAX_BATCH_TEXTS x MAX_BATCH_TARGET_SCRIPTS conversions, too many to run on the event loop
+        return await run_in_threadpool(self.transliterate_all, texts, source, targets)
+
+    def stats(self) -> Dict[str, int]:
+        info = self._memoized.cache_info()
+        detected = self._memoized_detected.cache_info()
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "entries": info.currsize,
+            "max_entries": info.maxsize,
+            "uncached": self._uncached,
+            "scheme_maps": len(self._maps),
+            "detected_hits": detected.hits,
+            "detected_misses": detected.misses,
+        }
+
+    def clear(self) -> None:
+        self._memoized.cache_clear()
+        self._memoized_detected.cache_clear()
+
+
+engine = TransliterationEngine()
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, BinaryIO, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from services.blob_store import CHUNK_SIZE, get_blob_store
+
+
+# Largest photo or image accepted by the upload endpoints.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# Room for the other form fields and multipart framing around the file.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+# Where uploads handed to OCR workers are copied; the system temp dir by default.
+UPLOAD_TMP_DIR = os.getenv("UPLOAD_TMP_DIR") or None
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload is bigger than MAX_UPLOAD_BYTES."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the limit of {max_bytes} bytes")
+        self.max_bytes = max_bytes
+
+
+class LimitedReader:
+    """File wrapper that raises UploadTooLargeError once more than ``max_bytes`` were read."""
+
+    def __init__(self, f: BinaryIO, max_bytes: int):
+        self._f = f
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._f.read(size)
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.max_bytes:
+            raise UploadTooLargeError(self.max_bytes)
+        return chunk
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        position = self._f.seek(offset, whence)
+        self.bytes_read = position
+        return position
+
+
+async def store_upload(
+    upload: UploadFile, content_type: Optional[str] = None, max_bytes: int = MAX_UPLOAD_BYTES
+) -> Tuple[str, int]:
+    """Copy an upload into the blob store chunk by chunk; returns ``(key, size)``.
+
+    Starlette has already spooled the part to a temporary file, so this never
+    holds more than a chunk of it in memory.
+    """
+    await upload.seek(0)
+    return await run_in_threadpool(get_blob_store().put_file, LimitedReader(upload.file, max_bytes), content_type)
+
+
+@dataclass(frozen=True)
+class SavedUpload:
+    path: str
+    digest: str
+    size: int
+
+
+def _save(f: BinaryIO, max_bytes: int) -> SavedUpload:
+    reader = LimitedReader(f, max_bytes)
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(dir=UPLOAD_TMP_DIR, prefix="upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: reader.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return SavedUpload(path, digest.hexdigest(), reader.bytes_read)
+
+
+@asynccontextmanager
+async def saved_upload(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> AsyncIterator[SavedUpload]:
+    """The upload as a named file with its SHA-256, removed on exit.
+
+    OCR workers are separate processes: they open the path themselves
+    instead of receiving a pickled copy of the image bytes.
+    """
+    await upload.seek(0)
+    saved = await run_in_threadpool(_save, upload.file, max_bytes)
+    try:
+        yield saved
+    finally:
+        os.unlink(saved.path)
+
+
+class UploadLimitMiddleware:
+    """Rejects multipart bodies over the upload limit with 413 before they are parsed.
+
+    A declared Content-Length is checked up front; chunked bodies are
+    counted as they arrive and cut off once they pass the limit.
+    """
+
+    def __init__(self, app, max_upload_bytes: int = MAX_UPLOAD_BYTES):
+        self.app = app
+        self.max_upload_bytes = max_upload_bytes
+        self.max_bytes = max_upload_bytes + MULTIPART_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            return await self.app(scope, receive, send)
+
+        length = headers.get("content-length", "")
+        if length.isdigit() and int(length) > self.max_bytes:
+            return await self._reject(send)
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Looks like a client disconnect to the app, which stops parsing
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded and not response_started:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not response_started:
+            await self._reject(send)
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": str(UploadTooLargeError(self.max_upload_bytes))}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
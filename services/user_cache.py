@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.engine import make_url
+
+from db import DATABASE_URL
+
+
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "30"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+
+
+def _default_stamp_path() -> str:
+    """Beside the SQLite database file, else in the app directory.
+
+    Every process opening the same database file then agrees on the stamp,
+    and servers for different databases do not invalidate each other.
+    """
+    url = make_url(DATABASE_URL)
+    if url.get_backend_name() == "sqlite" and url.database and url.database != ":memory:":
+        return f"{os.path.abspath(url.database)}-auth-stamp"
+    return str(Path(__file__).resolve().parent.parent / ".auth_cache_stamp")
+
+
+# Touched whenever a user is deleted or changed, so every server process drops
+# its cached users, including changes made by create_users.py.
+AUTH_USER_CACHE_STAMP = os.path.abspath(os.getenv("AUTH_USER_CACHE_STAMP") or _default_stamp_path())
+
+
+class UserCache:
+    """Short-lived cache of user rows by id, so authenticated requests skip the users lookup.
+
+    Stores plain column values rather than ORM instances, which belong to the
+    session that loaded them. A deleted or changed user is dropped at once in
+    this process and, via the stamp file, within one request in the others;
+    ``ttl`` bounds staleness for changes made any other way.
+    """
+
+    def __init__(
+        self,
+        ttl: float = AUTH_USER_CACHE_TTL_SECONDS,
+        max_entries: int = AUTH_USER_CACHE_SIZE,
+        stamp_path: str = AUTH_USER_CACHE_STAMP,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stamp_path = Path(stamp_path)
+        self._entries: "OrderedDict[int, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stamp = self._read_stamp()
+        self.counters: Dict[str, int] = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _read_stamp(self) -> int:
+        try:
+            return self.stamp_path.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    def _check_stamp(self) -> None:
+        stamp = self._read_stamp()
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self._entries.clear()
+            self.counters["invalidations"] += 1
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            self._check_stamp()
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] < time.monotonic():
+                self._entries.pop(user_id, None)
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.counters["hits"] += 1
+            return entry[0]
+
+    def put(self, user_id: int, values: Dict[str, Any]) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (values, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Forget one user (or everyone) here and tell other processes to do the same."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+        try:
+            self.stamp_path.touch()
+        except OSError:
+            return
+        with self._lock:
+            # Our own entries are already up to date; only other processes need to clear.
+            self._stamp = self._read_stamp()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "entries": len(self._entries), "ttl_seconds": self.ttl}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Note, User, UserStatKey, UserStats
+
+
+# Notes within the same geohash cell of this length count as one location (about 1.2 km x 0.6 km).
+LOCATION_PRECISION = 6
+
+# (user_id, created_at, script) keys this process knows are stored, so reading a
+# script again skips the database. created_at tells a user apart from a later one
+# given the same id after a deletion this process never heard about. Forgetting a
+# key only costs an INSERT that finds its row.
+USER_STATS_SEEN_SIZE = int(os.getenv("USER_STATS_SEEN_SIZE", "100000"))
+_seen_scripts: "OrderedDict[Tuple[int, datetime, str], None]" = OrderedDict()
+
+MILESTONES = (
+    ("Scripts Read", "scripts_read"),
+    ("Locations Visited", "locations_visited"),
+    ("Notes Written", "notes_written"),
+    ("Photos Captured", "photos_captured"),
+)
+
+
+async def _insert_ignore(db: AsyncSession, model, **values):
+    """INSERT that silently skips rows whose primary key already exists."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = postgresql_insert(model).values(**values).on_conflict_do_nothing()
+    else:
+        statement = sqlite_insert(model).values(**values).on_conflict_do_nothing()
+    return await db.execute(statement)
+
+
+async def _increment(db: AsyncSession, user_id: int, counts: Dict[str, int]) -> None:
+    """Add to counters with a single UPDATE so concurrent events never lose increments."""
+    counts = {name: n for name, n in counts.items() if n}
+    if not counts:
+        return
+    await _insert_ignore(db, UserStats, user_id=user_id)
+    await db.execute(
+        update(UserStats)
+        .where(UserStats.user_id == user_id)
+        .values({name: getattr(UserStats, name) + n for name, n in counts.items()})
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _new_keys(db: AsyncSession, user_id: int, kind: str, values: Iterable[str]) -> int:
+    """Remember ``values`` for a distinct counter and return how many were not seen before."""
+    added = 0
+    for value in set(values):
+        result = await _insert_ignore(db, UserStatKey, user_id=user_id, kind=kind, value=value)
+        added += result.rowcount
+    return added
+
+
+async def record_note(db: AsyncSession, note: Note) -> None:
+    """Count a new note. Call before committing the session that adds it."""
+    counts = {"notes_written": 1, "photos_captured": 1 if note.has_photo else 0}
+    if note.geohash:
+        counts["locations_visited"] = await _new_keys(
+            db, note.user_id, "location", [note.geohash[:LOCATION_PRECISION]]
+        )
+    await _increment(db, note.user_id, counts)
+
+
+def unrecorded_scripts(user: User, source_scripts: Iterable[str]) -> List[str]:
+    """The scripts not yet known to be counted for a user; no database access.
+
+    Users built from token claims alone have no created_at and are never remembered.
+    """
+    new = []
+    for script in set(source_scripts):
+        key = (user.id, user.created_at, script)
+        if user.created_at is not None and key in _seen_scripts:
+            _seen_scripts.move_to_end(key)
+        else:
+            new.append(script)
+    return new
+
+
+def scripts_recorded(user: User, source_scripts: Iterable[str]) -> None:
+    """Remember scripts whose counting has been committed."""
+    if user.created_at is None:
+        return
+    for script in source_scripts:
+        key = (user.id, user.created_at, script)
+        _seen_scripts[key] = None
+        _seen_scripts.move_to_end(key)
+    while len(_seen_scripts) > USER_STATS_SEEN_SIZE:
+        _seen_scripts.popitem(last=False)
+
+
+def forget_recorded_scripts(user_id: Optional[int] = None) -> None:
+    """Drop remembered scripts of a deleted user, or of everyone."""
+    if user_id is None:
+        _seen_scripts.clear()
+        return
+    for key in [key for key in _seen_scripts if key[0] == user_id]:
+        del _seen_scripts[key]
+
+
+async def record_transliteration(db: AsyncSession, user_id: int, source_scripts: Iterable[str]) -> None:
+    """Count the scripts a user has read text from; ones already counted find their row and add nothing."""
+    added = await _new_keys(db, user_id, "script", source_scripts)
+    await _increment(db, user_id, {"scripts_read": added})
+
+
+async def get_milestones(db: AsyncSession, user_id: int) -> Dict[str, int]:
+    stats = await db.get(UserStats, user_id)
+    return {label: getattr(stats, name) if stats else 0 for label, name in MILESTONES}
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import AsyncSessionLocal
+
+
+# Route note inserts through one writer task that group-commits them.
+WRITE_QUEUE = os.getenv("WRITE_QUEUE", "0") == "1"
+WRITE_QUEUE_MAX_BATCH = int(os.getenv("WRITE_QUEUE_MAX_BATCH", "64"))
+# How long the writer waits for more writes before committing a batch that is not full.
+WRITE_QUEUE_LINGER_MS = float(os.getenv("WRITE_QUEUE_LINGER_MS", "0"))
+
+logger = logging.getLogger(__name__)
+
+WriteFn = Callable[[AsyncSession], Awaitable[Any]]
+
+
+class WriteQueue:
+    """Serializes database writes through a single task and commits them in groups.
+
+    SQLite allows one writer at a time, so concurrent request transactions only
+    queue up on the database lock, each paying for its own commit. Here every
+    write is a callable that adds its rows to the writer's session; the writer
+    runs everything queued so far in one transaction and commits once.
+
+    If a batch fails, its writes are retried one transaction each, so only the
+    write that actually fails sees the error.
+    """
+
+    def __init__(self, max_batch: int = WRITE_QUEUE_MAX_BATCH, linger: float = WRITE_QUEUE_LINGER_MS / 1000):
+        self.max_batch = max_batch
+        self.linger = linger
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.counters: Dict[str, int] = {"writes": 0, "commits": 0, "retried": 0, "failed": 0}
+
+    def _ensure_running(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def submit(self, fn: WriteFn) -> Any:
+        """Run ``fn(session)`` in the writer's next transaction and return its result once committed.
+
+        ``fn`` may run twice (in a failed group, then alone), so it must build
+        its rows each time it is called rather than reuse ORM objects.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._ensure_running().put((fn, future))
+        return await future
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            batch = [await queue.get()]
+            if self.linger:
+                await asyncio.sleep(self.linger)
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await self._commit_batch(batch)
+            except Exception:  # pragma: no cover - _commit_batch resolves every future itself
+                logger.exception("Write queue batch failed")
+
+    async def _commit_batch(self, batch: List[Tuple[WriteFn, asyncio.Future]]) -> None:
+        batch = [(fn, future) for fn, future in batch if not future.cancelled()]
+        if not batch:
+            return
+        async with AsyncSessionLocal() as session:
+            try:
+                results = []
+                for fn, _ in batch:
+                    results.append(await fn(session))
+                    # Flush per write so a failing one surfaces before the commit
+                    await session.flush()
+                await session.commit()
+                error = None
+            except Exception as e:
+                await session.rollback()
+                error = e
+        self.counters["writes"] += len(batch)
+        if error is None:
+            self.counters["commits"] += 1
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            return
+        if len(batch) == 1:
+            self.counters["failed"] += 1
+            if not batch[0][1].done():
+                batch[0][1].set_exception(error)
+            return
+
+        self.counters["retried"] += len(batch)
+        for fn, future in batch:
+            async with AsyncSessionLocal() as session:
+                try:
+                    result = await fn(session)
+                    await session.commit()
+                except Exception as e:
+                    await session.rollback()
+                    self.counters["failed"] += 1
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+            self.counters["commits"] += 1
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "enabled": WRITE_QUEUE,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+
+write_queue = WriteQueue()
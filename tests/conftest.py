@@ -0,0 +1,40 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# Settings are read when modules are imported, so point them away from the
+# working copy's database, blobs and stamp file before any test imports the app.
+_workdir = tempfile.mkdtemp(prefix="notes-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_workdir}/app.db")
+os.environ.setdefault("BLOB_STORE_ROOT", os.path.join(_workdir, "blobs"))
+os.environ.setdefault("AUTH_USER_CACHE_STAMP", os.path.join(_workdir, ".auth_cache_stamp"))
+# The cheapest bcrypt cost, so registering test users is fast
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Headers for a newly registered user."""
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    response = client.post("/auth/register", json={"email": email, "password": "password123"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def user_id(auth_headers):
+    from jose import jwt
+
+    return int(jwt.get_unverified_claims(auth_headers["Authorization"].split()[1])["sub"])
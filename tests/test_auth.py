@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import uuid
+from datetime import timedelta
+
+import bcrypt
+from sqlalchemy import select
+
+import utils
+from db import SessionLocal
+from models import User
+from utils import create_access_token, get_optional_user, hash_password_async, password_needs_rehash
+
+
+def optional_user(token):
+    # Tokens that fail to decode are rejected before the database is touched
+    return asyncio.run(get_optional_user(db=None, token=token))
+
+
+def test_no_token_is_anonymous():
+    assert optional_user(None) is None
+
+
+def test_invalid_token_is_anonymous():
+    assert optional_user("not-a-token") is None
+
+
+def test_expired_token_is_anonymous():
+    token = create_access_token({"sub": "1"}, expires_delta=timedelta(minutes=-5))
+    assert optional_user(token) is None
+
+
+def test_token_without_subject_is_anonymous():
+    assert optional_user(create_access_token({"email": "a@example.com"})) is None
+
+
+def rounds(password_hash):
+    return int(password_hash.split("$")[2])
+
+
+def test_hashing_runs_off_the_event_loop_at_the_configured_cost(monkeypatch):
+    thread_names = []
+    hash_password = utils.hash_password
+
+    def recording_hash_password(plain):
+        thread_names.append(threading.current_thread().name)
+        return hash_password(plain)
+
+    monkeypatch.setattr(utils, "hash_password", recording_hash_password)
+    password_hash = asyncio.run(hash_password_async("secret"))
+    assert rounds(password_hash) == utils.BCRYPT_ROUNDS
+    assert thread_names[0].startswith("password-hash")
+    assert not password_needs_rehash(password_hash)
+
+
+def test_login_upgrades_a_hash_made_with_another_cost(client):
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    old_hash = bcrypt.hashpw(b"password123", bcrypt.gensalt(rounds=utils.BCRYPT_ROUNDS + 1)).decode()
+    with SessionLocal() as db:
+        db.add(User(email=email, password_hash=old_hash))
+        db.commit()
+
+    assert client.post("/auth/login", data={"username": email, "password": "wrong"}).status_code == 401
+    with SessionLocal() as db:
+        assert db.scalar(select(User.password_hash).where(User.email == email)) == old_hash
+
+    assert client.post("/auth/login", data={"username": email, "password": "password123"}).status_code == 200
+    with SessionLocal() as db:
+        new_hash = db.scalar(select(User.password_hash).where(User.email == email))
+    assert rounds(new_hash) == utils.BCRYPT_ROUNDS
+    assert bcrypt.checkpw(b"password123", new_hash.encode())
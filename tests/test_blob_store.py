@@ -0,0 +1,77 @@
+import hashlib
+import io
+
+import pytest
+
+from services.blob_store import LocalBlobStore, S3BlobStore, shard_path
+
+
+class MemoryS3:
+    """The four boto3 S3 client calls S3BlobStore uses, over a dict."""
+
+    def __init__(self):
+        self.objects = {}
+        self.puts = 0
+
+    def put_object(self, Bucket, Key, Body, **extra):
+        self.puts += 1
+        self.objects[Key] = Body if isinstance(Body, bytes) else Body.read()
+
+    def get_object(self, Bucket, Key, Range=None):
+        data = self.objects[Key]
+        if Range:
+            start, end = Range[len("bytes="):].split("-")
+            data = data[int(start):int(end) + 1 if end else None]
+        return {"Body": io.BytesIO(data)}
+
+    def head_object(self, Bucket, Key):
+        self.objects[Key]
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop(Key, None)
+
+
+@pytest.fixture(params=["local", "s3"])
+def store(request, tmp_path):
+    if request.param == "local":
+        return LocalBlobStore(str(tmp_path))
+    return S3BlobStore(MemoryS3(), "bucket")
+
+
+def test_blobs_are_addressed_by_their_hash(store):
+    key = store.put(b"photo")
+    assert key == hashlib.sha256(b"photo").hexdigest()
+    assert store.exists(key) and store.get(key) == b"photo"
+    assert store.put_file(io.BytesIO(b"photo")) == (key, 5)
+
+
+def test_ranges_are_streamed(store):
+    key = store.put(bytes(range(200)))
+    assert b"".join(store.stream(key, chunk_size=16)) == bytes(range(200))
+    assert b"".join(store.stream(key, chunk_size=16, start=10, end=99)) == bytes(range(10, 100))
+
+
+def test_deleted_blobs_are_gone(store):
+    key = store.put(b"photo")
+    store.delete(key)
+    assert not store.exists(key)
+    with pytest.raises(KeyError):
+        store.open(key)
+    store.delete(key)
+
+
+def test_local_blobs_are_sharded_and_stored_once(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    key = store.put(b"photo")
+    store.put_file(io.BytesIO(b"photo"))
+    assert shard_path(key) == f"{key[:2]}/{key[2:4]}/{key}"
+    assert [p.name for p in tmp_path.rglob("*") if p.is_file()] == [key]
+
+
+def test_s3_uploads_each_object_once():
+    client = MemoryS3()
+    store = S3BlobStore(client, "bucket", prefix="blobs/")
+    key = store.put(b"photo")
+    store.put_file(io.BytesIO(b"photo"))
+    assert client.puts == 1
+    assert list(client.objects) == ["blobs/" + shard_path(key)]
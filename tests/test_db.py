@@ -0,0 +1,57 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import db
+from db import async_url, engine_options, get_db
+
+
+def test_async_url_picks_the_async_driver():
+    assert async_url("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+    assert async_url("postgresql://u:p@host/app") == "postgresql+asyncpg://u:p@host/app"
+    assert async_url("postgres://u:p@host/app") == "postgresql+asyncpg://u:p@host/app"
+    assert async_url("mysql+aiomysql://host/app") == "mysql+aiomysql://host/app"
+
+
+def test_pool_settings_apply_except_to_in_memory_sqlite():
+    assert engine_options("sqlite://") == {"connect_args": {"check_same_thread": False}}
+    options = engine_options("postgresql+asyncpg://host/app")
+    assert "connect_args" not in options
+    assert (options["pool_size"], options["max_overflow"]) == (db.DB_POOL_SIZE, db.DB_MAX_OVERFLOW)
+    assert engine_options("sqlite:///./app.db")["pool_recycle"] == db.DB_POOL_RECYCLE
+
+
+def test_get_db_yields_an_async_session(client):
+    async def query():
+        sessions = get_db()
+        session = await sessions.__anext__()
+        assert isinstance(session, AsyncSession)
+        result = await session.scalar(text("SELECT 1"))
+        await sessions.aclose()
+        return result
+
+    assert asyncio.run(query()) == 1
+
+
+def test_concurrent_requests_share_the_pool(client, auth_headers):
+    async def list_notes_concurrently():
+        import httpx
+
+        import main
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            responses = await asyncio.gather(*[
+                http.get("/notes/", headers=auth_headers) for _ in range(db.DB_POOL_SIZE + db.DB_MAX_OVERFLOW + 5)
+            ])
+        return [response.status_code for response in responses]
+
+    assert set(asyncio.run(list_notes_concurrently())) == {200}
+
+
+
+def test_sqlite_performance_profile_is_applied(client):
+    with db.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == db.SQLITE_BUSY_TIMEOUT_MS
@@ -0,0 +1,142 @@
+import random
+
+import numpy as np
+import pytest
+
+from services.geo import (
+    bbox_around,
+    geohash_cover,
+    geohash_encode,
+    haversine_km,
+    in_bbox,
+)
+
+
+def random_points(rng: random.Random, count: int = 4000):
+    # Uniform over lat/lon rather than area, so the poles get their share of points
+    lats = np.array([rng.uniform(-90.0, 90.0) for _ in range(count)])
+    lons = np.array([rng.uniform(-180.0, 180.0) for _ in range(count)])
+    return lats, lons
+
+
+def points_near(rng: random.Random, bbox, count: int = 2000):
+    """Points concentrated on and around a box, where a bad cover would miss them."""
+    min_lat, min_lon, max_lat, max_lon = bbox
+    if max_lon < min_lon:
+        max_lon += 360.0
+    pad_lat, pad_lon = (max_lat - min_lat) * 0.1 + 1e-6, (max_lon - min_lon) * 0.1 + 1e-6
+    lats = np.clip([rng.uniform(min_lat - pad_lat, max_lat + pad_lat) for _ in range(count)], -90.0, 90.0)
+    lons = np.array([rng.uniform(min_lon - pad_lon, max_lon + pad_lon) for _ in range(count)])
+    return lats, (lons + 180.0) % 360.0 - 180.0
+
+
+def uncovered(bbox, lats, lons):
+    """Points the brute-force check puts inside ``bbox`` that no cover prefix matches."""
+    prefixes = tuple(geohash_cover(bbox))
+    inside = in_bbox(lats, lons, bbox)
+    return [
+        (lat, lon)
+        for lat, lon in zip(lats[inside], lons[inside])
+        if not geohash_encode(lat, lon).startswith(prefixes)
+    ]
+
+
+BOXES = [
+    (28.60, 77.20, 28.62, 77.23),  # a few city blocks
+    (8.0, 68.0, 37.0, 97.0),  # most of India
+    (-10.0, 170.0, 10.0, -170.0),  # across the antimeridian
+    (-5.0, 175.0, 5.0, 185.0),  # across the antimeridian, unwrapped
+    (80.0, -180.0, 90.0, 180.0),  # around the north pole
+    (-90.0, -30.0, -85.0, 30.0),  # at the south pole
+    (-90.0, -180.0, 90.0, 180.0),  # the whole world
+    (0.0, 0.0, 0.0, 0.0),  # a single point on cell boundaries
+]
+
+
+@pytest.mark.parametrize("bbox", BOXES)
+def test_cover_contains_every_point_in_box(bbox):
+    rng = random.Random(repr(bbox))
+    for lats, lons in (random_points(rng), points_near(rng, bbox)):
+        assert uncovered(bbox, lats, lons) == []
+
+
+def test_cover_contains_random_boxes():
+    rng = random.Random(10)
+    for _ in range(200):
+        min_lat = rng.uniform(-90.0, 90.0)
+        max_lat = min(90.0, min_lat + rng.choice([1e-4, 0.01, 1.0, 30.0]) * rng.random())
+        min_lon = rng.uniform(-180.0, 180.0)
+        max_lon = min_lon + rng.choice([1e-4, 0.01, 1.0, 90.0]) * rng.random()
+        bbox = (min_lat, min_lon, max_lat, max_lon)
+        lats, lons = points_near(rng, bbox, count=300)
+        assert uncovered(bbox, lats, lons) == [], bbox
+
+
+@pytest.mark.parametrize(
+    "lat, lon, radius_km",
+    [
+        (28.6139, 77.2090, 2.0),
+        (28.6139, 77.2090, 500.0),
+        (-16.5, 179.9, 300.0),  # Fiji, across the antimeridian
+        (89.5, 10.0, 100.0),  # reaches the north pole
+        (-78.0, 0.0, 1500.0),
+        (0.0, 0.0, 25000.0),  # more than half way round the earth
+    ],
+)
+def test_radius_query_covers_brute_force(lat, lon, radius_km):
+    rng = random.Random(radius_km)
+    bbox = bbox_around(lat, lon, radius_km)
+    lats, lons = random_points(rng)
+    near_lats, near_lons = points_near(rng, bbox)
+    lats, lons = np.concatenate([lats, near_lats]), np.concatenate([lons, near_lons])
+
+    near = haversine_km(lat, lon, lats, lons) <= radius_km
+    assert near.any()
+    # Every point within the radius is in the box, and so under one of the prefixes
+    assert in_bbox(lats, lons, bbox)[near].all()
+    prefixes = tuple(geohash_cover(bbox))
+    assert all(geohash_encode(a, b).startswith(prefixes) for a, b in zip(lats[near], lons[near]))
+
+
+def test_cover_respects_max_cells():
+    for bbox in BOXES:
+        assert 1 <= len(geohash_cover(bbox, max_cells=32)) <= 32
+
+
+PLACES = {
+    "India Gate": (28.6129, 77.2295),
+    "Red Fort": (28.6562, 77.2410),
+    "Taj Mahal": (27.1751, 78.0421),
+    "Suva": (-18.1248, 178.4501),
+    "Apia": (-13.8333, -171.7500),
+}
+
+
+@pytest.fixture
+def places(client, auth_headers):
+    for name, (lat, lon) in PLACES.items():
+        response = client.post("/notes/add", json={"text": name, "latitude": lat, "longitude": lon}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+    return auth_headers
+
+
+def test_nearby_notes_nearest_first(client, places):
+    response = client.get("/notes/nearby", params={"lat": 28.6139, "lon": 77.2090, "radius_km": 10}, headers=places)
+    assert response.status_code == 200, response.text
+    nearby = response.json()
+    assert [note["text"] for note in nearby] == ["India Gate", "Red Fort"]
+    assert nearby[0]["distance_km"] < nearby[1]["distance_km"] <= 10
+
+
+def test_notes_within_a_box(client, places):
+    box = {"min_lat": 27, "min_lon": 77, "max_lat": 29, "max_lon": 78.1}
+    response = client.get("/notes/within", params=box, headers=places)
+    assert {note["text"] for note in response.json()} == {"India Gate", "Red Fort", "Taj Mahal"}
+
+
+def test_notes_within_a_box_across_the_antimeridian(client, places):
+    box = {"min_lat": -20, "min_lon": 178, "max_lat": -10, "max_lon": -171}
+    response = client.get("/notes/within", params=box, headers=places)
+    assert {note["text"] for note in response.json()} == {"Suva", "Apia"}
+    box = {"min_lat": 10, "min_lon": 0, "max_lat": -10, "max_lon": 1}
+    assert client.get("/notes/within", params=box, headers=places).status_code == 400
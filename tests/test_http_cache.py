@@ -0,0 +1,144 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from services.http_cache import (
+    RangeNotSatisfiableError,
+    etag_matches,
+    http_date,
+    if_range_allows,
+    not_modified_since,
+    parse_range,
+    strong_etag,
+)
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-99", (0, 99)),
+        ("bytes=500-", (500, 999)),
+        ("bytes=0-0", (0, 0)),
+        ("bytes=999-999", (999, 999)),
+        # An end past the resource is clamped to its last byte
+        ("bytes=900-5000", (900, 999)),
+        ("BYTES = 10 - 20", (10, 20)),
+    ],
+)
+def test_single_range(header, expected):
+    assert parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=-100", (900, 999)),
+        ("bytes=-1", (999, 999)),
+        # A suffix longer than the resource is the whole resource
+        ("bytes=-5000", (0, 999)),
+    ],
+)
+def test_suffix_range(header, expected):
+    assert parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=1000-1001", "bytes=999999-", "bytes=-0"])
+def test_unsatisfiable_range(header):
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range(header, SIZE)
+
+
+def test_any_range_of_empty_resource_is_unsatisfiable():
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range("bytes=0-", 0)
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range("bytes=-10", 0)
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        None,
+        "",
+        # Multiple ranges are answered with the whole resource
+        "bytes=0-99,200-299",
+        "bytes=0-99, -10",
+        # Malformed
+        "bytes=-",
+        "bytes=abc-def",
+        "items=0-99",
+        "bytes 0-99",
+        "bytes=99-0",
+    ],
+)
+def test_ignored_range(header):
+    assert parse_range(header, SIZE) is None
+
+
+ETAG = strong_etag("abc123")
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    [
+        (None, False),
+        ("", False),
+        ("*", True),
+        ('"abc123"', True),
+        # If-None-Match uses weak comparison: a weak tag with the same opaque value matches
+        ('W/"abc123"', True),
+        ('"other", W/"abc123"', True),
+        ('"other" ,"abc123" ', True),
+        ('"other"', False),
+        ('"abc"', False),
+        ("abc123", False),
+    ],
+)
+def test_etag_matches(if_none_match, matches):
+    assert etag_matches(if_none_match, ETAG) is matches
+
+
+def test_weak_current_etag_matches_strong_request():
+    assert etag_matches('"abc123"', 'W/"abc123"')
+
+
+@pytest.mark.parametrize(
+    "if_range, allowed",
+    [
+        (None, True),
+        ("", True),
+        ('"abc123"', True),
+        (' "abc123" ', True),
+        # If-Range needs strong comparison, so a weak tag never allows a partial response
+        ('W/"abc123"', False),
+        ('"other"', False),
+        # Dates are not used as validators: send the whole resource
+        ("Wed, 21 Oct 2015 07:28:00 GMT", False),
+    ],
+)
+def test_if_range_allows(if_range, allowed):
+    assert if_range_allows(if_range, ETAG) is allowed
+
+
+MODIFIED = datetime(2024, 5, 1, 12, 0, 0, 500000)
+
+
+@pytest.mark.parametrize(
+    "header, not_modified",
+    [
+        (None, False),
+        ("not a date", False),
+        ("Wed, 01 May 2024 12:00:00 GMT", True),
+        ("Wed, 01 May 2024 11:59:59 GMT", False),
+        ("Thu, 02 May 2024 00:00:00 GMT", True),
+    ],
+)
+def test_not_modified_since(header, not_modified):
+    assert not_modified_since(header, MODIFIED) is not_modified
+
+
+def test_http_date_is_gmt():
+    assert http_date(MODIFIED) == "Wed, 01 May 2024 12:00:00 GMT"
+    assert http_date(MODIFIED.replace(tzinfo=timezone.utc)) == "Wed, 01 May 2024 12:00:00 GMT"
@@ -0,0 +1,66 @@
+import difflib
+import io
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+from services.image_preprocess import PRESETS, get_preset, load_for_ocr
+from services.ocr_backends import get_backend
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SIGNBOARD = FIXTURES / "signboard_sideways.jpg"
+
+
+def similarity(expected, actual):
+    normalize = lambda s: " ".join(s.split()).lower()
+    return difflib.SequenceMatcher(None, normalize(expected), normalize(actual)).ratio()
+
+
+@pytest.fixture(scope="module")
+def backend():
+    backend = get_backend()
+    try:
+        backend.image_to_string(Image.new("L", (32, 32), 255), "eng")
+    except Exception as e:
+        pytest.skip(f"no OCR engine available: {e}")
+    return backend
+
+
+def test_auto_preset_applies_exif_rotation_and_grayscale():
+    image = load_for_ocr(SIGNBOARD.read_bytes(), PRESETS["auto"])
+    assert image.mode == "L"
+    assert image.width > image.height
+    assert load_for_ocr(SIGNBOARD.read_bytes(), PRESETS["none"]).size == (1200, 1600)
+
+
+def test_large_photos_are_downscaled():
+    image = io.BytesIO()
+    Image.new("RGB", (4000, 3000), "white").save(image, "JPEG")
+    assert max(load_for_ocr(image.getvalue(), PRESETS["auto"]).size) == 2000
+
+
+def test_binarize_leaves_only_black_and_white():
+    image = load_for_ocr(SIGNBOARD.read_bytes(), PRESETS["binarize"])
+    assert {level for level, count in enumerate(image.histogram()) if count} == {0, 255}
+
+
+def test_full_preset_crops_to_the_text():
+    auto = load_for_ocr(SIGNBOARD.read_bytes(), PRESETS["auto"])
+    full = load_for_ocr(SIGNBOARD.read_bytes(), PRESETS["full"])
+    assert full.width < auto.width and full.height < auto.height
+
+
+def test_unknown_preset_is_rejected():
+    assert get_preset(" Binarize ") is PRESETS["binarize"]
+    with pytest.raises(ValueError):
+        get_preset("sharpen")
+
+
+def test_auto_preset_reads_at_least_as_well_as_none(backend):
+    expected = SIGNBOARD.with_suffix(".txt").read_text(encoding="utf-8")
+    scores = {
+        name: similarity(expected, backend.image_to_string(load_for_ocr(SIGNBOARD.read_bytes(), PRESETS[name]), "eng"))
+        for name in ("none", "auto")
+    }
+    assert scores["auto"] >= scores["none"]
@@ -0,0 +1,107 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from db import Base
+from migrations import runner
+from migrations.runner import SchemaOutOfDateError, current_version, ensure_schema, upgrade
+from migrations.versions import HEAD, MIGRATIONS
+from services.blob_store import get_blob_store
+from services.geo import geohash_encode
+
+# The schema as it was before versioning: photos stored inline in notes.photo_data
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    id INTEGER NOT NULL PRIMARY KEY, email VARCHAR NOT NULL,
+    password_hash VARCHAR NOT NULL, created_at DATETIME NOT NULL
+);
+CREATE UNIQUE INDEX ix_users_email ON users (email);
+CREATE INDEX ix_users_id ON users (id);
+CREATE TABLE notes (
+    id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER NOT NULL,
+    latitude FLOAT NOT NULL, longitude FLOAT NOT NULL, text VARCHAR NOT NULL, created_at DATETIME NOT NULL,
+    photo_data BLOB, photo_filename VARCHAR(255), photo_content_type VARCHAR(100),
+    FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+CREATE INDEX ix_notes_id ON notes (id);
+CREATE INDEX ix_notes_user_id ON notes (user_id);
+"""
+
+PHOTO = b"\x89PNG baseline photo"
+
+
+@pytest.fixture
+def baseline_db(tmp_path):
+    path = tmp_path / "baseline.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO users VALUES (1, 'a@example.com', 'hash', '2024-01-01 00:00:00')")
+    notes = [
+        (28.6139, 77.2090, "Delhi", PHOTO),
+        (28.6140, 77.2091, "Delhi again", None),
+        (19.0760, 72.8777, "Mumbai", None),
+    ]
+    conn.executemany(
+        "INSERT INTO notes (user_id, latitude, longitude, text, created_at, photo_data) "
+        "VALUES (1, ?, ?, ?, '2024-01-01 00:00:00', ?)",
+        notes,
+    )
+    conn.commit()
+    conn.close()
+    engine = create_engine(f"sqlite:///{path}")
+    yield engine
+    engine.dispose()
+
+
+def test_baseline_database_upgrades_to_head(baseline_db):
+    assert current_version(baseline_db) is None
+
+    applied = upgrade(baseline_db)
+
+    assert [m.version for m in applied] == [m.version for m in MIGRATIONS]
+    assert current_version(baseline_db) == HEAD
+    schema = inspect(baseline_db)
+    for table in Base.metadata.sorted_tables:
+        assert {c.name for c in table.columns} <= {c["name"] for c in schema.get_columns(table.name)}, table.name
+    assert "photo_data" not in {c["name"] for c in schema.get_columns("notes")}
+
+
+def test_upgrade_moves_data_forward(baseline_db):
+    upgrade(baseline_db)
+
+    with baseline_db.connect() as conn:
+        notes = conn.execute(
+            text("SELECT latitude, longitude, geohash, has_photo, photo_key, photo_size FROM notes ORDER BY id")
+        ).all()
+        stats = conn.execute(
+            text("SELECT notes_written, photos_captured, locations_visited, scripts_read FROM user_stats")
+        ).one()
+
+    for latitude, longitude, geohash, _, _, _ in notes:
+        assert geohash == geohash_encode(latitude, longitude)
+    assert [bool(note.has_photo) for note in notes] == [True, False, False]
+    assert notes[0].photo_size == len(PHOTO)
+    assert get_blob_store().get(notes[0].photo_key) == PHOTO
+    # Both Delhi notes fall in one location cell
+    assert tuple(stats) == (3, 1, 2, 0)
+
+
+def test_upgrade_is_idempotent(baseline_db):
+    upgrade(baseline_db)
+    assert upgrade(baseline_db) == []
+    assert current_version(baseline_db) == HEAD
+
+
+def test_empty_database_is_created_at_head(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'empty.db'}")
+    assert len(upgrade(engine)) == len(MIGRATIONS)
+    assert current_version(engine) == HEAD
+    engine.dispose()
+
+
+def test_out_of_date_schema_refused_without_auto_migrate(baseline_db, monkeypatch):
+    monkeypatch.setattr(runner, "DB_AUTO_MIGRATE", False)
+    with pytest.raises(SchemaOutOfDateError):
+        ensure_schema(baseline_db)
+    assert current_version(baseline_db) is None
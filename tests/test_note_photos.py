@@ -0,0 +1,122 @@
+import hashlib
+import io
+
+import pytest
+from PIL import Image
+
+from db import SessionLocal
+from models import Note, PhotoDerivative
+from services.photo_derivatives import derivative_filename, render_derivatives
+
+
+def jpeg(width=1200, height=900):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+@pytest.fixture
+def photo_note(client, auth_headers):
+    photo = jpeg()
+    response = client.post(
+        "/notes/add-with-photo",
+        data={"text": "Red Fort", "latitude": "28.656", "longitude": "77.241"},
+        files={"photo": ("fort.jpg", photo, "image/jpeg")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200, response.text
+    return response.json(), photo
+
+
+def test_photo_is_kept_in_the_blob_store(client, auth_headers, photo_note):
+    note, photo = photo_note
+    assert (note["has_photo"], note["photo_size"], note["photo_filename"]) == (True, len(photo), "fort.jpg")
+    with SessionLocal() as db:
+        assert db.get(Note, note["id"]).photo_key == hashlib.sha256(photo).hexdigest()
+    response = client.get(f"/notes/{note['id']}/photo", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.content == photo
+    assert response.headers["content-type"] == "image/jpeg"
+
+
+def test_photo_must_be_an_image(client, auth_headers):
+    response = client.post(
+        "/notes/add-with-photo",
+        data={"text": "x", "latitude": "0", "longitude": "0"},
+        files={"photo": ("notes.txt", b"hello", "text/plain")},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_other_users_photos_are_not_found(client, auth_headers, photo_note):
+    note, _ = photo_note
+    other = client.post("/auth/register", json={"email": f"other-{note['id']}@example.com", "password": "password123"})
+    headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+    assert client.get(f"/notes/{note['id']}/photo", headers=headers).status_code == 404
+
+
+@pytest.fixture
+def statements():
+    from sqlalchemy import event
+
+    from db import async_engine
+
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def test_listing_reads_photo_metadata_but_not_the_photo(client, auth_headers, photo_note, statements):
+    note, photo = photo_note
+    listed = client.get("/notes/", headers=auth_headers).json()
+    assert [(n["id"], n["has_photo"], n["photo_size"]) for n in listed] == [(note["id"], True, len(photo))]
+    [select_notes] = [s for s in statements if "FROM notes" in s]
+    assert "photo_key" not in select_notes
+
+
+def test_derivatives_are_made_after_upload_and_served_by_size(client, auth_headers, photo_note):
+    note, photo = photo_note
+    with SessionLocal() as db:
+        sizes = {row.size for row in db.query(PhotoDerivative).filter_by(photo_key=hashlib.sha256(photo).hexdigest())}
+    assert sizes == {"thumb", "medium"}
+    for size, side in (("thumb", 256), ("medium", 1024)):
+        response = client.get(f"/notes/{note['id']}/photo", params={"size": size}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        assert f"fort-{size}.webp" in response.headers["content-disposition"]
+        assert max(Image.open(io.BytesIO(response.content)).size) == side
+    assert client.get(f"/notes/{note['id']}/photo", params={"size": "huge"}, headers=auth_headers).status_code == 422
+
+
+def test_missing_derivatives_are_rendered_on_first_request(client, auth_headers, photo_note):
+    note, photo = photo_note
+    with SessionLocal() as db:
+        db.query(PhotoDerivative).filter_by(photo_key=hashlib.sha256(photo).hexdigest()).delete()
+        db.commit()
+    response = client.get(f"/notes/{note['id']}/photo", params={"size": "thumb"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert max(Image.open(io.BytesIO(response.content)).size) == 256
+
+
+def test_small_photos_are_served_as_they_are():
+    assert render_derivatives(jpeg(200, 100)) == {"medium": None, "thumb": None}
+
+
+def test_derivatives_are_saved_upright():
+    buf = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (200, 100)).save(buf, "JPEG", exif=exif)
+    rendered = render_derivatives(buf.getvalue())
+    assert Image.open(io.BytesIO(rendered["thumb"])).size == (100, 200)
+
+
+def test_derivative_filename():
+    assert derivative_filename("IMG_01.jpg", "thumb", "image/webp") == "IMG_01-thumb.webp"
+    assert derivative_filename("IMG_01.jpg", "thumb", "image/png") == "IMG_01.jpg"
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from api.notes import decode_cursor, encode_cursor
+from db import SessionLocal
+from models import Note
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(created_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "bm8gc2VwYXJhdG9y", "MjAyNC0wMS0wMXxhYmM"])
+def test_bad_cursor_is_a_client_error(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+@pytest.fixture
+def notes(auth_headers, user_id):
+    """Sixty notes one minute apart, the newest at 2024-01-01 01:00 UTC."""
+    newest = datetime(2024, 1, 1, 1, 0)
+    with SessionLocal() as db:
+        db.add_all([
+            Note(user_id=user_id, latitude=28.6, longitude=77.2, text=f"note {i}", created_at=newest - timedelta(minutes=i))
+            for i in range(60)
+        ])
+        db.commit()
+    return auth_headers
+
+
+def texts(response):
+    return [note["text"] for note in response.json()]
+
+
+def test_list_without_paging_returns_every_note(client, notes):
+    response = client.get("/notes/", headers=notes)
+    assert texts(response) == [f"note {i}" for i in range(60)]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_pages_follow_the_cursor(client, notes):
+    seen, params = [], {"limit": 25}
+    while True:
+        response = client.get("/notes/", params=params, headers=notes)
+        seen += texts(response)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": 25, "cursor": cursor}
+    assert seen == [f"note {i}" for i in range(60)]
+
+
+def test_cursor_alone_uses_the_default_page_size(client, notes):
+    first = client.get("/notes/", params={"limit": 1}, headers=notes)
+    response = client.get("/notes/", params={"cursor": first.headers["X-Next-Cursor"]}, headers=notes)
+    assert texts(response) == [f"note {i}" for i in range(1, 51)]
+
+
+def test_since_and_until_with_an_offset_are_compared_in_utc(client, notes):
+    # 06:20+05:30 is 00:50 UTC, 06:25+05:30 is 00:55 UTC
+    params = {"since": "2024-01-01T06:20:00+05:30", "until": "2024-01-01T06:25:00+05:30"}
+    response = client.get("/notes/", params=params, headers=notes)
+    assert texts(response) == [f"note {i}" for i in range(6, 11)]
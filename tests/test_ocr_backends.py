@@ -0,0 +1,48 @@
+import sys
+import types
+
+import pytest
+
+from services.ocr_backends import PytesseractBackend, TesserocrBackend, create_backend
+
+
+def fake_tesserocr(monkeypatch, error=None):
+    class PyTessBaseAPI:
+        def __init__(self, lang="eng", path=None):
+            if error:
+                raise error
+            self.lang = lang
+
+        def End(self):
+            pass
+
+    monkeypatch.setitem(sys.modules, "tesserocr", types.SimpleNamespace(PyTessBaseAPI=PyTessBaseAPI))
+
+
+def test_auto_prefers_tesserocr(monkeypatch):
+    fake_tesserocr(monkeypatch)
+    assert isinstance(create_backend("auto"), TesserocrBackend)
+
+
+def test_auto_falls_back_when_tesserocr_is_missing(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tesserocr", None)
+    assert isinstance(create_backend("auto"), PytesseractBackend)
+    with pytest.raises(ImportError):
+        create_backend("tesserocr")
+
+
+def test_auto_falls_back_when_tesserocr_finds_no_tessdata(monkeypatch):
+    fake_tesserocr(monkeypatch, RuntimeError("Failed to init API, possibly an invalid tessdata path"))
+    assert isinstance(create_backend("auto"), PytesseractBackend)
+    assert isinstance(create_backend("tesserocr"), TesserocrBackend)
+
+
+def test_engines_are_kept_per_language_set_and_bounded(monkeypatch):
+    fake_tesserocr(monkeypatch)
+    backend = TesserocrBackend(max_engines=2)
+    hin = backend._engine("hin")
+    assert backend._engine("hin") is hin
+    backend._engine("tam")
+    backend._engine("hin")  # recently used, so tam is evicted first
+    backend._engine("tel")
+    assert list(backend._engines) == ["hin", "tel"]
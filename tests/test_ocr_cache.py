@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from services import ocr_cache as ocr_cache_module
+from services.ocr_cache import OCRCache
+
+
+@pytest.fixture
+def persistent_cache(client):
+    return OCRCache(phash_distance=4, persist=True)
+
+
+async def phash_of(value):
+    return value
+
+
+def lookup(cache, digest, phash):
+    return asyncio.run(cache.get(digest, "eng", lambda: phash_of(phash)))
+
+
+def test_persisted_results_match_near_identical_photos(persistent_cache):
+    asyncio.run(persistent_cache.put("a" * 64, "eng", "RED FORT", 0x1234_0000_0000_00FF))
+    persistent_cache.clear()
+    assert lookup(persistent_cache, "b" * 64, 0x1234_0000_0000_00F0) == ("RED FORT", 0x1234_0000_0000_00F0)
+
+
+def test_persisted_near_match_respects_the_distance(persistent_cache):
+    asyncio.run(persistent_cache.put("c" * 64, "eng", "INDIA GATE", 0x5678_0000_0000_0000))
+    persistent_cache.clear()
+    assert lookup(persistent_cache, "d" * 64, 0x5678_0000_0000_001F) == (None, 0x5678_0000_0000_001F)
+    assert asyncio.run(persistent_cache.get("e" * 64, "hin", lambda: phash_of(0x5678_0000_0000_0000)))[0] is None
+
+
+def test_results_are_keyed_on_image_and_language():
+    cache = OCRCache(persist=False)
+    asyncio.run(cache.put("a" * 64, "eng", "RED FORT"))
+    assert asyncio.run(cache.get("a" * 64, "eng")) == ("RED FORT", None)
+    assert asyncio.run(cache.get("a" * 64, "hin")) == (None, None)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = OCRCache(max_entries=2, persist=False)
+    asyncio.run(cache.put("a", "eng", "A"))
+    asyncio.run(cache.put("b", "eng", "B"))
+    asyncio.run(cache.get("a", "eng"))
+    asyncio.run(cache.put("c", "eng", "C"))
+    assert asyncio.run(cache.get("b", "eng"))[0] is None
+    assert asyncio.run(cache.get("a", "eng"))[0] == "A"
+
+
+def test_entries_expire(monkeypatch):
+    cache = OCRCache(ttl=60, persist=False)
+    asyncio.run(cache.put("a", "eng", "A"))
+    now = ocr_cache_module.time.monotonic()
+    monkeypatch.setattr(ocr_cache_module.time, "monotonic", lambda: now + 61)
+    assert asyncio.run(cache.get("a", "eng"))[0] is None
+
+
+def test_near_identical_photo_is_served_from_memory():
+    cache = OCRCache(phash_distance=4, persist=False)
+    asyncio.run(cache.put("a", "eng", "RED FORT", 0b1111))
+    assert lookup(cache, "b", 0b0111) == ("RED FORT", 0b0111)
+    assert lookup(cache, "c", 0b1111_0000_0000) == (None, 0b1111_0000_0000)
+    assert cache.stats()["near_hits"] == 1
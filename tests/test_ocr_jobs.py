@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from db import SessionLocal, engine
+from migrations.runner import upgrade
+from models import OCRJob
+from services.ocr_jobs import QUEUED, RUNNING, OCRJobRunner
+
+
+class RecordingRunner(OCRJobRunner):
+    """Records the jobs it would run instead of running OCR."""
+
+    def __init__(self, **kwargs):
+        super().__init__(concurrency=1, **kwargs)
+        self.started = []
+
+    async def _run(self, job_id):
+        self.started.append(job_id)
+
+
+def add_job(job_id, status=RUNNING, lease_seconds=None):
+    lease = datetime.utcnow() + timedelta(seconds=lease_seconds) if lease_seconds is not None else None
+    with SessionLocal() as db:
+        db.add(OCRJob(
+            id=job_id, status=status, attempts=1 if status == RUNNING else 0,
+            started_at=datetime.utcnow() if status == RUNNING else None, lease_expires_at=lease,
+            image_key="0" * 64, lang="hin", preprocess="none", source_script="auto", target_script="iast",
+        ))
+        db.commit()
+
+
+def status_of(job_id):
+    with SessionLocal() as db:
+        return db.get(OCRJob, job_id).status
+
+
+@pytest.fixture(autouse=True)
+def jobs_table():
+    upgrade(engine)
+    with SessionLocal() as db:
+        db.query(OCRJob).delete()
+        db.commit()
+
+
+def test_recover_runs_jobs_of_a_dead_process_but_not_leased_ones():
+    add_job("queued", status=QUEUED)
+    add_job("expired", lease_seconds=-1)
+    add_job("no-lease")
+    add_job("leased", lease_seconds=60)
+    runner = RecordingRunner()
+
+    async def recover():
+        recovered = await runner.recover()
+        await asyncio.sleep(0.05)
+        await runner.stop()
+        return recovered
+
+    assert asyncio.run(recover()) == 3
+    assert sorted(runner.started) == ["expired", "no-lease", "queued"]
+    assert status_of("leased") == RUNNING
+
+
+def test_sweep_picks_up_a_job_whose_lease_runs_out():
+    add_job("restarted", lease_seconds=0.2)
+    runner = RecordingRunner(lease=0.1)
+
+    async def run_for(seconds):
+        await runner.recover()
+        assert runner.started == []
+        await asyncio.sleep(seconds)
+        await runner.stop()
+
+    asyncio.run(run_for(0.6))
+    assert runner.started == ["restarted"]
+    assert status_of("restarted") == QUEUED
+    assert runner.counters["recovered"] == 1
+
+
+def test_lease_is_renewed_while_a_job_runs():
+    add_job("long", status=QUEUED)
+    runner = OCRJobRunner(lease=0.15)
+
+    async def claim_and_renew():
+        job = await runner._claim("long")
+        renew = asyncio.get_running_loop().create_task(runner._renew(job))
+        await asyncio.sleep(0.5)
+        expired = await runner._requeue_expired()
+        renew.cancel()
+        return expired
+
+    assert asyncio.run(claim_and_renew()) == []
+    assert status_of("long") == RUNNING
+
+
+def test_events_of_a_missing_job_end_with_an_error():
+    from api.ocr import job_events
+
+    async def collect():
+        return [event async for event in job_events("missing")]
+
+    assert asyncio.run(collect()) == ['event: error\ndata: {"detail": "OCR job not found"}\n\n']
@@ -0,0 +1,56 @@
+import asyncio
+import io
+import os
+import time
+import uuid
+
+import pytest
+from PIL import Image
+
+from services import ocr_pool as ocr_pool_module
+from services.ocr_pool import OCRPool, OCRQueueFullError, OCRTimeoutError, OCRWorkerCrashedError
+
+
+@pytest.fixture
+def pool():
+    pool = OCRPool(max_workers=1, queue_size=1, timeout=10)
+    yield pool
+    pool.shutdown()
+
+
+def test_runs_jobs_in_a_worker_process(pool):
+    assert asyncio.run(pool.run(os.getpid)) != os.getpid()
+
+
+def test_rejects_jobs_beyond_workers_and_queue(pool):
+    running = [pool.submit(time.sleep, 0.5) for _ in range(pool.capacity)]
+    with pytest.raises(OCRQueueFullError):
+        pool.submit(time.sleep, 0)
+    for future in running:
+        future.result()
+    assert pool.pending == 0
+
+
+def test_slow_job_times_out(pool):
+    with pytest.raises(OCRTimeoutError):
+        asyncio.run(pool.run(time.sleep, 2, timeout=0.2))
+
+
+def test_crashed_worker_is_replaced(pool):
+    with pytest.raises(OCRWorkerCrashedError):
+        asyncio.run(pool.run(os._exit, 1))
+    assert asyncio.run(pool.run(abs, -3)) == 3
+
+
+def test_full_queue_is_a_429(client, monkeypatch):
+    monkeypatch.setattr(ocr_pool_module.pool, "_pending", ocr_pool_module.pool.capacity)
+    image = io.BytesIO()
+    # A fresh image every run, so the OCR cache cannot answer it
+    Image.new("RGB", (64, 64), tuple(uuid.uuid4().bytes[:3])).save(image, "PNG")
+    response = client.post(
+        "/transliterate/image",
+        files={"file": ("sign.png", image.getvalue(), "image/png")},
+        data={"target_script": "iast"},
+    )
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,71 @@
+import io
+
+import pytest
+from PIL import Image
+
+from services import ocr_service
+from services.image_preprocess import get_preset
+from services.ocr_backends import OCRBackend
+
+
+class FakeBackend(OCRBackend):
+    """Reads the same text off every image and records the passes made."""
+
+    def __init__(self, text="नमस्ते भारत"):
+        self.text = text
+        self.calls = []
+
+    def image_to_string(self, image, lang):
+        self.calls.append((image.size, lang))
+        return self.text
+
+
+def png(width, height):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(buf, "PNG")
+    return buf.getvalue()
+
+
+def read(backend, monkeypatch, size, lang):
+    monkeypatch.setattr(ocr_service, "get_backend", lambda: backend)
+    return ocr_service.image_to_text(png(*size), lang, get_preset(None))
+
+
+DOCUMENT = ocr_service.auto_lang("hin+tam+tel+mal+pan")
+
+
+def test_callers_detect_from_their_own_baseline_packs():
+    assert ocr_service.detection_langs(ocr_service.DEFAULT_LANG) == "eng+hin"
+    assert ocr_service.detection_langs(ocr_service.DOCUMENT_LANG) == "hin+tam+tel+mal+pan"
+    assert ocr_service.detection_langs("tam") is None
+
+
+def test_small_image_is_read_once_with_every_pack(monkeypatch):
+    backend = FakeBackend()
+    assert read(backend, monkeypatch, (400, 300), DOCUMENT) == "नमस्ते भारत"
+    assert backend.calls == [((400, 300), "hin+tam+tel+mal+pan")]
+
+
+def test_large_image_is_read_again_with_its_scripts_packs(monkeypatch):
+    backend = FakeBackend("வணக்கம் சென்னை")
+    read(backend, monkeypatch, (1600, 1200), DOCUMENT)
+    # A Tamil document still gets the Tamil pack
+    assert backend.calls == [((800, 600), "hin+tam+tel+mal+pan"), ((1600, 1200), "tam")]
+
+
+def test_mixed_image_keeps_both_scripts(monkeypatch):
+    backend = FakeBackend("నమస్కారం హైదరాబాద్ வணக்கம் சென்னை")
+    read(backend, monkeypatch, (1600, 1200), DOCUMENT)
+    assert backend.calls[-1] == ((1600, 1200), "tam+tel")
+
+
+def test_two_script_set_skips_the_detection_pass(monkeypatch):
+    backend = FakeBackend()
+    read(backend, monkeypatch, (1600, 1200), ocr_service.auto_lang("eng+hin"))
+    assert backend.calls == [((1600, 1200), "eng+hin")]
+
+
+def test_given_lang_is_used_as_is(monkeypatch):
+    backend = FakeBackend()
+    read(backend, monkeypatch, (1600, 1200), "tam")
+    assert backend.calls == [((1600, 1200), "tam")]
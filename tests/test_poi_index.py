@@ -0,0 +1,65 @@
+import random
+
+import numpy as np
+import pytest
+
+from services.geo import haversine_km
+from services.poi_index import POI, POIIndex
+
+
+def synthetic_pois(rng, count=2000):
+    pois = [
+        POI(f"place {i}", "Monument", "", "", rng.uniform(6.0, 36.0), rng.uniform(68.0, 98.0))
+        for i in range(count)
+    ]
+    # A few on either side of the antimeridian
+    pois += [POI("east", "Monument", "", "", -17.0, 179.9), POI("west", "Monument", "", "", -17.0, -179.9)]
+    return pois
+
+
+def brute_force(pois, lat, lon):
+    distances = haversine_km(lat, lon, np.array([p.latitude for p in pois]), np.array([p.longitude for p in pois]))
+    return sorted(zip(distances.tolist(), [p.name for p in pois]))
+
+
+@pytest.fixture(scope="module")
+def index():
+    index = POIIndex()
+    index.load(synthetic_pois(random.Random(7)))
+    return index
+
+
+@pytest.fixture(scope="module")
+def queries():
+    rng = random.Random(11)
+    # Pairs of nearby points, so the second of each is answered from the first one's cached candidates
+    points = [(rng.uniform(8.0, 34.0), rng.uniform(70.0, 96.0)) for _ in range(100)]
+    return [q for lat, lon in points for q in ((lat, lon), (lat + 0.003, lon - 0.004))]
+
+
+def test_radius_matches_brute_force(index, queries):
+    for lat, lon in queries:
+        expected = [name for d, name in brute_force(index.pois, lat, lon) if d <= 50][:20]
+        assert [poi.name for poi, _ in index.within_radius(lat, lon, 50, limit=20)] == expected
+    assert index.stats()["hits"] > 0
+
+
+def test_nearest_matches_brute_force(index, queries):
+    for lat, lon in queries:
+        expected = [name for _, name in brute_force(index.pois, lat, lon)[:5]]
+        assert [poi.name for poi, _ in index.nearest(lat, lon, 5)] == expected
+
+
+def test_search_wraps_around_the_antimeridian(index):
+    assert {poi.name for poi, _ in index.within_radius(-17.0, 179.95, 30)} == {"east", "west"}
+    assert {poi.name for poi, _ in index.nearest(-17.0, -179.95, 2)} == {"east", "west"}
+
+
+def test_nearby_endpoint_uses_the_shipped_dataset(client):
+    response = client.get("/tourism/nearby", params={"lat": 28.6125, "lon": 77.2290, "limit": 3})
+    assert response.status_code == 200, response.text
+    places = response.json()["places"]
+    assert places[0]["name"] == "India Gate"
+    assert [p["distance_km"] for p in places] == sorted(p["distance_km"] for p in places)
+    response = client.get("/tourism/nearby", params={"lat": 28.6139, "lon": 77.2090, "radius_km": 5})
+    assert all(p["distance_km"] <= 5 for p in response.json()["places"])
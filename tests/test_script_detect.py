@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from services.script_detect import LATIN, SCRIPTS, auto_lang_sets, narrow_langs, narrows, script_labels, split_scripts
+from services.translit_engine import TransliterationEngine
+
+
+@pytest.fixture
+def engine():
+    return TransliterationEngine()
+
+
+def test_single_script():
+    assert split_scripts("नमस्ते भारत।").runs == [("devanagari", "नमस्ते भारत।")]
+    assert split_scripts("123, ...").script is None
+    assert split_scripts("").runs == []
+
+
+def test_mixed_english_and_indic_runs():
+    detected = split_scripts("INDIA GATE इंडिया गेट")
+    assert detected.runs == [(LATIN, "INDIA GATE "), ("devanagari", "इंडिया गेट")]
+    # More Latin letters than Devanagari ones, but English does not make the text romanized
+    assert detected.script == "devanagari"
+
+
+def test_iast_diacritics_are_latin():
+    # ṛ (U+1E5B) and ṣ (U+1E63) are in Latin Extended Additional, ā (U+0101) in Latin Extended-A
+    assert (script_labels("ṛṣiā") == SCRIPTS.index(LATIN) + 1).all()
+    detected = split_scripts("नमस्ते ṛṣi")
+    assert detected.runs == [("devanagari", "नमस्ते "), (LATIN, "ṛṣi")]
+    assert split_scripts("ṛṣi kṛṣṇa").runs == [(LATIN, "ṛṣi kṛṣṇa")]
+
+
+def test_latin_runs_pass_through_detection(engine):
+    assert engine.transliterate_detected("INDIA GATE इंडिया गेट", "devanagari") == (
+        "INDIA GATE इंडिया गेट",
+        "devanagari",
+    )
+    assert engine.transliterate_detected("Hello नमस्ते world", "telugu") == ("Hello నమస్తే world", "devanagari")
+    assert engine.transliterate_detected("नमस्ते ṛṣi", "tamil") == ("நமஸ்தே ṛṣi", "devanagari")
+
+
+def test_latin_only_text_is_left_alone_unless_named(engine):
+    conversion = asyncio.run(engine.convert("ṛṣi", None, "devanagari"))
+    assert (conversion.text, conversion.source_script, conversion.detected_script) == ("ṛṣi", "iast", "iast")
+    conversion = asyncio.run(engine.convert("hello world", None, "tamil"))
+    assert (conversion.text, conversion.source_script, conversion.detected_script) == ("hello world", "iast", "iast")
+    conversion = asyncio.run(engine.convert("ṛṣi", "iast", "devanagari"))
+    assert (conversion.text, conversion.source_script) == ("ऋषि", "iast")
+
+
+def test_narrow_langs_keeps_packs_of_found_scripts():
+    assert narrow_langs("eng+hin+tam", ["devanagari"]) == "hin"
+    assert narrow_langs("eng+hin+tam", ["tamil", "iast"]) == "eng+tam"
+    assert narrow_langs("eng+hin", ["kannada"]) == "eng+hin"
+
+
+def test_narrows_only_sets_of_more_than_two_scripts():
+    assert narrows("hin+tam+tel+mal+pan")
+    assert not narrows("eng+hin")
+    assert not narrows("hin+mar+san")
+
+
+def test_auto_lang_sets():
+    assert auto_lang_sets("eng+hin") == ["eng+hin", "eng", "hin"]
+    assert auto_lang_sets("eng+hin+tam", with_latin=False) == ["eng+hin+tam", "eng", "hin", "tam"]
+    assert auto_lang_sets("eng+hin+tam") == ["eng+hin+tam", "eng", "hin", "tam", "eng+hin", "eng+tam"]
+    # Packs of one script stay together; packs of unknown scripts are never narrowed to
+    assert auto_lang_sets("hin+mar+tam+osd") == ["hin+mar+tam+osd", "hin+mar", "tam"]
@@ -0,0 +1,52 @@
+import asyncio
+import io
+
+import pytest
+from PIL import Image
+
+from api import translit as translit_api
+from services.translit_engine import engine
+
+TEXT = "नमस्ते, welcome to భారత"
+
+
+@pytest.fixture
+def expected():
+    return asyncio.run(engine.convert(TEXT, None, "tamil"))
+
+
+def test_text_endpoints_share_one_conversion(client, expected):
+    single = client.post("/transliterate/", json={"source_text": TEXT, "target_script": "Tamil"}).json()
+    ocr = client.post("/ocr/", data={"text": TEXT, "target_script": "tamil"}).json()
+    for body in (single, ocr):
+        assert (body["transliterated_text"], body["detected_script"]) == (expected.text, expected.detected_script)
+    assert single["source_script"] == expected.source_script == "devanagari"
+
+
+def test_image_endpoint_converts_the_text_read(client, expected, monkeypatch):
+    async def ocr_upload(file, lang=None, options=None):
+        return TEXT
+
+    monkeypatch.setattr(translit_api, "ocr_upload", ocr_upload)
+    image = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(image, "PNG")
+    response = client.post(
+        "/transliterate/image",
+        files={"file": ("sign.png", image.getvalue(), "image/png")},
+        data={"target_script": "tamil"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["transliterated_text"] == expected.text
+
+
+@pytest.mark.parametrize("path, payload", [
+    ("/transliterate/", {"json": {"source_text": "नमस्ते", "target_script": "klingon"}}),
+    ("/transliterate/", {"json": {"source_text": "नमस्ते", "source_script": "klingon", "target_script": "iast"}}),
+    ("/transliterate/batch", {"json": {"texts": ["नमस्ते"], "target_scripts": ["klingon"]}}),
+    ("/ocr/", {"data": {"text": "नमस्ते", "target_script": "klingon"}}),
+    ("/transliterate/stream?target_script=klingon", {"content": "नमस्ते".encode("utf-8")}),
+])
+def test_unsupported_scripts_are_a_400_everywhere(client, path, payload):
+    response = client.post(path, **payload)
+    assert response.status_code == 400
+    assert "klingon" in response.json()["detail"]
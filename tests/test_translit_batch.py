@@ -0,0 +1,29 @@
+from indic_transliteration import sanscript
+
+from schemas import MAX_BATCH_TEXTS
+
+
+def test_every_text_in_every_target_script(client):
+    texts = ["नमस्ते", "भारत"]
+    response = client.post(
+        "/transliterate/batch",
+        json={"texts": texts, "source_script": "hindi", "target_scripts": ["iast", "tamil"]},
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["source_script"], body["target_scripts"]) == ("devanagari", ["iast", "tamil"])
+    assert body["results"] == [
+        [sanscript.transliterate(text, "devanagari", target) for target in ("iast", "tamil")] for text in texts
+    ]
+
+
+def test_unsupported_target_script_is_a_client_error(client):
+    response = client.post("/transliterate/batch", json={"texts": ["नमस्ते"], "target_scripts": ["iast", "elvish"]})
+    assert response.status_code == 400
+    assert "elvish" in response.json()["detail"]
+
+
+def test_batch_size_is_bounded(client):
+    texts = ["नमस्ते"] * (MAX_BATCH_TEXTS + 1)
+    assert client.post("/transliterate/batch", json={"texts": texts, "target_scripts": ["iast"]}).status_code == 422
+    assert client.post("/transliterate/batch", json={"texts": [], "target_scripts": ["iast"]}).status_code == 422
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from indic_transliteration import sanscript
+
+from services.translit_engine import TransliterationEngine, UnsupportedScriptError, normalize_script_name
+
+
+@pytest.fixture
+def engine():
+    return TransliterationEngine(cache_size=2, cache_max_chars=16)
+
+
+def test_matches_sanscript(engine):
+    for target in ("iast", "tamil", "telugu", "gurmukhi"):
+        expected = sanscript.transliterate("नमस्ते भारत", "devanagari", target)
+        assert engine.transliterate("नमस्ते भारत", "devanagari", target) == expected
+
+
+def test_short_texts_are_memoized(engine):
+    engine.transliterate("नमस्ते", "devanagari", "iast")
+    engine.transliterate("नमस्ते", "devanagari", "iast")
+    assert (engine.stats()["hits"], engine.stats()["misses"]) == (1, 1)
+
+
+def test_long_texts_bypass_the_memo(engine):
+    text = "नमस्ते भारत " * 4
+    assert engine.transliterate(text, "devanagari", "iast") == sanscript.transliterate(text, "devanagari", "iast")
+    assert (engine.stats()["uncached"], engine.stats()["entries"]) == (1, 0)
+
+
+def test_scheme_maps_are_built_once_per_pair(engine):
+    engine.warm(["devanagari", "iast", "tamil"])
+    assert engine.stats()["scheme_maps"] == 6
+    assert engine.scheme_map("devanagari", "tamil") is engine.scheme_map("devanagari", "tamil")
+
+
+def test_script_names_are_normalized_and_checked(engine):
+    assert normalize_script_name(" Hindi ") == "devanagari"
+    assert normalize_script_name("") is None
+    with pytest.raises(UnsupportedScriptError) as error:
+        asyncio.run(engine.convert("नमस्ते", "klingon", "elvish"))
+    assert error.value.names == ["klingon", "elvish"]
+
+
+def test_same_script_is_returned_unchanged(engine):
+    assert engine.transliterate("नमस्ते", "devanagari", "devanagari") == "नमस्ते"
+    assert engine.stats()["misses"] == 0
@@ -0,0 +1,55 @@
+import json
+
+from api import translit
+from api.translit import iter_text_units
+
+
+def events(response):
+    assert response.status_code == 200, response.text
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_stream_converts_line_by_line(client):
+    response = client.post(
+        "/transliterate/stream?target_script=iast", content="नमस्ते\n\nभारत\n".encode("utf-8")
+    )
+    assert [e["transliterated_text"] for e in events(response)] == ["namaste", "", "bhārata"]
+
+
+def test_stream_converts_paragraphs(client):
+    response = client.post(
+        "/transliterate/stream?target_script=iast&unit=paragraph",
+        content="नमस्ते\nभारत\n\n\nगंगा".encode("utf-8"),
+    )
+    assert [e["source_text"] for e in events(response)] == ["नमस्ते\nभारत", "गंगा"]
+
+
+def test_stream_spools_large_bodies_to_disk(client, monkeypatch):
+    monkeypatch.setattr(translit, "STREAM_SPOOL_BYTES", 64)
+    body = "नमस्ते\n" * 200
+    response = client.post("/transliterate/stream?target_script=iast", content=body.encode("utf-8"))
+    assert [e["transliterated_text"] for e in events(response)] == ["namaste"] * 200
+
+
+def test_stream_splits_long_lines_at_whitespace(client, monkeypatch):
+    monkeypatch.setattr(translit, "STREAM_MAX_SEGMENT_CHARS", 16)
+    body = " ".join(["नमस्ते"] * 10)
+    response = client.post("/transliterate/stream?target_script=iast", content=body.encode("utf-8"))
+    segments = [e["source_text"] for e in events(response)]
+    assert "".join(segments) == body
+    assert all(len(segment) <= 16 and segment.startswith("न") for segment in segments)
+
+
+def test_segments_without_whitespace_are_cut_at_the_limit():
+    assert list(iter_text_units(["abcdefghij"], "line", max_chars=4)) == ["abcd", "efgh", "ij"]
+    assert list(iter_text_units(["ab cd", "ef\n", "\n", "gh\n"], "paragraph", max_chars=4)) == ["ab ", "cdef", "gh"]
+
+
+def test_stream_as_server_sent_events(client):
+    response = client.post(
+        "/transliterate/stream?target_script=iast&format=sse", content="नमस्ते\nभारत".encode("utf-8")
+    )
+    assert response.headers["content-type"].startswith("text/event-stream")
+    messages = response.text.split("\n\n")
+    assert [json.loads(m[len("data: "):])["transliterated_text"] for m in messages[:2]] == ["namaste", "bhārata"]
+    assert messages[2] == "event: end\ndata: {}"
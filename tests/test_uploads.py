@@ -0,0 +1,89 @@
+import asyncio
+import io
+import os
+
+import pytest
+
+from services.uploads import MULTIPART_OVERHEAD_BYTES, LimitedReader, UploadLimitMiddleware, UploadTooLargeError, _save
+
+MULTIPART = (b"content-type", b"multipart/form-data; boundary=x")
+
+
+async def read_body_app(scope, receive, send):
+    """Reads the whole body like a form parser would, then answers 200."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise RuntimeError("client disconnected")
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def call(middleware, headers, chunks):
+    messages = [{"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1} for i, chunk in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/notes/add-with-photo", "headers": headers}
+    asyncio.run(middleware(scope, receive, send))
+    return sent[0]["status"]
+
+
+def test_chunked_multipart_body_over_the_limit_is_a_413():
+    middleware = UploadLimitMiddleware(read_body_app, max_upload_bytes=1024)
+    chunks = [b"x" * 8192] * ((1024 + MULTIPART_OVERHEAD_BYTES) // 8192 + 2)
+    assert call(middleware, [MULTIPART], chunks) == 413
+
+
+def test_declared_length_over_the_limit_is_refused_before_reading():
+    middleware = UploadLimitMiddleware(read_body_app, max_upload_bytes=1024)
+    length = str(1024 + MULTIPART_OVERHEAD_BYTES + 1).encode()
+    assert call(middleware, [MULTIPART, (b"content-length", length)], []) == 413
+
+
+def test_bodies_within_the_limit_and_other_content_types_pass():
+    middleware = UploadLimitMiddleware(read_body_app, max_upload_bytes=1024)
+    assert call(middleware, [MULTIPART], [b"x" * 1024] * 4) == 200
+    big = [b"x" * 8192] * ((1024 + MULTIPART_OVERHEAD_BYTES) // 8192 + 2)
+    assert call(middleware, [(b"content-type", b"application/octet-stream")], big) == 200
+
+
+def test_limited_reader_stops_past_the_limit():
+    reader = LimitedReader(io.BytesIO(b"x" * 100), max_bytes=64)
+    assert reader.read(64) == b"x" * 64
+    with pytest.raises(UploadTooLargeError):
+        reader.read(1)
+
+
+def test_saved_upload_is_hashed_and_removed_when_too_large(tmp_path, monkeypatch):
+    monkeypatch.setattr("services.uploads.UPLOAD_TMP_DIR", str(tmp_path))
+    saved = _save(io.BytesIO(b"photo"), max_bytes=64)
+    assert (saved.size, open(saved.path, "rb").read()) == (5, b"photo")
+    os.unlink(saved.path)
+    with pytest.raises(UploadTooLargeError):
+        _save(io.BytesIO(b"x" * 100), max_bytes=64)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_chunked_photo_upload_over_the_limit_is_a_413(client, auth_headers):
+    from services.uploads import MAX_UPLOAD_BYTES
+
+    def body():
+        # A generator body is sent without Content-Length, chunk by chunk
+        yield b"--x\r\nContent-Disposition: form-data; name=\"photo\"; filename=\"big.jpg\"\r\n\r\n"
+        for _ in range(MAX_UPLOAD_BYTES // (1024 * 1024) + 1):
+            yield b"x" * (1024 * 1024)
+
+    response = client.post(
+        "/notes/add-with-photo",
+        content=body(),
+        headers={**auth_headers, "Content-Type": "multipart/form-data; boundary=x"},
+    )
+    assert response.status_code == 413
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from services import user_cache
+from services.user_cache import UserCache
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("sqlite:////srv/notes/app.db", "/srv/notes/app.db-auth-stamp"),
+        ("sqlite:///./app.db", os.path.abspath("app.db") + "-auth-stamp"),
+    ],
+)
+def test_stamp_sits_beside_sqlite_database(monkeypatch, url, expected):
+    monkeypatch.setattr(user_cache, "DATABASE_URL", url)
+    assert user_cache._default_stamp_path() == expected
+
+
+@pytest.mark.parametrize("url", ["sqlite://", "postgresql://notes@db/notes"])
+def test_stamp_without_database_file_is_in_app_directory(monkeypatch, url):
+    monkeypatch.setattr(user_cache, "DATABASE_URL", url)
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(user_cache.__file__)))
+    assert user_cache._default_stamp_path() == os.path.join(app_dir, ".auth_cache_stamp")
+
+
+def test_touching_the_stamp_drops_cached_users(tmp_path):
+    stamp = tmp_path / "stamp"
+    cache = UserCache(ttl=60, stamp_path=str(stamp))
+    cache.put(1, {"id": 1})
+    assert cache.get(1) == {"id": 1}
+    stamp.touch()
+    assert cache.get(1) is None
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from models import User
+from services import user_stats
+from services.user_stats import forget_recorded_scripts, scripts_recorded, unrecorded_scripts
+
+
+def user(user_id, day=1):
+    return User(id=user_id, created_at=datetime(2026, 1, day))
+
+
+def test_recorded_scripts_are_skipped():
+    forget_recorded_scripts()
+    assert sorted(unrecorded_scripts(user(1), ["tamil", "telugu"])) == ["tamil", "telugu"]
+    scripts_recorded(user(1), ["tamil"])
+    assert unrecorded_scripts(user(1), ["tamil", "telugu"]) == ["telugu"]
+    assert unrecorded_scripts(user(2), ["tamil"]) == ["tamil"]
+
+
+def test_a_reused_user_id_is_not_taken_for_the_old_user():
+    forget_recorded_scripts()
+    scripts_recorded(user(1), ["tamil"])
+    assert unrecorded_scripts(user(1, day=2), ["tamil"]) == ["tamil"]
+
+
+def test_users_from_token_claims_are_not_remembered():
+    forget_recorded_scripts()
+    scripts_recorded(User(id=1), ["tamil"])
+    assert unrecorded_scripts(User(id=1), ["tamil"]) == ["tamil"]
+
+
+def test_forgetting_a_user_keeps_the_others():
+    forget_recorded_scripts()
+    scripts_recorded(user(1), ["tamil"])
+    scripts_recorded(user(2), ["tamil"])
+    forget_recorded_scripts(1)
+    assert unrecorded_scripts(user(1), ["tamil"]) == ["tamil"]
+    assert unrecorded_scripts(user(2), ["tamil"]) == []
+
+
+def test_remembered_scripts_are_bounded(monkeypatch):
+    forget_recorded_scripts()
+    monkeypatch.setattr(user_stats, "USER_STATS_SEEN_SIZE", 2)
+    scripts_recorded(user(1), ["tamil"])
+    scripts_recorded(user(2), ["tamil"])
+    unrecorded_scripts(user(1), ["tamil"])  # recently used, so user 2 is evicted first
+    scripts_recorded(user(3), ["tamil"])
+    assert unrecorded_scripts(user(1), ["tamil"]) == []
+    assert unrecorded_scripts(user(2), ["tamil"]) == ["tamil"]
+
+
+def test_each_script_read_counts_once(client, auth_headers):
+    forget_recorded_scripts()
+    for text in ["नमस्ते", "भारत", "வணக்கம்"]:
+        response = client.post("/transliterate/", json={"source_text": text, "target_script": "iast"}, headers=auth_headers)
+        assert response.status_code == 200, response.text
+    forget_recorded_scripts()  # another process has not seen them either
+    client.post("/transliterate/", json={"source_text": "नमस्ते", "target_script": "iast"}, headers=auth_headers)
+    milestones = client.get("/milestones/me", headers=auth_headers).json()["milestones"]
+    assert {"type": "Scripts Read", "value": 2} in milestones
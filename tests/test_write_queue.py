@@ -0,0 +1,68 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from models import Note
+from services.write_queue import WriteQueue
+
+
+def add_note(user_id, text):
+    async def write(session):
+        note = Note(user_id=user_id, latitude=0.0, longitude=0.0, text=text)
+        session.add(note)
+        return text
+
+    return write
+
+
+async def count_notes(user_id):
+    from db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as session:
+        return await session.scalar(select(func.count()).select_from(Note).where(Note.user_id == user_id))
+
+
+def test_concurrent_writes_are_committed_together(user_id):
+    queue = WriteQueue(max_batch=64, linger=0.05)
+
+    async def run():
+        results = await asyncio.gather(*[queue.submit(add_note(user_id, f"note {i}")) for i in range(10)])
+        await queue.stop()
+        return results, await count_notes(user_id)
+
+    results, stored = asyncio.run(run())
+    assert results == [f"note {i}" for i in range(10)] and stored == 10
+    assert (queue.counters["writes"], queue.counters["commits"]) == (10, 1)
+
+
+def test_a_failing_write_does_not_fail_its_batch(user_id):
+    queue = WriteQueue(max_batch=64, linger=0.05)
+
+    async def bad(session):
+        raise ValueError("bad write")
+
+    async def run():
+        results = await asyncio.gather(
+            queue.submit(add_note(user_id, "kept")), queue.submit(bad), return_exceptions=True
+        )
+        await queue.stop()
+        return results, await count_notes(user_id)
+
+    (kept, error), stored = asyncio.run(run())
+    assert kept == "kept" and isinstance(error, ValueError) and stored == 1
+    assert (queue.counters["retried"], queue.counters["failed"]) == (2, 1)
+
+
+def test_stop_ends_the_writer_and_the_next_write_restarts_it(user_id):
+    queue = WriteQueue()
+
+    async def run():
+        await queue.submit(add_note(user_id, "first"))
+        writer = queue._task
+        await queue.stop()
+        assert writer.cancelled() and queue._task is None
+        await queue.submit(add_note(user_id, "second"))
+        await queue.stop()
+        return await count_notes(user_id)
+
+    assert asyncio.run(run()) == 2
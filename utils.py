@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -8,21 +10,39 @@ import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from db import get_db
 from models import User
+from services.user_cache import user_cache
+from services.user_stats import forget_recorded_scripts
 
 
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "super-secret-development-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+# bcrypt work factor for new hashes; existing hashes are upgraded at the next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Threads dedicated to password hashing. Kept small so a login burst queues here
+# instead of occupying the request threadpool or the event loop.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+
+# Build the current user from the token's signed claims alone. Skips the users
+# table entirely, so a deleted user keeps access until their token expires.
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "0") == "1"
+
+# User columns kept in the user cache.
+USER_CACHE_COLUMNS = ("id", "email", "password_hash", "created_at")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+_password_executor: Optional[ThreadPoolExecutor] = None
+
+
 def hash_password(plain_password: str) -> str:
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(plain_password.encode("utf-8"), salt).decode("utf-8")
 
 
@@ -33,6 +53,39 @@ def verify_password(plain_password: str, password_hash: str) -> bool:
         return False
 
 
+def password_needs_rehash(password_hash: str) -> bool:
+    """True when the hash was made with a different work factor than BCRYPT_ROUNDS."""
+    try:
+        # $2b$<rounds>$<salt+hash>
+        return int(password_hash.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+def _get_password_executor() -> ThreadPoolExecutor:
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    return _password_executor
+
+
+async def hash_password_async(plain_password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_get_password_executor(), hash_password, plain_password)
+
+
+async def verify_password_async(plain_password: str, password_hash: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(
+        _get_password_executor(), verify_password, plain_password, password_hash
+    )
+
+
+def shutdown_password_executor() -> None:
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
+        _password_executor = None
+
+
 def create_access_token(subject: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = subject.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -40,7 +93,10 @@ def create_access_token(subject: dict, expires_delta: Optional[timedelta] = None
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
+
+
+async def _user_from_token(db: AsyncSession, token: str) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -51,10 +107,45 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
         user_id = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        user_id = int(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
-        raise credentials_exception
-    return user
+    if AUTH_TRUST_TOKEN_CLAIMS:
+        return User(id=user_id, email=payload.get("email"))
+
+    # Handlers get a fresh detached User either way, never an instance from another request's session
+    values = user_cache.get(user_id)
+    if values is None:
+        user = await db.scalar(select(User).where(User.id == user_id))
+        if user is None:
+            raise credentials_exception
+        values = {column: getattr(user, column) for column in USER_CACHE_COLUMNS}
+        user_cache.put(user_id, values)
+    return User(**values)
+
+
+def invalidate_cached_user(user_id: Optional[int] = None) -> None:
+    """Call after deleting a user or changing their credentials."""
+    user_cache.invalidate(user_id)
+    forget_recorded_scripts(user_id)
+
+
+async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+    return await _user_from_token(db, token)
+
+
+async def get_optional_user(
+    db: AsyncSession = Depends(get_db), token: Optional[str] = Depends(oauth2_scheme_optional)
+) -> Optional[User]:
+    """The signed-in user for endpoints that also serve anonymous callers.
+
+    A token that is expired or otherwise invalid is served as anonymous rather
+    than refused, since these endpoints do not need a user.
+    """
+    if token is None:
+        return None
+    try:
+        return await _user_from_token(db, token)
+    except HTTPException:
+        return None